@@ -0,0 +1,28 @@
+"""add_user_token_version
+
+Revision ID: a4d8f2c6e9b1
+Revises: e5b9d2f7a3c1
+Create Date: 2025-11-12 09:14:05.213774
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8f2c6e9b1'
+down_revision: Union[str, Sequence[str], None] = 'e5b9d2f7a3c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,48 @@
+"""add_trigram_search_indexes
+
+Revision ID: a9d3f7b1c2e5
+Revises: f4c6a8e2d9b7
+Create Date: 2025-11-05 09:41:27.662013
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d3f7b1c2e5'
+down_revision: Union[str, Sequence[str], None] = 'f4c6a8e2d9b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Requer permissão para criar extensões (ou que já tenham sido criadas pelo DBA).
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() é STABLE e não pode ser usada em índices; este invólucro com o dicionário
+    # fixo é IMMUTABLE. A busca (app/services/search_service.py) usa a mesma expressão.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    op.execute(
+        "CREATE INDEX ix_products_name_trgm ON products "
+        "USING gin (lower(immutable_unaccent(name)) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_customers_full_name_trgm ON customers "
+        "USING gin (lower(immutable_unaccent(full_name)) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_customers_full_name_trgm', table_name='customers')
+    op.drop_index('ix_products_name_trgm', table_name='products')
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
+    # As extensões ficam: podem ser usadas por outros objetos do banco.
@@ -0,0 +1,39 @@
+"""add_order_item_removals
+
+Revision ID: b2e6c8a4f7d3
+Revises: a4d8f2c6e9b1
+Create Date: 2025-11-12 10:02:47.905361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e6c8a4f7d3'
+down_revision: Union[str, Sequence[str], None] = 'a4d8f2c6e9b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_item_removals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('order_item_id', sa.Integer(), nullable=False),
+        sa.Column('removed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_item_removals_store_id_removed_at', 'order_item_removals', ['store_id', 'removed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_item_removals_store_id_removed_at', table_name='order_item_removals')
+    op.drop_table('order_item_removals')
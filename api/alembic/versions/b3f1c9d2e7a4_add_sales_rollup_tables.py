@@ -0,0 +1,111 @@
+"""add_sales_rollup_tables
+
+Revision ID: b3f1c9d2e7a4
+Revises: 84f1e4a30b5e
+Create Date: 2025-10-28 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c9d2e7a4'
+down_revision: Union[str, Sequence[str], None] = '84f1e4a30b5e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_hourly_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'sale_date', 'hour', 'user_id', name='uq_sales_hourly_rollups_key')
+    )
+    op.create_table('sales_payment_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('payment_method', sa.String(length=50), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'sale_date', 'payment_method', name='uq_sales_payment_rollups_key')
+    )
+    op.create_table('sales_category_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.ForeignKeyConstraint(['category_id'], ['product_categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'sale_date', 'category_id', name='uq_sales_category_rollups_key')
+    )
+    op.create_table('sales_product_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_revenue', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'sale_date', 'product_id', name='uq_sales_product_rollups_key')
+    )
+
+    # --- Backfill inicial a partir das vendas existentes ---
+    # (equivalente a `python -m app.db.rebuild_sales_rollups` sem argumentos)
+    op.execute("""
+        INSERT INTO sales_hourly_rollups (store_id, sale_date, hour, user_id, total_amount, transaction_count)
+        SELECT store_id, date(created_at), CAST(extract(hour FROM created_at) AS INTEGER), user_id,
+               sum(total_amount), count(id)
+        FROM sales
+        GROUP BY store_id, date(created_at), CAST(extract(hour FROM created_at) AS INTEGER), user_id
+    """)
+    op.execute("""
+        INSERT INTO sales_payment_rollups (store_id, sale_date, payment_method, total_amount, transaction_count)
+        SELECT s.store_id, date(s.created_at), p.payment_method, sum(p.amount), count(p.id)
+        FROM payments p JOIN sales s ON p.sale_id = s.id
+        GROUP BY s.store_id, date(s.created_at), p.payment_method
+    """)
+    op.execute("""
+        INSERT INTO sales_category_rollups (store_id, sale_date, category_id, total_amount, transaction_count)
+        SELECT s.store_id, date(s.created_at), pr.category_id,
+               sum(si.quantity * si.price_at_sale), count(DISTINCT s.id)
+        FROM sale_items si
+        JOIN sales s ON si.sale_id = s.id
+        JOIN products pr ON si.product_id = pr.id
+        WHERE pr.category_id IS NOT NULL
+        GROUP BY s.store_id, date(s.created_at), pr.category_id
+    """)
+    op.execute("""
+        INSERT INTO sales_product_rollups (store_id, sale_date, product_id, quantity_sold, total_revenue)
+        SELECT s.store_id, date(s.created_at), si.product_id,
+               sum(si.quantity), sum(si.quantity * si.price_at_sale)
+        FROM sale_items si JOIN sales s ON si.sale_id = s.id
+        GROUP BY s.store_id, date(s.created_at), si.product_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sales_product_rollups')
+    op.drop_table('sales_category_rollups')
+    op.drop_table('sales_payment_rollups')
+    op.drop_table('sales_hourly_rollups')
@@ -0,0 +1,38 @@
+"""add_customer_lookup_indexes
+
+Revision ID: b7e1c4d8f3a2
+Revises: a9d3f7b1c2e5
+Create Date: 2025-11-05 15:22:08.913470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c4d8f3a2'
+down_revision: Union[str, Sequence[str], None] = 'a9d3f7b1c2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listagem do CRM ordenada por total gasto / última visita, paginada por cursor.
+    op.create_index('ix_customers_store_id_total_spent_id', 'customers', ['store_id', 'total_spent', 'id'], unique=False)
+    op.create_index('ix_customers_store_id_last_seen_id', 'customers', ['store_id', 'last_seen', 'id'], unique=False)
+    # Busca por início do nome sem diferenciar acentos: text_pattern_ops permite LIKE 'prefixo%'.
+    # Telefone e documento já têm índices únicos (uma sondagem por busca).
+    op.execute(
+        "CREATE INDEX ix_customers_store_id_name_prefix ON customers "
+        "(store_id, lower(immutable_unaccent(full_name)) text_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_customers_store_id_name_prefix', table_name='customers')
+    op.drop_index('ix_customers_store_id_last_seen_id', table_name='customers')
+    op.drop_index('ix_customers_store_id_total_spent_id', table_name='customers')
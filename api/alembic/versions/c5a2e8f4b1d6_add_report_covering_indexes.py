@@ -0,0 +1,38 @@
+"""add_report_covering_indexes
+
+Revision ID: c5a2e8f4b1d6
+Revises: b3f1c9d2e7a4
+Create Date: 2025-10-29 14:37:05.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a2e8f4b1d6'
+down_revision: Union[str, Sequence[str], None] = 'b3f1c9d2e7a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Intervalos semiabertos de created_at por loja (relatórios, histórico, reconstrução dos rollups).
+    op.create_index('ix_sales_store_id_created_at', 'sales', ['store_id', 'created_at'], unique=False)
+    # Junções sale_items -> sales e agregações por produto.
+    op.create_index('ix_sale_items_sale_id_product_id', 'sale_items', ['sale_id', 'product_id'], unique=False)
+    # Junção payments -> sales (relatório por método de pagamento, carregamento dos pagamentos da venda).
+    op.create_index(op.f('ix_payments_sale_id'), 'payments', ['sale_id'], unique=False)
+    # Comandas abertas por loja/mesa.
+    op.create_index('ix_orders_store_id_status_table_id', 'orders', ['store_id', 'status', 'table_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_store_id_status_table_id', table_name='orders')
+    op.drop_index(op.f('ix_payments_sale_id'), table_name='payments')
+    op.drop_index('ix_sale_items_sale_id_product_id', table_name='sale_items')
+    op.drop_index('ix_sales_store_id_created_at', table_name='sales')
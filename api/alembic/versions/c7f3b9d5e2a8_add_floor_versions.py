@@ -0,0 +1,42 @@
+"""add_floor_versions
+
+Revision ID: c7f3b9d5e2a8
+Revises: b2e6c8a4f7d3
+Create Date: 2025-11-12 14:21:38.640217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f3b9d5e2a8'
+down_revision: Union[str, Sequence[str], None] = 'b2e6c8a4f7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('floor_versions',
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.PrimaryKeyConstraint('store_id')
+    )
+    op.create_table('floor_table_changes',
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('removed', sa.Boolean(), server_default='false', nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.PrimaryKeyConstraint('store_id', 'table_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('floor_table_changes')
+    op.drop_table('floor_versions')
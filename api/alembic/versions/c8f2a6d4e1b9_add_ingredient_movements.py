@@ -0,0 +1,51 @@
+"""add_ingredient_movements
+
+Revision ID: c8f2a6d4e1b9
+Revises: b7e1c4d8f3a2
+Create Date: 2025-11-07 10:41:27.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2a6d4e1b9'
+down_revision: Union[str, Sequence[str], None] = 'b7e1c4d8f3a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ingredient_movements',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('sale_id', sa.Integer(), nullable=True),
+        # O tipo "movementtype" já existe (stock_movements).
+        sa.Column('movement_type', postgresql.ENUM('SALE', 'PURCHASE', 'ADJUSTMENT', 'RETURN', name='movementtype', create_type=False), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('stock_after_movement', sa.Float(), nullable=False),
+        sa.Column('reason', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['sale_id'], ['sales.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ingredient_movements_store_id_ingredient_id_created_at', 'ingredient_movements', ['store_id', 'ingredient_id', 'created_at'], unique=False)
+    # Montagem do grafo de receitas da loja (recipe_service).
+    op.create_index('ix_recipe_items_store_id_product_id', 'recipe_items', ['store_id', 'product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipe_items_store_id_product_id', table_name='recipe_items')
+    op.drop_index('ix_ingredient_movements_store_id_ingredient_id_created_at', table_name='ingredient_movements')
+    op.drop_table('ingredient_movements')
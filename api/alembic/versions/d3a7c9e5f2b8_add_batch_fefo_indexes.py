@@ -0,0 +1,39 @@
+"""add_batch_fefo_indexes
+
+Revision ID: d3a7c9e5f2b8
+Revises: c8f2a6d4e1b9
+Create Date: 2025-11-08 14:12:53.720461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7c9e5f2b8'
+down_revision: Union[str, Sequence[str], None] = 'c8f2a6d4e1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Parciais: lotes esgotados pelo consumo FEFO permanecem na tabela, mas fora dos índices.
+    op.create_index(
+        'ix_product_batches_store_id_product_id_expiration_date', 'product_batches',
+        ['store_id', 'product_id', 'expiration_date', 'id'], unique=False,
+        postgresql_where=sa.text("quantity > 0")
+    )
+    op.create_index(
+        'ix_product_batches_store_id_expiration_date_id', 'product_batches',
+        ['store_id', 'expiration_date', 'id'], unique=False,
+        postgresql_where=sa.text("quantity > 0")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_batches_store_id_expiration_date_id', table_name='product_batches')
+    op.drop_index('ix_product_batches_store_id_product_id_expiration_date', table_name='product_batches')
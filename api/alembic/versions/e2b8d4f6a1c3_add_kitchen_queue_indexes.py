@@ -0,0 +1,55 @@
+"""add_kitchen_queue_indexes
+
+Revision ID: e2b8d4f6a1c3
+Revises: d7e3a9c1f5b2
+Create Date: 2025-10-31 16:05:12.384907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8d4f6a1c3'
+down_revision: Union[str, Sequence[str], None] = 'd7e3a9c1f5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _queue_status_labels() -> list:
+    """
+    Rótulos do tipo orderitemstatus correspondentes a 'pending' e 'preparing'.
+    Bancos criados pelas migrações usam valores em minúsculas; bancos criados com
+    create_all (app/db/initial_data.py) usam os nomes do enum em maiúsculas.
+    """
+    labels = op.get_bind().execute(sa.text(
+        "SELECT e.enumlabel FROM pg_enum e JOIN pg_type t ON e.enumtypid = t.oid WHERE t.typname = 'orderitemstatus'"
+    )).scalars().all()
+    return [label for label in labels if label.lower() in ('pending', 'preparing')]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_orders_store_id_updated_at', 'orders', ['store_id', 'updated_at'], unique=False)
+
+    op.add_column('order_items', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.create_index(op.f('ix_order_items_updated_at'), 'order_items', ['updated_at'], unique=False)
+
+    # Índice parcial da fila da cozinha: só itens pendentes/em preparo.
+    labels = ", ".join(f"'{label}'" for label in _queue_status_labels())
+    op.create_index(
+        'ix_order_items_kitchen_queue', 'order_items', ['order_id'], unique=False,
+        postgresql_where=sa.text(f"status IN ({labels})")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_items_kitchen_queue', table_name='order_items')
+    op.drop_index(op.f('ix_order_items_updated_at'), table_name='order_items')
+    op.drop_column('order_items', 'updated_at')
+    op.drop_index('ix_orders_store_id_updated_at', table_name='orders')
+    op.drop_column('orders', 'updated_at')
@@ -0,0 +1,47 @@
+"""add_stock_snapshots
+
+Revision ID: e5b9d2f7a3c1
+Revises: d3a7c9e5f2b8
+Create Date: 2025-11-10 08:57:31.482960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d2f7a3c1'
+down_revision: Union[str, Sequence[str], None] = 'd3a7c9e5f2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('stock', sa.Integer(), nullable=False),
+        sa.Column('sales', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('purchases', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('adjustments', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('returns', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'snapshot_date', 'product_id', name='uq_stock_snapshots_key')
+    )
+    op.create_index('ix_stock_movements_store_id_created_at', 'stock_movements', ['store_id', 'created_at'], unique=False)
+    op.create_index('ix_stock_movements_store_id_product_id_created_at_id', 'stock_movements', ['store_id', 'product_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_movements_store_id_product_id_created_at_id', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_store_id_created_at', table_name='stock_movements')
+    op.drop_table('stock_snapshots')
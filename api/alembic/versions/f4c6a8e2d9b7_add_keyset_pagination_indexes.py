@@ -0,0 +1,39 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: f4c6a8e2d9b7
+Revises: e2b8d4f6a1c3
+Create Date: 2025-11-04 10:12:41.305218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c6a8e2d9b7'
+down_revision: Union[str, Sequence[str], None] = 'e2b8d4f6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Paginação por cursor: (store_id, chave de ordenação, id) permite ler qualquer página
+    # direto do índice, na ordem certa, a partir da última linha vista.
+    # O índice de vendas substitui ix_sales_store_id_created_at (mesmo prefixo).
+    op.create_index('ix_sales_store_id_created_at_id', 'sales', ['store_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_sales_store_id_created_at', table_name='sales')
+    op.create_index('ix_orders_store_id_created_at_id', 'orders', ['store_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_store_id_name_id', 'products', ['store_id', 'name', 'id'], unique=False)
+    op.create_index('ix_customers_store_id_full_name_id', 'customers', ['store_id', 'full_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_customers_store_id_full_name_id', table_name='customers')
+    op.drop_index('ix_products_store_id_name_id', table_name='products')
+    op.drop_index('ix_orders_store_id_created_at_id', table_name='orders')
+    op.create_index('ix_sales_store_id_created_at', 'sales', ['store_id', 'created_at'], unique=False)
+    op.drop_index('ix_sales_store_id_created_at_id', table_name='sales')
@@ -2,7 +2,8 @@ from fastapi import APIRouter
 from app.api.endpoints import (
     super_admin, stores, attributes, categories, batches, products,
     login, users, sales, cash_register, reports, additionals,
-    customers, suppliers, ingredients, tables, orders, marketing, reservations, walls
+    customers, suppliers, ingredients, tables, orders, marketing, reservations, walls,
+    events, stock
 )
 
 api_router = APIRouter()
@@ -29,4 +30,6 @@ api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(marketing.router, prefix="/marketing", tags=["marketing"])
 api_router.include_router(batches.router, prefix="/batches", tags=["batches"])
 api_router.include_router(attributes.router, prefix="/attributes", tags=["attributes"])
-api_router.include_router(super_admin.router, prefix="/super-admin", tags=["super-admin"])
\ No newline at end of file
+api_router.include_router(super_admin.router, prefix="/super-admin", tags=["super-admin"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(stock.router, prefix="/stock", tags=["stock"])
\ No newline at end of file
@@ -1,11 +1,12 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+from sqlalchemy.exc import DBAPIError
 from typing import AsyncGenerator, Optional, List 
 
+from app import crud
 from app.core import security
-from app.db.session import AsyncSessionLocal
+from app.db.session import AsyncSessionLocal, get_read_sessionmaker, replica_health
 from app.models.user import User as UserModel
 from app.schemas.enums import UserRole
 
@@ -17,32 +18,60 @@ oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token", au
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    # A sessão é criada sem conexão: o checkout no pool só acontece na primeira consulta.
     async with AsyncSessionLocal() as db:
         try:
             yield db
         finally:
             await db.close()
 
-# ... (o resto do ficheiro permanece exatamente como está)
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Sessão somente leitura para relatórios, dashboards, históricos e lookups.
+    Usa a réplica de leitura quando configurada e dentro do atraso tolerado; caso contrário, o primário.
+    Não deve ser usada por endpoints que escrevem.
+    """
+    session_factory = await get_read_sessionmaker()
+    async with session_factory() as db:
+        try:
+            yield db
+        except DBAPIError as e:
+            if session_factory is not AsyncSessionLocal and e.connection_invalidated:
+                replica_health.mark_failed()
+            raise
+        finally:
+            await db.close()
+
+async def _resolve_user(request: Request, db: AsyncSession, token: str) -> Optional[UserModel]:
+    """
+    Resolve o usuário do token. O resultado fica memorizado na requisição (as dependências
+    de autenticação podem ser chamadas mais de uma vez) e em cache entre requisições.
+    """
+    if getattr(request.state, "current_user", None) is not None:
+        return request.state.current_user
+
+    payload = security.decode_access_token(token)
+    if payload is None:
+        return None
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+
+    # Tokens emitidos antes da versão atual do usuário ("ver" ausente equivale a 0) são recusados.
+    user = await crud.user.get_principal(db, id=int(user_id), token_version=int(payload.get("ver", 0)))
+    request.state.current_user = user
+    return user
+
 async def get_current_user(
-    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
+    request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> UserModel:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = security.decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    user_id = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
-    
-    result = await db.execute(select(UserModel).filter(UserModel.id == int(user_id)))
-    user = result.scalars().first()
-
+    user = await _resolve_user(request, db, token)
     if user is None:
         raise credentials_exception
         
@@ -56,23 +85,13 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_active_user_optional(
-    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme_optional)
+    request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme_optional)
 ) -> Optional[UserModel]:
     if token is None:
         return None
 
     try:
-        payload = security.decode_access_token(token)
-        if payload is None:
-            return None
-        
-        user_id = payload.get("sub")
-        if user_id is None:
-            return None
-        
-        result = await db.execute(select(UserModel).filter(UserModel.id == int(user_id)))
-        user = result.scalars().first()
-
+        user = await _resolve_user(request, db, token)
         if user is None or not user.is_active:
             return None
             
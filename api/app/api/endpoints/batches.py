@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
@@ -7,9 +7,10 @@ from typing import List, Optional
 from app.crud.crud_batch import batch
 # -------------------------
 
-from app.schemas.batch import ProductBatch, ProductBatchCreate
+from app.schemas.batch import ProductBatch, ProductBatchCreate, ProductBatchExpiring
 from app.models.user import User as UserModel
-from app.models.product import Product
+from app.models.stock_movement import MovementType
+from app.services.stock_service import stock_service
 from app.api.dependencies import get_db, get_current_active_user
 
 
@@ -28,17 +29,51 @@ async def create_batch(
 
 @router.get("/", response_model=List[ProductBatch])
 async def read_batches(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
     expiring_soon_days: Optional[int] = Query(None, description="Filtrar por lotes vencendo nos próximos X dias"),
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    """ Lista todos os lotes da loja do usuário, com opção de filtro por data de validade. """
-    # A chamada agora usa a função correta da instância 'batch'
-    return await batch.get_multi_with_filter(
+    """
+    Lista os lotes da loja do usuário, por ordem de entrada, com opção de filtro por data de validade.
+    Paginação por cursor: o cabeçalho X-Next-Cursor traz o cursor da próxima página (ausente na última).
+    """
+    batches, next_cursor = await batch.get_multi_with_filter(
         db, 
         current_user=current_user, 
+        cursor=cursor,
+        limit=limit,
         expiring_soon_days=expiring_soon_days
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return batches
+
+
+@router.get("/expiring", response_model=List[ProductBatchExpiring])
+async def read_expiring_batches(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    within_days: Optional[int] = Query(None, ge=0, description="Somente lotes que vencem até hoje + X dias"),
+    expired: Optional[bool] = Query(None, description="true: somente vencidos; false: somente a vencer"),
+    search: Optional[str] = Query(None, max_length=100, description="Filtrar pelo nome do produto"),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """
+    Controle de validade: lotes com saldo, dos que vencem primeiro para os últimos.
+    Paginação por cursor (X-Next-Cursor); o cursor vale apenas para os mesmos filtros.
+    """
+    batches, next_cursor = await batch.get_expiring_page(
+        db, current_user=current_user, cursor=cursor, limit=limit,
+        within_days=within_days, expired=expired, search=search
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return batches
 
 
 @router.delete("/{batch_id}", response_model=ProductBatch)
@@ -52,10 +87,15 @@ async def delete_batch(
     if not batch_to_delete:
         raise HTTPException(status_code=404, detail="Lote não encontrado ou não pertence a esta loja")
 
-    product = await db.get(Product, batch_to_delete.product_id)
-    if product:
-        product.stock -= batch_to_delete.quantity
-        db.add(product)
+    # A baixa é aplicada no banco e confirmada junto com a remoção do lote.
+    await stock_service.apply_movements(
+        db,
+        store_id=batch_to_delete.store_id,
+        user_id=current_user.id,
+        deltas={batch_to_delete.product_id: -int(batch_to_delete.quantity)},
+        movement_type=MovementType.ADJUSTMENT,
+        reason=f"Baixa do lote ID: {batch_to_delete.id}"
+    )
 
     deleted_batch = await batch.remove(db, id=batch_id, current_user=current_user)
     return deleted_batch
\ No newline at end of file
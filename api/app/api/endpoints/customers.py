@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any
+from typing import List, Any, Optional
 
 from app import crud
 from app.models.user import User as UserModel
-from app.schemas.customer import Customer as CustomerSchema, CustomerCreate, CustomerUpdate
+from app.schemas.customer import Customer as CustomerSchema, CustomerCreate, CustomerUpdate, CustomerSearchResult
 from app.schemas.sale import Sale as SaleSchema
-from app.api.dependencies import get_db, RoleChecker, get_current_active_user
-from app.schemas.enums import UserRole
+from app.api.dependencies import get_db, get_read_db, RoleChecker, get_current_active_user
+from app.schemas.enums import UserRole, CustomerSortField
 
 router = APIRouter()
 full_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER, UserRole.CASHIER, UserRole.SUPER_ADMIN])
@@ -29,15 +29,42 @@ async def create_customer(
 @router.get("/", response_model=List[CustomerSchema], dependencies=[Depends(full_permissions)])
 async def read_customers(
     *,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    q: Optional[str] = Query(None, max_length=150, description="Início do nome, ou telefone/CPF/CNPJ completo"),
+    phone: Optional[str] = Query(None, max_length=20, description="Telefone exato"),
+    document: Optional[str] = Query(None, max_length=18, description="CPF/CNPJ exato"),
+    sort_by: CustomerSortField = Query(CustomerSortField.FULL_NAME, description="Ordenação"),
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
     """
-    Retorna uma lista de clientes da loja do usuário autenticado.
+    Retorna uma lista de clientes da loja do usuário autenticado, com busca por início do
+    nome, telefone ou CPF/CNPJ e ordenação por nome, total gasto ou última visita.
+    Paginação por cursor: o cabeçalho X-Next-Cursor traz o cursor da próxima página (ausente na última).
+    O cursor vale apenas para a mesma ordenação e filtros.
     """
-    return await crud.customer.get_multi(db, skip=skip, limit=limit, current_user=current_user)
+    customers, next_cursor = await crud.customer.get_page(
+        db, cursor=cursor, limit=limit, current_user=current_user,
+        q=q, phone=phone, document=document, sort_by=sort_by
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return customers
+
+@router.get("/search", response_model=List[CustomerSearchResult], dependencies=[Depends(full_permissions)])
+async def search_customers(
+    *,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=2, max_length=100, description="Termo de busca (ignora acentos e maiúsculas)"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Clientes cujo nome contém ou se parece com o termo, dos mais relevantes para os menos.
+    """
+    return await crud.customer.search(db, q=q, limit=limit, current_user=current_user)
 
 @router.get(
     "/{customer_id}/sales",
@@ -47,7 +74,7 @@ async def read_customers(
 )
 async def get_customer_sales_history(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     customer_id: int,
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
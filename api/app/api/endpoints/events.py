@@ -0,0 +1,63 @@
+# api/app/api/endpoints/events.py
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from loguru import logger
+
+from app import crud
+from app.core import security
+from app.core.events import event_hub
+from app.db.session import AsyncSessionLocal
+from app.models.user import User as UserModel
+
+router = APIRouter()
+
+async def _authenticate(token: str) -> Optional[UserModel]:
+    payload = security.decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    async with AsyncSessionLocal() as db:
+        user = await crud.user.get_principal(db, id=int(payload["sub"]), token_version=int(payload.get("ver", 0)))
+    if user is None or not user.is_active or not user.store_id:
+        return None
+    return user
+
+@router.websocket("/ws")
+async def store_events(
+    websocket: WebSocket,
+    token: str = Query(..., description="Token JWT (navegadores não enviam cabeçalhos em WebSockets)."),
+    since: Optional[int] = Query(None, description="Última sequência recebida; os eventos perdidos são reenviados."),
+):
+    """
+    Canal em tempo real da loja do usuário (KDS, mapa de mesas): itens de comanda novos ou
+    alterados, mudanças de status de itens/comandas e de mesas.
+
+    Cada mensagem tem `seq` (crescente por loja), `type` e `data`. Ao reconectar, o cliente envia
+    `since` com a última `seq` recebida; se ela já não estiver no histórico, recebe
+    `resync_required` e deve recarregar o estado pelas rotas REST.
+    """
+    user = await _authenticate(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    async with event_hub.subscribe(user.store_id, since=since) as queue:
+        await websocket.send_json({"type": "hello", "seq": event_hub.current_sequence(user.store_id)})
+
+        async def forward_events():
+            while True:
+                await websocket.send_json(await queue.get())
+
+        sender = asyncio.create_task(forward_events())
+        try:
+            # Mensagens do cliente são ignoradas; a leitura serve para detectar a desconexão.
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.warning(f"Canal de eventos da loja {user.store_id} encerrado: {e}")
+        finally:
+            sender.cancel()
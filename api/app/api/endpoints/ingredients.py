@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
 from typing import List
 
 # --- INÍCIO DA CORREÇÃO ---
@@ -7,6 +8,7 @@ from app.crud import crud_ingredient
 # Importa os schemas e dependências necessários diretamente
 from app.schemas.ingredient import Ingredient, IngredientCreate, IngredientStockUpdate
 from app.schemas.user import User
+from app.models.ingredient import Ingredient as IngredientModel
 from app.api.dependencies import get_db, get_current_user
 # --- FIM DA CORREÇÃO ---
 
@@ -44,7 +46,12 @@ async def update_ingredient_stock(
     if not db_ingredient:
         raise HTTPException(status_code=404, detail="Insumo não encontrado")
     
-    db_ingredient.stock += stock_update.quantity
+    # Incremento feito pelo banco para não perder atualizações concorrentes.
+    await db.execute(
+        update(IngredientModel)
+        .where(IngredientModel.id == ingredient_id)
+        .values(stock=IngredientModel.stock + stock_update.quantity)
+    )
     await db.commit()
     await db.refresh(db_ingredient)
     return db_ingredient
\ No newline at end of file
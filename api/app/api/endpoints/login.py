@@ -33,8 +33,9 @@ async def login_access_token(
     
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    # O conteúdo do token deve usar "sub" (subject) como padrão JWT
-    token_data = {"sub": str(user.id)}
+    # O conteúdo do token deve usar "sub" (subject) como padrão JWT;
+    # "ver" é a versão dos tokens do usuário (revogação ao trocar senha, papel, loja ou desativar).
+    token_data = {"sub": str(user.id), "ver": user.token_version}
     
     return {
         "access_token": security.create_access_token(
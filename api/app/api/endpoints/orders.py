@@ -1,16 +1,40 @@
 # api/app/api/endpoints/orders.py
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.crud_order import order as crud_order, get_full_order
+from app.crud.crud_order import order as crud_order, get_full_order, encode_kitchen_cursor, decode_kitchen_cursor
 from app.api import dependencies
 from app.models.user import User as UserModel
-from app.schemas.order import Order as OrderSchema, OrderCreate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer
+from app.schemas.order import (
+    Order as OrderSchema, OrderCreate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer,
+    KitchenQueue, OrderItemStatusUpdate, OrderItemsStatusUpdate, OrderItemStatusChange
+)
 from app.schemas.enums import OrderStatus, OrderType
 
 router = APIRouter()
 
+@router.get("/", response_model=List[OrderSchema])
+async def read_orders(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    order_status: Optional[OrderStatus] = Query(None, alias="status", description="Filtrar pelo status da comanda"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: UserModel = Depends(dependencies.get_current_active_user)
+) -> Any:
+    """
+    Lista as comandas da loja, da mais recente para a mais antiga.
+    Paginação por cursor: o cabeçalho X-Next-Cursor traz o cursor da próxima página (ausente na última).
+    """
+    orders, next_cursor = await crud_order.get_multi_for_store(
+        db, current_user=current_user, order_status=order_status, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
+
 @router.get("/pos/active", response_model=OrderSchema)
 async def get_active_pos_order(
     *,
@@ -23,6 +47,45 @@ async def get_active_pos_order(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma venda de POS ativa encontrada.")
     return active_order
 
+# --- Fila da cozinha (KDS) ---
+# Declaradas antes de "/{order_id}" para que "kitchen" e "items" não sejam tratados como ID.
+@router.get("/kitchen", response_model=KitchenQueue)
+async def read_kitchen_queue(
+    since: Optional[str] = Query(None, description="Cursor retornado pela busca anterior; traz apenas o que mudou."),
+    db: AsyncSession = Depends(dependencies.get_db),
+    current_user: UserModel = Depends(dependencies.get_current_active_user),
+):
+    """Itens pendentes/em preparo das comandas abertas da loja, ou apenas as alterações desde `since`."""
+    since_moment = decode_kitchen_cursor(since) if since else None
+    now, tickets, full = await crud_order.get_kitchen_queue(db, current_user=current_user, since=since_moment)
+    return {"cursor": encode_kitchen_cursor(now), "full": full, "orders": tickets}
+
+@router.patch("/items/status", response_model=List[OrderItemStatusChange])
+async def update_order_items_status(
+    status_update: OrderItemsStatusUpdate,
+    db: AsyncSession = Depends(dependencies.get_db),
+    current_user: UserModel = Depends(dependencies.get_current_active_user),
+):
+    """Altera o status de vários itens de uma vez (ex: 'Marcar tudo como pronto')."""
+    return await crud_order.update_items_status(
+        db, item_ids=status_update.item_ids, new_status=status_update.status, current_user=current_user
+    )
+
+@router.patch("/items/{item_id}/status", response_model=OrderItemStatusChange)
+async def update_order_item_status(
+    item_id: int,
+    status_update: OrderItemStatusUpdate,
+    db: AsyncSession = Depends(dependencies.get_db),
+    current_user: UserModel = Depends(dependencies.get_current_active_user),
+):
+    """Altera o status de um item de comanda (pendente -> em preparo -> pronto)."""
+    changed = await crud_order.update_items_status(
+        db, item_ids=[item_id], new_status=status_update.status, current_user=current_user
+    )
+    if not changed:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item não encontrado em uma comanda aberta.")
+    return changed[0]
+
 @router.patch("/{order_id}/close", response_model=OrderSchema)
 async def close_order(
     order_id: int,
@@ -115,10 +178,15 @@ async def pay_order_items(
     payment_request: PartialPaymentRequest,
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Chave enviada pelo POS para que repetições não paguem duas vezes."),
 ):
-    """Processa um pagamento (parcial ou total) para itens de uma comanda."""
+    """
+    Processa um pagamento (parcial ou total) para itens de uma comanda.
+    Com o cabeçalho `Idempotency-Key`, uma repetição da mesma requisição devolve a comanda sem pagar de novo.
+    """
     updated_order = await crud_order.process_partial_payment(
-        db=db, order_id=order_id, payment_request=payment_request, current_user=current_user
+        db=db, order_id=order_id, payment_request=payment_request, current_user=current_user,
+        idempotency_key=idempotency_key
     )
     return updated_order
 # --- FIM DA NOVA ROTA ---
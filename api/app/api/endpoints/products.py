@@ -1,20 +1,20 @@
 # api/app/api/endpoints/products.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Any, Optional
 
 from app import crud
 from app.models.user import User as UserModel
-from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate
+from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate, ProductCatalogItem, ProductSearchResult
 # --- CORREÇÃO: Import schemas directly ---
 from app.schemas.category import ProductCategory as CategorySchema # Import ProductCategory and alias it
 from app.schemas.supplier import Supplier as SupplierSchema # Import Supplier schema
 # --- FIM CORREÇÃO ---
 from app.schemas.stock import StockAdjustment
-from app.api.dependencies import get_db, RoleChecker, get_current_active_user
+from app.api.dependencies import get_db, get_read_db, RoleChecker, get_current_active_user
 from app.schemas.enums import UserRole
-# Importar stock_service de forma síncrona (ajustaremos a chamada)
 from app.services.stock_service import stock_service
+from app.services.product_lookup_service import product_lookup_service
 from app.db.session import AsyncSessionLocal # Para run_sync se necessário
 from loguru import logger # Import logger if not already imported
 
@@ -33,19 +33,74 @@ async def create_product( *, db: AsyncSession = Depends(get_db), product_in: Pro
 @router.get("/", response_model=List[ProductSchema], summary="Listar produtos da loja")
 async def read_products(
     *,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
     search: Optional[str] = Query(None, description="Filtrar produtos pelo nome"),
     category_id: Optional[int] = Query(None, description="Filtrar por ID da categoria principal"),
     supplier_id: Optional[int] = Query(None, description="Filtrar por ID do fornecedor"),
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
-    """ Retorna uma lista de produtos da loja, com opção de busca e filtros. """
-    return await crud.product.get_multi(
-        db, skip=skip, limit=limit, current_user=current_user,
+    """
+    Retorna uma lista de produtos da loja (por nome), com opção de busca e filtros.
+    Paginação por cursor: o cabeçalho X-Next-Cursor traz o cursor da próxima página (ausente na última).
+    """
+    products, next_cursor = await crud.product.get_multi(
+        db, cursor=cursor, limit=limit, current_user=current_user,
         search=search, category_id=category_id, supplier_id=supplier_id
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return products
+
+@router.get("/catalog", response_model=List[ProductCatalogItem], summary="Catálogo enxuto para o POS")
+async def read_product_catalog(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    search: Optional[str] = Query(None, description="Filtrar produtos pelo nome"),
+    category_id: Optional[int] = Query(None, description="Filtrar por ID da categoria principal"),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Lista somente id, nome, preço, estoque, código de barras, imagem e categoria dos produtos,
+    sem relacionamentos. Mesma ordem e paginação por cursor de GET /products/.
+    """
+    products, next_cursor = await crud.product.get_catalog(
+        db, cursor=cursor, limit=limit, current_user=current_user, search=search, category_id=category_id
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return products
+
+@router.get("/lookup", response_model=List[ProductCatalogItem], summary="Busca por código de barras ou nome (POS)")
+async def lookup_products(
+    *,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=100, description="Código de barras ou parte do nome"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Busca usada a cada leitura de código de barras: código exato primeiro, depois nomes que
+    começam com o termo e nomes que o contêm (sem diferenciar acentos). Servida por um
+    índice em memória da loja; o estoque retornado é o atual.
+    """
+    return await product_lookup_service.lookup(db, store_id=current_user.store_id, term=q, limit=limit)
+
+@router.get("/search", response_model=List[ProductSearchResult], summary="Busca textual de produtos por relevância")
+async def search_products(
+    *,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=2, max_length=100, description="Termo de busca (ignora acentos e maiúsculas)"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """ Produtos cujo nome contém ou se parece com o termo, dos mais relevantes para os menos. """
+    return await crud.product.search(db, q=q, limit=limit, current_user=current_user)
 
 # --- Rota GET /{product_id} (read_product) --- sem alterações ---
 @router.get("/{product_id}", response_model=ProductSchema, summary="Obter um produto por ID")
@@ -77,7 +132,7 @@ async def delete_product( *, db: AsyncSession = Depends(get_db), product_id: int
          raise HTTPException( status_code=status.HTTP_404_NOT_FOUND, detail="Produto não encontrado para exclusão." )
     return deleted_product
 
-# --- Rota POST /{product_id}/stock-adjustment --- sem alterações ---
+# --- Rota POST /{product_id}/stock-adjustment ---
 @router.post( "/{product_id}/stock-adjustment", status_code=status.HTTP_200_OK, dependencies=[Depends(manager_permissions)], summary="Ajustar o estoque de um produto" )
 async def adjust_product_stock(
     *,
@@ -87,36 +142,22 @@ async def adjust_product_stock(
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
     """ Realiza um ajuste manual no estoque de um produto da loja atual. """
-    product_to_adjust = await crud.product.get(db, id=product_id, current_user=current_user)
-    if not product_to_adjust:
-        raise HTTPException( status_code=status.HTTP_404_NOT_FOUND, detail="Produto não encontrado." )
-
     try:
-        # --- Lógica de ajuste movida diretamente para cá ---
-        from app.models.stock_movement import StockMovement, MovementType
-
-        quantity_change = adjustment_in.new_stock_level - (product_to_adjust.stock or 0) # Trata None como 0
-        product_to_adjust.stock = adjustment_in.new_stock_level # Define o novo estoque
-
-        movement = StockMovement(
+        movement = await stock_service.adjust_stock(
+            db,
             product_id=product_id,
-            user_id=current_user.id,
-            movement_type=MovementType.ADJUSTMENT,
-            quantity=quantity_change,
-            stock_after_movement=product_to_adjust.stock,
-            reason=adjustment_in.reason,
-            store_id=product_to_adjust.store_id
+            new_stock_level=adjustment_in.new_stock_level,
+            user=current_user,
+            reason=adjustment_in.reason
         )
-        db.add(product_to_adjust)
-        db.add(movement)
-
-        if product_to_adjust.stock <= (product_to_adjust.low_stock_threshold or 0):
-            logger.warning( f"Estoque baixo para o produto ID {product_id} ('{product_to_adjust.name}'). " f"Estoque atual: {product_to_adjust.stock}, Limite: {product_to_adjust.low_stock_threshold}." )
-        # --- Fim da lógica movida ---
+        if movement is None:
+            raise HTTPException( status_code=status.HTTP_404_NOT_FOUND, detail="Produto não encontrado." )
 
         await db.commit()
         await db.refresh(movement)
 
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Erro ao ajustar estoque para produto {product_id}: {e}")
@@ -127,14 +168,14 @@ async def adjust_product_stock(
 # --- Adicionar Endpoints para Categoria e Fornecedor (para Selects) ---
 # --- CORREÇÃO no response_model ---
 @router.get("/lookups/categories", response_model=List[CategorySchema], summary="Listar categorias para selects")
-async def list_categories(db: AsyncSession = Depends(get_db), current_user: UserModel = Depends(get_current_active_user)):
+async def list_categories(db: AsyncSession = Depends(get_read_db), current_user: UserModel = Depends(get_current_active_user)):
     # Reutiliza o CRUD de categorias existente
     # O CRUDBase.get_multi já filtra por store_id do current_user (exceto super_admin)
     return await crud.category.get_multi(db=db, current_user=current_user)
 
 # --- CORREÇÃO no response_model ---
 @router.get("/lookups/suppliers", response_model=List[SupplierSchema], summary="Listar fornecedores para selects")
-async def list_suppliers(db: AsyncSession = Depends(get_db), current_user: UserModel = Depends(get_current_active_user)):
+async def list_suppliers(db: AsyncSession = Depends(get_read_db), current_user: UserModel = Depends(get_current_active_user)):
     # Reutiliza o CRUD de fornecedores existente
     # O CRUDBase.get_multi já filtra por store_id do current_user (exceto super_admin)
     return await crud.supplier.get_multi(db=db, current_user=current_user)
\ No newline at end of file
@@ -1,26 +1,24 @@
 # api/app/api/endpoints/reports.py
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime # Adicionar datetime
 from typing import List, Any
-from fastapi.responses import StreamingResponse
-import io
 import traceback # Para log detalhado
 from loguru import logger # Para log detalhado
 
 # Importar serviços e schemas
 from app.services.analytics_service import analytics_service
-from app.services.pdf_service import generate_enhanced_sales_report_pdf # Renomeado
+from app.services.report_job_service import report_job_service, ReportJob as ReportJobModel
 from app.schemas.report import (
     SalesByPeriod, TopSellingProduct, SalesByUser, SalesEvolutionItem, PurchaseSuggestion,
     SalesByPaymentMethodItem, SalesByHourItem, SalesByCategoryItem, LowStockProductItem,
-    TopCustomerItem, InactiveCustomerItem
+    TopCustomerItem, InactiveCustomerItem, ReportJob
 )
 from app.schemas import dashboard as dashboard_schemas
-from app.api.dependencies import get_db, RoleChecker, get_current_active_user, get_current_user
+from app.api.dependencies import get_read_db, RoleChecker, get_current_active_user, get_current_user
 from app.models.user import User as UserModel
 from app.models.store import Store as StoreModel # Importar o modelo da Loja
-from app.schemas.enums import UserRole
+from app.schemas.enums import UserRole, ReportJobStatus
 from app.services.dashboard_service import dashboard_service
 from app.crud import crud_report # Importar o módulo crud_report
 from app.schemas.user import User as UserSchema
@@ -29,69 +27,106 @@ router = APIRouter()
 
 manager_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER])
 
-# --- Rota PDF /pdf/sales-by-period (Atualizada com try/except robusto) ---
-@router.get("/pdf/sales-by-period",
-            response_class=StreamingResponse,
-            dependencies=[Depends(manager_permissions)],
-            summary="Gerar Relatório PDF Aprimorado de Vendas por Período")
-async def generate_enhanced_sales_by_period_report_pdf( # Nome da função atualizado
+# --- Relatórios PDF: geração em segundo plano (report_job_service) ---
+async def _submit_sales_report_job(db: AsyncSession, current_user: UserModel, start_date: date, end_date: date) -> ReportJobModel:
+    if not current_user.store_id:
+        raise HTTPException(status_code=400, detail="Usuário não associado a uma loja.")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="A data inicial deve ser anterior ou igual à data final.")
+    if await db.get(StoreModel, current_user.store_id) is None:
+        raise HTTPException(status_code=404, detail="Loja não encontrada.")
+    return report_job_service.submit(store_id=current_user.store_id, start_date=start_date, end_date=end_date)
+
+def _report_job_out(request: Request, job: ReportJobModel) -> ReportJob:
+    return ReportJob(
+        job_id=job.id,
+        status=job.status,
+        start_date=job.start_date,
+        end_date=job.end_date,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        download_url=request.app.url_path_for("download_report_job_file", job_id=job.id) if job.status == ReportJobStatus.DONE else None,
+    )
+
+def _report_job_file(job: ReportJobModel) -> Response:
+    return Response(
+        content=job.content,
+        media_type='application/pdf',
+        headers={'Content-Disposition': f'attachment; filename="{job.filename}"'}
+    )
+
+@router.post("/pdf/sales-by-period/jobs",
+             response_model=ReportJob,
+             status_code=status.HTTP_202_ACCEPTED,
+             dependencies=[Depends(manager_permissions)],
+             summary="Solicitar o Relatório PDF de Vendas por Período")
+async def submit_sales_by_period_report_job(
+    request: Request,
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """
-    Gera um relatório PDF aprimorado das vendas por período, incluindo detalhes adicionais.
+    Coloca a geração do relatório na fila e devolve o job. Se o mesmo relatório (loja e
+    período) já estiver em geração ou pronto, devolve esse job, possivelmente já "done".
     """
-    if not current_user.store_id:
-        raise HTTPException(status_code=400, detail="Usuário não associado a uma loja.")
-    store = await db.get(StoreModel, current_user.store_id)
-    if not store:
-        raise HTTPException(status_code=404, detail="Loja não encontrada.")
+    job = await _submit_sales_report_job(db, current_user, start_date, end_date)
+    return _report_job_out(request, job)
 
-    # Busca todos os dados necessários usando as funções do crud_report (assíncronas)
-    try:
-        summary_data = await crud_report.get_sales_by_period(db, start_date=start_date, end_date=end_date)
-        sales_by_user = await crud_report.get_sales_by_user(db, start_date=start_date, end_date=end_date)
-        sales_by_payment = await crud_report.get_sales_by_payment_method(db, start_date=start_date, end_date=end_date)
-        sales_by_category = await crud_report.get_sales_by_category(db, start_date=start_date, end_date=end_date)
-        # Buscar top 5 produtos por receita no período
-        top_products = await crud_report.get_top_selling_products_by_period(db, start_date=start_date, end_date=end_date, limit=5, order_by='revenue')
+@router.get("/jobs/{job_id}",
+            response_model=ReportJob,
+            dependencies=[Depends(manager_permissions)],
+            summary="Situação de um Relatório PDF")
+async def read_report_job(
+    job_id: str,
+    request: Request,
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    job = report_job_service.get(job_id, store_id=current_user.store_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado ou expirado.")
+    return _report_job_out(request, job)
 
-    except Exception as e:
-        logger.error(f"Erro ao buscar dados para o relatório PDF (Vendas por Período): {e}\n{traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar dados para o relatório: {e}")
+@router.get("/jobs/{job_id}/file",
+            response_class=Response,
+            dependencies=[Depends(manager_permissions)],
+            summary="Baixar um Relatório PDF pronto")
+async def download_report_job_file(
+    job_id: str,
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    job = report_job_service.get(job_id, store_id=current_user.store_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado ou expirado.")
+    if job.status == ReportJobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Falha ao gerar o arquivo PDF: {job.error}")
+    if job.status != ReportJobStatus.DONE:
+        raise HTTPException(status_code=409, detail="O relatório ainda está sendo gerado.")
+    return _report_job_file(job)
 
-    # Geração do PDF com tratamento de erro específico
-    try:
-        buffer = io.BytesIO()
-        generate_enhanced_sales_report_pdf( # Chama a função atualizada
-            buffer=buffer,
-            store=store,
-            start_date=start_date,
-            end_date=end_date,
-            summary_data=summary_data,
-            sales_by_user=sales_by_user,
-            sales_by_payment=sales_by_payment,
-            sales_by_category=sales_by_category,
-            top_products=top_products
-        )
-        buffer.seek(0)
-        filename = f"relatorio_vendas_{start_date}_a_{end_date}.pdf"
-
-        # Retorna o StreamingResponse apenas se a geração foi bem-sucedida
-        return StreamingResponse(
-            buffer,
-            media_type='application/pdf',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
-    except Exception as e:
-        # Captura erros específicos da geração do PDF
-        logger.error(f"Erro durante a geração do PDF (Vendas por Período) com reportlab: {e}\n{traceback.format_exc()}")
+@router.get("/pdf/sales-by-period",
+            response_class=Response,
+            dependencies=[Depends(manager_permissions)],
+            summary="Gerar Relatório PDF Aprimorado de Vendas por Período")
+async def generate_enhanced_sales_by_period_report_pdf(
+    start_date: date,
+    end_date: date,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """
+    Gera (ou reaproveita do cache) o relatório e responde com o PDF quando estiver pronto.
+    Mantido para clientes antigos; a geração também passa pela fila, fora do event loop.
+    """
+    job = await report_job_service.wait(await _submit_sales_report_job(db, current_user, start_date, end_date))
+    if job.status != ReportJobStatus.DONE:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Falha ao gerar o arquivo PDF: {e}"
+            detail=f"Falha ao gerar o arquivo PDF: {job.error}"
         )
+    return _report_job_file(job)
 
 
 # --- Rotas JSON existentes (sem alterações) ---
@@ -102,13 +137,12 @@ async def generate_enhanced_sales_by_period_report_pdf( # Nome da função atual
     summary="Obter Sugestões de Compra de Estoque"
 )
 async def get_purchase_suggestions(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    # Nota: analytics_service.get_purchase_suggestions usa Session síncrona.
-    # A chamada db.run_sync é necessária para executá-la corretamente em um endpoint async.
+    # Previsão de demanda da loja em cache (recalculada de madrugada) cruzada com o estoque atual.
     try:
-      suggestions = await db.run_sync(analytics_service.get_purchase_suggestions)
+      suggestions = await analytics_service.get_purchase_suggestions(db, store_id=current_user.store_id)
     except Exception as e:
        logger.error(f"Erro ao buscar sugestões de compra: {e}\n{traceback.format_exc()}")
        raise HTTPException(status_code=500, detail=f"Erro ao buscar sugestões: {e}")
@@ -118,37 +152,37 @@ async def get_purchase_suggestions(
 async def report_sales_by_period(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema aqui se preferir
 ):
-    return await crud_report.get_sales_by_period(db, start_date=start_date, end_date=end_date)
+    return await crud_report.get_sales_by_period(db, start_date=start_date, end_date=end_date, store_id=current_user.store_id)
 
 @router.get("/top-selling-products", response_model=List[TopSellingProduct])
 async def report_top_selling_products(
     limit: int = Query(5, ge=1, le=50),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema aqui se preferir
 ):
     # Esta rota busca os top produtos GERAIS, não por período
-    return await crud_report.get_top_selling_products(db, limit=limit)
+    return await crud_report.get_top_selling_products(db, limit=limit, store_id=current_user.store_id)
 
 @router.get("/sales-by-user", response_model=List[SalesByUser])
 async def report_sales_by_user(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema aqui se preferir
 ):
-    return await crud_report.get_sales_by_user(db, start_date=start_date, end_date=end_date)
+    return await crud_report.get_sales_by_user(db, start_date=start_date, end_date=end_date, store_id=current_user.store_id)
 
 @router.get("/sales-evolution", response_model=List[SalesEvolutionItem])
 async def report_sales_evolution(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema aqui se preferir
 ):
-    return await crud_report.get_sales_evolution_by_period(db, start_date=start_date, end_date=end_date)
+    return await crud_report.get_sales_evolution_by_period(db, start_date=start_date, end_date=end_date, store_id=current_user.store_id)
 
 @router.get(
     "/dashboard",
@@ -158,7 +192,7 @@ async def report_sales_evolution(
 )
 async def get_dashboard_summary(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
     if not current_user.store_id:
@@ -174,25 +208,25 @@ async def get_dashboard_summary(
 async def report_sales_by_payment_method(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema
 ):
-    return await crud_report.get_sales_by_payment_method(db, start_date=start_date, end_date=end_date)
+    return await crud_report.get_sales_by_payment_method(db, start_date=start_date, end_date=end_date, store_id=current_user.store_id)
 
 @router.get("/sales-by-hour", response_model=List[SalesByHourItem])
 async def report_sales_by_hour(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema
 ):
-    return await crud_report.get_sales_by_hour(db, start_date=start_date, end_date=end_date)
+    return await crud_report.get_sales_by_hour(db, start_date=start_date, end_date=end_date, store_id=current_user.store_id)
 
 @router.get("/sales-by-category", response_model=List[SalesByCategoryItem])
 async def report_sales_by_category(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema
 ):
-    return await crud_report.get_sales_by_category(db, start_date=start_date, end_date=end_date)
\ No newline at end of file
+    return await crud_report.get_sales_by_category(db, start_date=start_date, end_date=end_date, store_id=current_user.store_id)
\ No newline at end of file
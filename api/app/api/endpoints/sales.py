@@ -1,12 +1,12 @@
 # api/app/api/endpoints/sales.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any # Adicione List e Any
+from typing import List, Any, Optional # Adicione List e Any
 
 from app import crud
 from app.models.user import User as UserModel
 from app.schemas.sale import Sale, SaleCreate
-from app.api.dependencies import get_db, get_current_active_user
+from app.api.dependencies import get_db, get_read_db, get_current_active_user
 
 router = APIRouter()
 
@@ -14,24 +14,31 @@ router = APIRouter()
 async def create_sale(
     sale_in: SaleCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_user)
+    current_user: UserModel = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Chave enviada pelo POS para que repetições devolvam a mesma venda.")
 ) -> Any:
     """
     Cria uma nova venda (usado pelo POS).
+    Com o cabeçalho `Idempotency-Key`, uma repetição da mesma requisição devolve a venda já criada.
     """
-    return await crud.sale.create_with_items(db=db, obj_in=sale_in, current_user=current_user)
+    return await crud.sale.create_with_items(db=db, obj_in=sale_in, current_user=current_user, idempotency_key=idempotency_key)
 
 # --- INÍCIO DO NOVO ENDPOINT ---
 @router.get("/", response_model=List[Sale])
 async def read_sales(
     *,
-    db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
     """
     Retorna uma lista de vendas da loja do usuário, da mais recente para a mais antiga.
+    Paginação por cursor: o cabeçalho X-Next-Cursor traz o cursor da próxima página (ausente na última).
     """
-    return await crud.sale.get_multi_detailed(db, skip=skip, limit=limit, current_user=current_user)
+    sales, next_cursor = await crud.sale.get_multi_detailed(db, cursor=cursor, limit=limit, current_user=current_user)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return sales
 # --- FIM DO NOVO ENDPOINT ---
\ No newline at end of file
@@ -0,0 +1,127 @@
+# api/app/api/endpoints/stock.py
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_db, get_read_db, RoleChecker, get_current_active_user
+from app.models.user import User as UserModel
+from app.schemas.enums import UserRole
+from app.schemas.stock import StockAsOfItem, StockSummaryItem, StockMovementItem, InventoryCountReport
+from app.services.inventory_count_service import inventory_count_service
+from app.services.stock_snapshot_service import stock_snapshot_service
+
+router = APIRouter()
+
+manager_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER])
+
+
+def _local(value: Optional[datetime]) -> Optional[datetime]:
+    """ As datas do livro são gravadas sem fuso (horário local): converte valores com fuso. """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+@router.get("/as-of", response_model=List[StockAsOfItem], dependencies=[Depends(manager_permissions)], summary="Estoque em uma data")
+async def read_stock_as_of(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    at: datetime = Query(..., description="Data e hora da consulta"),
+    product_id: Optional[int] = Query(None, description="Somente este produto"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Estoque de cada produto da loja no instante informado, a partir do fechamento diário
+    mais próximo. Paginação por cursor (X-Next-Cursor), por ID do produto.
+    """
+    items, next_cursor = await stock_snapshot_service.get_stock_as_of_page(
+        db, store_id=current_user.store_id, at=_local(at), product_id=product_id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+
+@router.get("/summary", response_model=List[StockSummaryItem], dependencies=[Depends(manager_permissions)], summary="Resumo de movimentações do período")
+async def read_stock_summary(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    start_date: date,
+    end_date: date,
+    product_id: Optional[int] = Query(None, description="Somente este produto"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Para cada produto: estoque no início do período, vendas, compras, ajustes e devoluções
+    no período (saídas negativas) e estoque ao final. Paginação por cursor (X-Next-Cursor).
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="A data inicial deve ser anterior ou igual à data final.")
+    items, next_cursor = await stock_snapshot_service.get_summary_page(
+        db, store_id=current_user.store_id, start_date=start_date, end_date=end_date,
+        product_id=product_id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+
+@router.get("/movements", response_model=List[StockMovementItem], dependencies=[Depends(manager_permissions)], summary="Histórico de movimentações de um produto")
+async def read_stock_movements(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    product_id: int,
+    start: Optional[datetime] = Query(None, description="A partir de (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Até (exclusive)"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """ Movimentações do produto no intervalo, das mais recentes para as mais antigas. """
+    movements, next_cursor = await crud.stock_movement.get_history_page(
+        db, current_user=current_user, product_id=product_id,
+        start=_local(start), end=_local(end), cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return movements
+
+
+@router.post("/inventory-counts", response_model=InventoryCountReport, dependencies=[Depends(manager_permissions)], summary="Contagem de inventário em massa")
+async def upload_inventory_count(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    reason: str = Query("Contagem de inventário", min_length=5, max_length=255, description="Justificativa registrada nas movimentações"),
+    dry_run: bool = Query(False, description="Apenas calcula as diferenças, sem alterar o estoque"),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Recebe no corpo da requisição a contagem em CSV (Content-Type text/csv; colunas
+    `barcode` ou `product_id` e `counted_qty`) ou JSON lines (application/x-ndjson), lida em
+    streaming. Ajusta o estoque de todos os produtos contados em uma única transação e
+    devolve as diferenças encontradas e os códigos não localizados.
+    """
+    json_lines = "json" in request.headers.get("content-type", "")
+    entries = await inventory_count_service.parse(request.stream(), json_lines=json_lines)
+    try:
+        report = await inventory_count_service.apply(
+            db, store_id=current_user.store_id, user_id=current_user.id,
+            entries=entries, reason=reason, dry_run=dry_run
+        )
+        if not dry_run:
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return report
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict
 
-from app.api.dependencies import get_db, RoleChecker
+from app.api.dependencies import get_read_db, RoleChecker
+from app.core.cache import get_cache_stats
+from app.db.session import get_pool_stats
 from app.schemas.enums import UserRole
 from app.services.dashboard_service import dashboard_service
 from app.schemas import super_admin as super_admin_schemas
@@ -17,8 +20,8 @@ super_admin_permissions = RoleChecker([UserRole.SUPER_ADMIN])
     dependencies=[Depends(super_admin_permissions)],
     summary="Obter Dados Consolidados Globais para o Dashboard"
 )
-def get_global_dashboard_summary(
-    db: Session = Depends(get_db)
+async def get_global_dashboard_summary(
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Recupera um resumo completo de dados de TODAS as lojas para alimentar
@@ -26,5 +29,35 @@ def get_global_dashboard_summary(
 
     **Acessível apenas para Super Administradores.**
     """
-    summary_data = dashboard_service.get_global_dashboard_summary(db)
-    return summary_data
\ No newline at end of file
+    summary_data = await dashboard_service.get_global_dashboard_summary(db)
+    return summary_data
+
+@router.get(
+    "/cache-stats",
+    response_model=Dict[str, super_admin_schemas.CacheStats],
+    dependencies=[Depends(super_admin_permissions)],
+    summary="Obter Estatísticas dos Caches de Resultados"
+)
+async def read_cache_stats() -> Any:
+    """
+    Retorna os contadores de acerto/erro/invalidação de cada cache de resultados
+    da aplicação (ex: dashboards).
+
+    **Acessível apenas para Super Administradores.**
+    """
+    return get_cache_stats()
+
+@router.get(
+    "/pool-stats",
+    response_model=Dict[str, super_admin_schemas.PoolStats],
+    dependencies=[Depends(super_admin_permissions)],
+    summary="Obter Utilização dos Pools de Conexão"
+)
+async def read_pool_stats() -> Any:
+    """
+    Retorna, por engine, as conexões em uso, o overflow e o tempo de espera
+    por conexão desde o início do processo.
+
+    **Acessível apenas para Super Administradores.**
+    """
+    return get_pool_stats()
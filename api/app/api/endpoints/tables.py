@@ -1,17 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
+from typing import List, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-import sqlalchemy as sa  # Importação que faltava
 
 from app.crud import crud_table
 from app.models.user import User as UserModel
-from app.models.table import Table as TableModel
-from app.models.order import Order, OrderItem
-from app.schemas.table import Table as TableSchema, TableCreate, TableUpdate, TableLayoutUpdate, TableLayoutUpdateRequest
+from app.schemas.table import Table as TableSchema, TableCreate, TableUpdate, TableLayoutUpdate, TableLayoutUpdateRequest, FloorPlanChanges
 from app.api.dependencies import get_db, get_current_active_user, RoleChecker
-from app.schemas.enums import UserRole, OrderStatus, OrderItemStatus
+from app.schemas.enums import UserRole
+from app.core import events
+from app.core.events import event_hub
+from app.core.floor_state import floor_state, etag_matches
 
 router = APIRouter()
 full_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER, UserRole.CASHIER, UserRole.SUPER_ADMIN])
@@ -19,60 +17,59 @@ manager_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER, UserRole.SU
 
 @router.get("/", response_model=List[TableSchema])
 async def read_tables(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_user)
+    current_user: UserModel = Depends(get_current_active_user),
+    if_none_match: Optional[str] = Header(None)
 ) -> Any:
     """
     Busca todas as mesas da loja, incluindo informações sobre comandas abertas.
+    Responde 304 quando o cliente envia If-None-Match com o ETag da versão atual do mapa.
     """
-    stmt_tables = select(TableModel).where(TableModel.store_id == current_user.store_id)
-    result_tables = await db.execute(stmt_tables)
-    tables = result_tables.scalars().all()
-    table_map = {t.id: t for t in tables}
-
-    if not table_map:
-        return []
+    store_id = current_user.store_id
+    # A versão é lida antes da consulta: alterações confirmadas durante a leitura geram
+    # uma versão posterior e serão entregues na próxima sincronização.
+    etag = floor_state.etag(store_id, await floor_state.version(db, store_id))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-    stmt_orders = (
-        select(
-            Order.table_id,
-            Order.id,
-            Order.created_at,
-            sa.func.bool_or(OrderItem.status == OrderItemStatus.READY).label("has_ready_items")
-        )
-        .join(OrderItem, Order.id == OrderItem.order_id)
-        .where(
-            Order.store_id == current_user.store_id,
-            Order.status == OrderStatus.OPEN,
-            Order.table_id.in_(table_map.keys())
-        )
-        .group_by(Order.table_id, Order.id, Order.created_at)
+    tables = await crud_table.floor_cache.get_or_set(
+        (store_id, etag), lambda: crud_table.table.get_floor(db, store_id=store_id)
     )
-    result_orders = await db.execute(stmt_orders)
-    
-    order_info_map = {row.table_id: row for row in result_orders.mappings()}
+    response.headers["ETag"] = etag
+    return tables
 
-    response_tables = []
-    for table in tables:
-        table_schema = TableSchema.model_validate(table, from_attributes=True)
-        
-        if table.status == 'occupied' and table.id in order_info_map:
-            order_info = order_info_map[table.id]
-            table_schema.open_order_id = order_info.id
-            table_schema.open_order_created_at = order_info.created_at
-            table_schema.has_ready_items = order_info.has_ready_items or False
-        else:
-            table_schema.has_ready_items = False
 
-        response_tables.append(table_schema)
-    
-    # --- INÍCIO DA CORREÇÃO ---
-    # Esta nova lógica de ordenação cria uma "chave" de tupla (ex: (0, 5) para "5" e (1, "Varanda") para "Varanda").
-    # O Python consegue ordenar esta lista de tuplas corretamente, resolvendo o TypeError.
-    response_tables.sort(key=lambda t: (0, int(t.number)) if t.number.isdigit() else (1, t.number))
-    # --- FIM DA CORREÇÃO ---
+@router.get("/changes", response_model=FloorPlanChanges)
+async def read_table_changes(
+    response: Response,
+    since_version: Optional[str] = Query(None, description="Valor de `version` da última sincronização."),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Sincronização incremental do mapa de mesas: devolve apenas as mesas alteradas e os IDs
+    das excluídas desde `since_version`, ou 304 se nada mudou. Sem uma versão utilizável,
+    devolve o mapa completo (`full=true`).
+    """
+    store_id = current_user.store_id
+    current = await floor_state.version(db, store_id)
+    version = floor_state.token(current)
+    etag = floor_state.etag(store_id, current)
+    if since_version == version:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    since = floor_state.parse_token(since_version, current)
+    if since is None:
+        tables = await crud_table.floor_cache.get_or_set(
+            (store_id, etag), lambda: crud_table.table.get_floor(db, store_id=store_id)
+        )
+        return {"version": version, "full": True, "tables": tables, "removed_ids": []}
 
-    return response_tables
+    changed_ids, removed_ids = await floor_state.changes_since(db, store_id, since)
+    tables = await crud_table.table.get_floor(db, store_id=store_id, table_ids=changed_ids) if changed_ids else []
+    return {"version": version, "full": False, "tables": tables, "removed_ids": removed_ids}
 
 
 @router.post("/", response_model=TableSchema, status_code=status.HTTP_201_CREATED, dependencies=[Depends(manager_permissions)])
@@ -107,7 +104,12 @@ async def update_table(
     table = await crud_table.table.get(db=db, id=table_id, current_user=current_user)
     if not table:
         raise HTTPException(status_code=404, detail="Mesa não encontrada.")
-    return await crud_table.table.update(db=db, db_obj=table, obj_in=table_in, current_user=current_user)
+    previous_status = table.status
+    floor_state.touch(db, table.store_id, [table.id])
+    updated_table = await crud_table.table.update(db=db, db_obj=table, obj_in=table_in, current_user=current_user)
+    if updated_table.status != previous_status:
+        event_hub.publish(updated_table.store_id, events.TABLE_STATUS_CHANGED, {"table_id": updated_table.id, "status": updated_table.status})
+    return updated_table
 
 @router.delete("/{table_id}", response_model=TableSchema, dependencies=[Depends(manager_permissions)])
 async def delete_table(
@@ -126,6 +128,7 @@ async def delete_table(
     if table.status == 'occupied':
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Não é possível excluir uma mesa que está ocupada.")
 
+    floor_state.touch(db, table.store_id, removed_ids=[table.id])
     deleted_table = await crud_table.table.remove(db=db, id=table_id, current_user=current_user)
     if not deleted_table:
         raise HTTPException(status_code=404, detail="Mesa não encontrada.")
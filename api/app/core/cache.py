@@ -0,0 +1,158 @@
+# api/app/core/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+class CacheBackend:
+    """
+    Interface mínima de um backend de cache de resultados.
+    A implementação padrão é em memória (por processo); um backend compartilhado
+    (ex: Redis) pode ser plugado implementando os mesmos métodos.
+    """
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """ Retorna (encontrado, valor). """
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryTTLCache(CacheBackend):
+    """ Cache LRU em memória com expiração por TTL. """
+
+    def __init__(self, *, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResultCache:
+    """
+    Cache de resultados assíncronos com contadores de acerto/erro.
+
+    `get_or_set` garante que, para uma mesma chave, apenas uma coroutine calcule o valor
+    por vez (as demais aguardam o mesmo resultado), evitando que vários clientes
+    recalculem o mesmo dashboard quando a entrada expira ou é invalidada.
+
+    O cálculo roda na coroutine (e na sessão) de quem o iniciou. Se ela for cancelada (ex:
+    cliente desconectou), as que aguardavam não herdam o cancelamento: voltam a tentar e
+    uma delas passa a calcular com a própria sessão.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def get_or_set(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            found, value = self.backend.get(key)
+            if found:
+                self.hits += 1
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Se o cálculo compartilhado não foi cancelado, quem foi cancelada é esta coroutine.
+                if not inflight.cancelled():
+                    raise
+            else:
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita o aviso de "exception was never retrieved" quando ninguém aguardava.
+            future.exception()
+            raise
+        else:
+            # Só guarda se a chave não foi invalidada durante o cálculo.
+            if self._inflight.get(key) is future:
+                self.backend.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate(self, key: Hashable) -> None:
+        self.invalidations += 1
+        self.backend.delete(key)
+        # Um cálculo em andamento pode ter lido dados anteriores à escrita: não deve ser guardado.
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits / total) if total > 0 else 0.0,
+            "size": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+# Registro dos caches da aplicação, usado para expor as estatísticas.
+_registry: Dict[str, ResultCache] = {}
+
+def create_result_cache(name: str, *, maxsize: int, ttl_seconds: float, backend: Optional[CacheBackend] = None) -> ResultCache:
+    cache = ResultCache(name, backend or InMemoryTTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds))
+    _registry[name] = cache
+    return cache
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -11,6 +12,81 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Pool de conexões do engine assíncrono
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Cache de prepared statements por conexão (use 0 atrás do pgbouncer em modo transação)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Esperas por conexão acima deste valor são logadas
+    DB_POOL_SLOW_CHECKOUT_MS: float = 200.0
+
+    # Réplica de leitura (opcional) para relatórios, dashboards, históricos e lookups
+    READ_REPLICA_DATABASE_URL: Optional[str] = os.getenv("READ_REPLICA_DATABASE_URL")
+    # Atraso máximo de replicação aceito; acima disso as leituras voltam para o primário
+    READ_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    # Intervalo entre verificações do atraso/saúde da réplica
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 15.0
+
+    # Cache de resultados dos dashboards (por loja e global)
+    DASHBOARD_CACHE_TTL_SECONDS: float = 30.0
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1024
+
+    # Cache do usuário autenticado (resolução JWT -> usuário)
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 4096
+
+    # Fila da cozinha: janela de sobreposição da busca incremental (?since=), para não perder
+    # alterações de transações que começaram antes do cursor e confirmaram depois
+    KITCHEN_CURSOR_OVERLAP_SECONDS: float = 5.0
+    # Por quanto tempo as remoções de itens ficam disponíveis à busca incremental; cursores mais
+    # antigos recebem a fila completa (full=true)
+    KITCHEN_REMOVAL_RETENTION_HOURS: int = 24
+
+    # Índice em memória de produtos por loja (GET /products/lookup): remontado após este intervalo
+    # para incorporar alterações feitas por outros processos
+    PRODUCT_LOOKUP_INDEX_TTL_SECONDS: float = 600.0
+
+    # Fichas técnicas por loja usadas na baixa de insumos das vendas de produtos compostos
+    RECIPE_CACHE_TTL_SECONDS: float = 300.0
+    RECIPE_CACHE_MAX_ENTRIES: int = 512
+
+    # Mapa de mesas: cache do estado completo por versão da loja (GET /tables)
+    FLOOR_CACHE_TTL_SECONDS: float = 300.0
+    FLOOR_CACHE_MAX_ENTRIES: int = 512
+
+    # Relatórios PDF: processos que desenham os documentos e cache dos arquivos gerados por
+    # (loja, período, versão do layout). Períodos que incluem o dia de hoje ainda recebem
+    # vendas e expiram antes.
+    REPORT_RENDER_WORKERS: int = 2
+    REPORT_CACHE_TTL_SECONDS: float = 3600.0
+    REPORT_OPEN_PERIOD_CACHE_TTL_SECONDS: float = 120.0
+    REPORT_CACHE_MAX_ENTRIES: int = 64
+
+    # Fechamentos diários de estoque: intervalo entre verificações de dias ainda sem fechamento
+    STOCK_SNAPSHOT_INTERVAL_SECONDS: int = 3600
+
+    # Contagem de inventário em massa: número máximo de linhas por arquivo
+    INVENTORY_COUNT_MAX_ROWS: int = 100000
+
+    # Sugestões de compra: previsão de demanda por loja (histórico, suavização, prazo de
+    # entrega, período de revisão, fator de segurança) e hora do recálculo noturno
+    FORECAST_HISTORY_DAYS: int = 56
+    FORECAST_MOVING_AVERAGE_DAYS: int = 28
+    FORECAST_SMOOTHING_ALPHA: float = 0.3
+    FORECAST_LEAD_TIME_DAYS: int = 7
+    FORECAST_REVIEW_PERIOD_DAYS: int = 14
+    FORECAST_SAFETY_FACTOR: float = 1.65
+    FORECAST_CACHE_TTL_SECONDS: float = 86400.0
+    FORECAST_CACHE_MAX_ENTRIES: int = 256
+    FORECAST_REFRESH_HOUR: int = 3
+
+    # Chaves de idempotência de vendas (cabeçalho Idempotency-Key)
+    IDEMPOTENCY_KEY_RETENTION_HOURS: int = 48
+    IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS: int = 3600
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,117 @@
+# api/app/core/events.py
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from loguru import logger
+
+# Tipos de evento publicados por loja
+ORDER_ITEMS_CHANGED = "order.items_changed"
+ORDER_STATUS_CHANGED = "order.status_changed"
+ORDER_ITEM_STATUS_CHANGED = "order_item.status_changed"
+TABLE_STATUS_CHANGED = "table.status_changed"
+# Enviado a quem reconecta com uma sequência que já saiu do buffer: o cliente deve recarregar o estado.
+RESYNC_REQUIRED = "resync_required"
+
+
+class EventBroker:
+    """
+    Interface mínima do barramento de eventos em tempo real (KDS, mapa de mesas).
+    A implementação padrão é em memória (por processo); um broker compartilhado
+    (ex: Redis Pub/Sub) pode ser plugado implementando os mesmos métodos.
+    """
+
+    def publish(self, store_id: int, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def subscribe(self, store_id: int, *, since: Optional[int] = None):
+        """ Context manager assíncrono que entrega uma fila de eventos da loja. """
+        raise NotImplementedError
+
+    def current_sequence(self, store_id: int) -> int:
+        """ Última sequência publicada para a loja. """
+        raise NotImplementedError
+
+
+class _StoreChannel:
+    def __init__(self, history_size: int):
+        self.sequence = 0
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+
+
+class InMemoryEventBroker(EventBroker):
+    """
+    Pub/sub em memória com sequência por loja. Os últimos `history_size` eventos de cada
+    loja ficam guardados para que um cliente que reconecta informe a última sequência
+    recebida e receba apenas o que perdeu.
+    """
+
+    def __init__(self, *, history_size: int = 500, queue_size: int = 1000):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._channels: Dict[int, _StoreChannel] = {}
+
+    def _channel(self, store_id: int) -> _StoreChannel:
+        channel = self._channels.get(store_id)
+        if channel is None:
+            channel = self._channels[store_id] = _StoreChannel(self.history_size)
+        return channel
+
+    def publish(self, store_id: int, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        channel = self._channel(store_id)
+        channel.sequence += 1
+        event = {
+            "seq": channel.sequence,
+            "type": event_type,
+            "store_id": store_id,
+            "ts": time.time(),
+            "data": data,
+        }
+        channel.history.append(event)
+        for queue in list(channel.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Cliente lento: descarta a fila e pede que recarregue o estado.
+                logger.warning(f"Fila de eventos cheia para um assinante da loja {store_id}; solicitando ressincronização.")
+                self._reset_queue(queue, channel.sequence)
+        return event
+
+    def _reset_queue(self, queue: asyncio.Queue, sequence: int) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"seq": sequence, "type": RESYNC_REQUIRED, "data": {}})
+
+    def _missed_events(self, channel: _StoreChannel, since: int) -> List[Dict[str, Any]]:
+        if since == channel.sequence:
+            return []
+        if since > channel.sequence:
+            # Sequência de outro ciclo de vida do processo (ex: reinício): o estado do cliente é desconhecido.
+            return [{"seq": channel.sequence, "type": RESYNC_REQUIRED, "data": {}}]
+        oldest = channel.history[0]["seq"] if channel.history else channel.sequence + 1
+        if since < oldest - 1:
+            return [{"seq": channel.sequence, "type": RESYNC_REQUIRED, "data": {}}]
+        return [event for event in channel.history if event["seq"] > since]
+
+    @asynccontextmanager
+    async def subscribe(self, store_id: int, *, since: Optional[int] = None) -> AsyncIterator[asyncio.Queue]:
+        channel = self._channel(store_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Reenvio e inscrição sem `await` entre eles: nenhum evento se perde ou se repete.
+        if since is not None:
+            for event in self._missed_events(channel, since):
+                queue.put_nowait(event)
+        channel.subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            channel.subscribers.discard(queue)
+
+    def current_sequence(self, store_id: int) -> int:
+        return self._channel(store_id).sequence
+
+
+event_hub: EventBroker = InMemoryEventBroker()
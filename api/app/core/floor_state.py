@@ -0,0 +1,117 @@
+# api/app/core/floor_state.py
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from app.models.floor_version import FloorVersion, FloorTableChange
+
+# Chave em Session.info com as alterações pendentes: loja -> {mesa: excluída?}
+_PENDING_KEY = "floor_state_pending"
+
+
+class FloorStateTracker:
+    """
+    Versão do mapa de mesas por loja, guardada no banco (floor_versions / floor_table_changes)
+    para que todos os processos da API vejam a mesma.
+
+    Toda alteração que muda o que GET /tables devolve (mesa criada/editada/excluída, comanda
+    aberta/fechada/transferida, item pronto, reserva) chama `touch` antes do commit. As mesas
+    ficam pendentes na sessão e, no commit, a versão da loja é incrementada e as mesas
+    marcadas na mesma transação. Isso acontece por último, depois do flush, então a trava da
+    linha de versão da loja é sempre a última obtida e dura só até o commit.
+
+    A versão é exposta como um token opaco (o número da versão) e no ETag.
+    """
+
+    def touch(
+        self, db: AsyncSession, store_id: int, table_ids: Iterable[Optional[int]] = (), *, removed_ids: Iterable[int] = ()
+    ) -> None:
+        """ Marca mesas como alteradas/excluídas na transação atual da sessão (gravado no commit). """
+        changes: Dict[int, bool] = {}
+        for table_id in table_ids:
+            if table_id is not None:
+                changes[table_id] = False
+        for table_id in removed_ids:
+            changes[table_id] = True
+        if not changes:
+            return
+        pending = db.sync_session.info.setdefault(_PENDING_KEY, {})
+        pending.setdefault(store_id, {}).update(changes)
+
+    def _flush(self, session: Session) -> None:
+        pending: Dict[int, Dict[int, bool]] = session.info.pop(_PENDING_KEY, None) or {}
+        if not pending:
+            return
+        # Grava antes as demais alterações da transação (travas das mesas/comandas primeiro).
+        session.flush()
+        # Lojas em ordem: duas transações que tocam as mesmas lojas as travam na mesma ordem.
+        for store_id in sorted(pending):
+            version = session.execute(
+                pg_insert(FloorVersion)
+                .values(store_id=store_id, version=1)
+                .on_conflict_do_update(
+                    index_elements=[FloorVersion.store_id], set_={"version": FloorVersion.version + 1}
+                )
+                .returning(FloorVersion.version)
+            ).scalar_one()
+            stmt = pg_insert(FloorTableChange).values([
+                {"store_id": store_id, "table_id": table_id, "version": version, "removed": removed}
+                for table_id, removed in sorted(pending[store_id].items())
+            ])
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=[FloorTableChange.store_id, FloorTableChange.table_id],
+                set_={"version": stmt.excluded.version, "removed": stmt.excluded.removed},
+            ))
+
+    def _discard(self, session: Session) -> None:
+        session.info.pop(_PENDING_KEY, None)
+
+    async def version(self, db: AsyncSession, store_id: int) -> int:
+        current = await db.scalar(select(FloorVersion.version).where(FloorVersion.store_id == store_id))
+        return current or 0
+
+    @staticmethod
+    def token(version: int) -> str:
+        return str(version)
+
+    @staticmethod
+    def etag(store_id: int, version: int) -> str:
+        return f'"floor-{store_id}-{version}"'
+
+    @staticmethod
+    def parse_token(token: Optional[str], current: int) -> Optional[int]:
+        """ Versão contida no token, ou None se ele não puder servir de base para um delta. """
+        if not token or not token.isdigit():
+            return None
+        version = int(token)
+        return version if version <= current else None
+
+    async def changes_since(self, db: AsyncSession, store_id: int, version: int) -> Tuple[List[int], List[int]]:
+        """ IDs das mesas alteradas e excluídas depois da versão informada. """
+        rows = (await db.execute(
+            select(FloorTableChange.table_id, FloorTableChange.removed)
+            .where(FloorTableChange.store_id == store_id, FloorTableChange.version > version)
+        )).all()
+        changed = [table_id for table_id, removed in rows if not removed]
+        removed = [table_id for table_id, removed in rows if removed]
+        return changed, removed
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """ Avalia o cabeçalho If-None-Match (lista de ETags, fracas ou não, ou "*"). """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+floor_state = FloorStateTracker()
+
+# Handlers síncronos da Session: com AsyncSession eles rodam no mesmo contexto do commit e
+# podem executar SQL pela própria sessão.
+event.listen(Session, "before_commit", floor_state._flush)
+event.listen(Session, "after_rollback", floor_state._discard)
@@ -1,8 +1,13 @@
 # api/app/crud/base.py
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from datetime import date, datetime
+import base64
+import json
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update, values, column, func, tuple_, Select
+from sqlalchemy.orm import InstrumentedAttribute
 from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
 
@@ -13,6 +18,34 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+
+# --- Paginação por cursor (keyset) ---
+# O cursor é opaco para o cliente: os valores das colunas de ordenação da última linha
+# da página, em JSON codificado em base64 (URL-safe).
+
+def encode_cursor(key_values: Sequence[Any]) -> str:
+    payload = json.dumps(jsonable_encoder(list(key_values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> List[Any]:
+    """ Valores do cursor convertidos para os tipos das colunas `keys`; 400 se for inválido. """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise ValueError("número de valores diferente do esperado")
+        parsed = []
+        for value, key in zip(raw, keys):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                parsed.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                parsed.append(date.fromisoformat(value))
+            else:
+                parsed.append(python_type(value))
+        return parsed
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
@@ -37,6 +70,55 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    async def paginate(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        order_by: Sequence[InstrumentedAttribute],
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        descending: bool = False,
+        entities: bool = True
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Executa `stmt` paginando por keyset sobre (*order_by, id) e retorna (linhas, próximo cursor).
+        Em vez de OFFSET, a página seguinte começa depois da última linha vista
+        (WHERE (chave, id) > (...)), então o custo não cresce com a profundidade e linhas
+        inseridas enquanto o cliente navega não deslocam as páginas. O próximo cursor é None
+        na última página. Use com um índice (store_id, *order_by, id).
+        Com `entities=False` (projeções de colunas) as linhas são retornadas como Row, e as
+        colunas de ordenação e o id devem estar entre as selecionadas.
+        """
+        keys = [*order_by, self.model.id]
+        if cursor:
+            position, after = tuple_(*keys), tuple_(*decode_cursor(cursor, keys))
+            stmt = stmt.where(position < after if descending else position > after)
+        stmt = stmt.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(limit + 1)
+
+        result = await db.execute(stmt)
+        rows = result.scalars().unique().all() if entities else result.all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+    async def get_multi_page(
+        self,
+        db: AsyncSession,
+        *,
+        current_user: User,
+        order_by: Sequence[InstrumentedAttribute],
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        descending: bool = False
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """ Equivalente paginado por cursor de `get_multi`. """
+        stmt = select(self.model)
+        if hasattr(self.model, 'store_id') and current_user.role != 'super_admin':
+            stmt = stmt.filter(self.model.store_id == current_user.store_id)
+        return await self.paginate(db, stmt, order_by=order_by, cursor=cursor, limit=limit, descending=descending)
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType, current_user: User) -> ModelType:
         obj_in_data = obj_in.model_dump()
         
@@ -73,6 +155,63 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[BaseModel],
+        fields: Sequence[str],
+        current_user: User
+    ) -> List[ModelType]:
+        """
+        Atualiza os campos `fields` de várias linhas em uma única transação (ex: salvar o layout
+        do mapa de mesas). Cada item de `objs_in` traz o `id` da linha; campos None mantêm o
+        valor atual. IDs inexistentes ou de outra loja são ignorados.
+
+        São três comandos, independentemente da quantidade de linhas: um SELECT ... FOR UPDATE
+        com IN que confirma a posse e trava as linhas (em ordem de ID, evitando deadlock entre
+        dois salvamentos simultâneos), um UPDATE ... FROM (VALUES ...) e um SELECT final.
+        """
+        updates: Dict[int, Dict[str, Any]] = {}
+        for obj_in in objs_in:
+            # Se o mesmo ID vier repetido, vale a última ocorrência.
+            updates[obj_in.id] = obj_in.model_dump(include=set(fields))
+        if not updates:
+            return []
+
+        owned_stmt = select(self.model.id).where(self.model.id.in_(sorted(updates)))
+        if hasattr(self.model, 'store_id') and current_user.role != 'super_admin':
+            owned_stmt = owned_stmt.where(self.model.store_id == current_user.store_id)
+        owned_ids = (await db.execute(owned_stmt.order_by(self.model.id).with_for_update())).scalars().all()
+        if not owned_ids:
+            await db.rollback()
+            return []
+
+        columns = self.model.__table__.c
+        new_values = values(
+            column("id", columns.id.type),
+            *(column(field, columns[field].type) for field in fields),
+            name="new_values"
+        ).data([(id_, *(updates[id_].get(field) for field in fields)) for id_ in owned_ids])
+
+        await db.execute(
+            update(self.model)
+            .where(self.model.id == new_values.c.id)
+            .values({
+                field: func.coalesce(new_values.c[field], getattr(self.model, field)) for field in fields
+            })
+            .execution_options(synchronize_session="fetch")
+        )
+        await db.commit()
+
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.id.in_(owned_ids))
+            .order_by(self.model.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().all()
+
     # --- CORRIGIDO para ser async ---
     async def remove(self, db: AsyncSession, *, id: int, current_user: User) -> Optional[ModelType]:
         obj = await self.get(db, id=id, current_user=current_user)
@@ -1,8 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import asc
-from sqlalchemy.orm import joinedload
-from typing import List, Optional
+from sqlalchemy.orm import joinedload, lazyload, load_only
+from sqlalchemy.engine import Row
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
 from datetime import date, timedelta
 
@@ -10,10 +10,16 @@ from app.crud.base import CRUDBase
 from app.models.batch import ProductBatch  # <-- Este é o MODELO do banco
 from app.models.product import Product
 from app.models.user import User
+from app.models.stock_movement import MovementType
+from app.services.stock_service import stock_service
+from app.services.search_service import search_service
 # --- CORREÇÃO PRINCIPAL AQUI ---
 # Renomeamos o schema para evitar conflito com o modelo
 from app.schemas.batch import ProductBatchCreate, ProductBatch as ProductBatchSchema
 
+# Apenas id e nome do produto (ProductInfo), sem disparar os relacionamentos "selectin" de Product.
+_PRODUCT_INFO = joinedload(ProductBatch.product).options(load_only(Product.id, Product.name), lazyload("*"))
+
 class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCreate]):
     
     async def create(self, db: AsyncSession, *, obj_in: ProductBatchCreate, current_user: User) -> ProductBatchSchema:
@@ -25,15 +31,23 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
         if not product or product.store_id != current_user.store_id:
             raise HTTPException(status_code=404, detail=f"Produto com ID {obj_in.product_id} não encontrado nesta loja.")
 
-        db_batch = await super().create(db, obj_in=obj_in, current_user=current_user)
-        
-        product.stock += obj_in.quantity
-        db.add(product)
-        
+        db_batch = self.model(**obj_in.model_dump(), store_id=current_user.store_id)
+        db.add(db_batch)
+        await db.flush()
+
+        # Lote e estoque consolidado são confirmados juntos; o incremento é feito no banco.
+        await stock_service.apply_movements(
+            db,
+            store_id=current_user.store_id,
+            user_id=current_user.id,
+            deltas={obj_in.product_id: int(obj_in.quantity)},
+            movement_type=MovementType.PURCHASE,
+            reason=f"Entrada do lote ID: {db_batch.id}"
+        )
         await db.commit()
         
         # Recarrega o lote com os dados do produto para retornar ao frontend sem erros
-        stmt = select(self.model).where(self.model.id == db_batch.id).options(joinedload(self.model.product))
+        stmt = select(self.model).where(self.model.id == db_batch.id).options(_PRODUCT_INFO)
         result = await db.execute(stmt)
         return result.scalars().first()
 
@@ -42,17 +56,18 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
         db: AsyncSession, 
         *, 
         current_user: User,
+        cursor: Optional[str] = None,
+        limit: int = 100,
         expiring_soon_days: Optional[int] = None
-    ) -> List[ProductBatchSchema]:
+    ) -> Tuple[List[ProductBatchSchema], Optional[str]]:
         """
-        Lista todos os lotes da loja do usuário, com opção de filtro,
-        e já carrega a informação do produto associado.
+        Lista os lotes da loja do usuário por ordem de entrada, paginados por cursor,
+        com opção de filtro e com o id e o nome do produto associado.
         """
         query = (
             select(self.model)
             .where(self.model.store_id == current_user.store_id)
-            .options(joinedload(self.model.product))
-            .order_by(asc(self.model.expiration_date))
+            .options(_PRODUCT_INFO)
         )
         
         if expiring_soon_days is not None:
@@ -63,8 +78,51 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
                 self.model.expiration_date <= expiration_limit
             )
             
-        result = await db.execute(query)
-        return result.scalars().all()
+        return await self.paginate(db, query, order_by=[], cursor=cursor, limit=limit)
+
+    async def get_expiring_page(
+        self,
+        db: AsyncSession,
+        *,
+        current_user: User,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        within_days: Optional[int] = None,
+        expired: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> Tuple[List[Row], Optional[str]]:
+        """
+        Controle de validade: lotes com saldo e data de validade, dos que vencem primeiro
+        para os últimos, paginados por cursor (expiration_date, id). Projeção com o nome do
+        produto, em uma única consulta.
+        `within_days` limita aos que vencem até hoje + N dias; `expired` True traz só os
+        vencidos e False só os que ainda não venceram.
+        """
+        today = date.today()
+        statement = (
+            select(
+                self.model.id, self.model.product_id, Product.name.label("product_name"),
+                self.model.quantity, self.model.expiration_date
+            )
+            .join(Product, Product.id == self.model.product_id)
+            .where(
+                self.model.store_id == current_user.store_id,
+                self.model.quantity > 0,
+                self.model.expiration_date.is_not(None)
+            )
+        )
+        if within_days is not None:
+            statement = statement.where(self.model.expiration_date <= today + timedelta(days=within_days))
+        if expired is True:
+            statement = statement.where(self.model.expiration_date < today)
+        elif expired is False:
+            statement = statement.where(self.model.expiration_date >= today)
+        if search:
+            statement = statement.where(await search_service.contains(db, Product.name, search))
+
+        return await self.paginate(
+            db, statement, order_by=[self.model.expiration_date], cursor=cursor, limit=limit, entities=False
+        )
 
 # Exporta uma instância da classe, que será importada como 'crud.batch'
 batch = CRUDProductBatch(ProductBatch)
\ No newline at end of file
@@ -1,12 +1,80 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import or_
+from typing import Any, Dict, List, Optional, Tuple
+import re
 
 from app.crud.base import CRUDBase
 from app.models.customer import Customer
+from app.models.user import User
 from app.schemas.customer import CustomerCreate, CustomerUpdate
+from app.schemas.enums import CustomerSortField
+from app.services.search_service import search_service
 
 class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
     """Operações CRUD para Clientes."""
     # Aqui poderíamos adicionar métodos como 'get_by_phone_number', por exemplo.
-    pass
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        current_user: User,
+        q: Optional[str] = None,
+        phone: Optional[str] = None,
+        document: Optional[str] = None,
+        sort_by: CustomerSortField = CustomerSortField.FULL_NAME
+    ) -> Tuple[List[Customer], Optional[str]]:
+        """
+        Página de clientes da loja e o próximo cursor.
+
+        Filtros: `phone` e `document` são comparados exatamente (só dígitos, como são gravados)
+        nas colunas únicas; `q` com 8 ou mais dígitos e sem letras é tratado como telefone ou
+        CPF/CNPJ, qualquer outro `q` como prefixo do nome (sem diferenciar acentos).
+        Ordenação: nome (A-Z), total gasto ou última visita (maiores/mais recentes primeiro);
+        na ordenação por última visita, clientes que nunca compraram não aparecem.
+        """
+        stmt = select(self.model).where(self.model.store_id == current_user.store_id)
+
+        if phone:
+            stmt = stmt.where(self.model.phone_number == re.sub(r"\D", "", phone))
+        if document:
+            stmt = stmt.where(self.model.document_number == re.sub(r"\D", "", document))
+        if q:
+            digits = re.sub(r"\D", "", q)
+            if len(digits) >= 8 and not re.search(r"[^\d\s().+/-]", q):
+                stmt = stmt.where(or_(self.model.phone_number == digits, self.model.document_number == digits))
+            else:
+                stmt = stmt.where(await search_service.starts_with(db, self.model.full_name, q))
+
+        if sort_by == CustomerSortField.TOTAL_SPENT:
+            order_by, descending = [self.model.total_spent], True
+        elif sort_by == CustomerSortField.LAST_SEEN:
+            # Chaves nulas não participam da comparação do cursor.
+            stmt = stmt.where(self.model.last_seen.is_not(None))
+            order_by, descending = [self.model.last_seen], True
+        else:
+            order_by, descending = [self.model.full_name], False
+
+        return await self.paginate(db, stmt, order_by=order_by, cursor=cursor, limit=limit, descending=descending)
+
+    async def search(
+        self, db: AsyncSession, *, q: str, limit: int = 20, current_user: User
+    ) -> List[Dict[str, Any]]:
+        """ Clientes da loja ordenados por relevância do nome para o termo (ver SearchService). """
+        return await search_service.search(
+            db,
+            columns=[
+                self.model.id, self.model.full_name, self.model.phone_number,
+                self.model.email, self.model.document_number
+            ],
+            search_column=self.model.full_name,
+            where=[self.model.store_id == current_user.store_id],
+            term=q,
+            limit=limit,
+        )
 
 customer = CRUDCustomer(Customer)
\ No newline at end of file
@@ -2,29 +2,37 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import Session, selectinload, joinedload
-from typing import List, Optional
+from sqlalchemy import update, delete, or_, func
+from sqlalchemy.orm import selectinload, joinedload
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
 from decimal import Decimal, ROUND_HALF_UP
 from loguru import logger
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
 
 from app.crud.base import CRUDBase
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderItem, OrderItemRemoval
 from app.models.product import Product
 from app.models.user import User
 from app.models.table import Table
 from app.models.sale import Sale, SaleItem as SaleItemModel
 from app.models.payment import Payment
-from app.schemas.enums import TableStatus, OrderStatus, OrderType
+from app.schemas.enums import TableStatus, OrderStatus, OrderType, OrderItemStatus
 from app.schemas.order import OrderCreate, OrderUpdate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer
-from app.services.cash_register_service import cash_register_service
-from app.services.crm_service import crm_service
-from app.services.stock_service import stock_service
+from app.services.post_sale_service import post_sale_service
+from app.services.idempotency_service import idempotency_service
+from app.core import events
+from app.core.config import settings
+from app.core.events import event_hub
+from app.core.floor_state import floor_state
 
 async def get_full_order(db: AsyncSession, *, id: int) -> Optional[Order]:
-    """ Carrega uma comanda com todos os seus relacionamentos. """
-    stmt = select(Order).where(Order.id == id).options(
+    """
+    Carrega uma comanda com todos os seus relacionamentos. populate_existing recarrega
+    também as coleções já carregadas na sessão (ex.: `items` antes de um item novo).
+    """
+    stmt = select(Order).where(Order.id == id).execution_options(populate_existing=True).options(
         selectinload(Order.items).options(
             joinedload(OrderItem.product)
         ),
@@ -35,23 +43,194 @@ async def get_full_order(db: AsyncSession, *, id: int) -> Optional[Order]:
     result = await db.execute(stmt)
     return result.scalars().first()
 
-def _run_sync_post_sale_services(db_session: Session, *, sale: Sale):
-    """
-    Executa os serviços síncronos de forma segura e atômica.
-    """
-    sync_sale = db_session.merge(sale)
-    
-    cash_register_service.add_sale_transaction(db_session, sale=sync_sale)
-    crm_service.update_customer_stats_from_sale(db_session, sale=sync_sale)
-    stock_service.deduct_stock_from_sale(db_session, sale=sync_sale)
-    
-    db_session.commit()
+# Os helpers de publicação rodam após o commit. A mesa afetada é marcada no mapa de mesas (GET /tables)
+# com floor_state.touch antes do commit, na mesma transação da alteração.
+
+def _publish_order_items(order: Order) -> None:
+    """ Publica o estado atual dos itens da comanda (KDS). A comanda deve ter os itens e produtos carregados. """
+    event_hub.publish(order.store_id, events.ORDER_ITEMS_CHANGED, {
+        "order_id": order.id,
+        "table_id": order.table_id,
+        "order_type": order.order_type,
+        "items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "product_name": item.product.name if item.product else None,
+                "quantity": item.quantity,
+                "notes": item.notes,
+                "status": item.status,
+            }
+            for item in order.items
+        ],
+    })
+
+def _publish_order_status(order: Order) -> None:
+    event_hub.publish(order.store_id, events.ORDER_STATUS_CHANGED, {
+        "order_id": order.id, "table_id": order.table_id, "status": order.status,
+    })
+
+def _publish_table_status(store_id: int, table_id: int, table_status: TableStatus) -> None:
+    event_hub.publish(store_id, events.TABLE_STATUS_CHANGED, {"table_id": table_id, "status": table_status})
+
+
+KITCHEN_QUEUE_STATUSES = [OrderItemStatus.PENDING, OrderItemStatus.PREPARING]
+
+def _local(moment: datetime) -> datetime:
+    """ As colunas de data das comandas são sem fuso (hora local do banco); o cursor também. """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+def encode_kitchen_cursor(moment: datetime) -> str:
+    return base64.urlsafe_b64encode(_local(moment).isoformat().encode()).decode()
+
+def decode_kitchen_cursor(cursor: str) -> datetime:
+    try:
+        return _local(datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode()))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
 
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
 
-    async def process_partial_payment(self, db: AsyncSession, *, order_id: int, payment_request: PartialPaymentRequest, current_user: User) -> Order:
+    async def get_kitchen_queue(
+        self, db: AsyncSession, *, current_user: User, since: Optional[datetime] = None
+    ) -> Tuple[datetime, List[Dict], bool]:
+        """
+        Fila da cozinha da loja em uma única consulta (itens + comanda + produto + mesa).
+        Retorna o instante da consulta (base do próximo cursor), as comandas com seus itens e se
+        a resposta é a fila completa (sem `since` ou com cursor mais antigo que a retenção das
+        remoções). Na busca incremental, cada comanda traz também `removed_item_ids`.
+        """
+        # LOCALTIMESTAMP (sem fuso), comparável com updated_at/removed_at preenchidos por now().
+        now = await db.scalar(select(func.localtimestamp()))
+        stmt = (
+            select(
+                OrderItem.id, OrderItem.product_id, Product.name.label("product_name"),
+                OrderItem.quantity, OrderItem.notes, OrderItem.status, OrderItem.updated_at,
+                Order.id.label("order_id"), Order.status.label("order_status"), Order.order_type,
+                Order.table_id, Table.number.label("table_number"), Order.created_at,
+            )
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Product, OrderItem.product_id == Product.id)
+            .outerjoin(Table, Order.table_id == Table.id)
+            .where(Order.store_id == current_user.store_id)
+            .order_by(Order.created_at, Order.id, OrderItem.id)
+        )
+        if since is not None:
+            since = since - timedelta(seconds=settings.KITCHEN_CURSOR_OVERLAP_SECONDS)
+            if since < now - timedelta(hours=settings.KITCHEN_REMOVAL_RETENTION_HOURS):
+                # As remoções desse período já foram descartadas: o cliente recebe a fila completa.
+                since = None
+        full = since is None
+        if full:
+            # Usa o índice parcial ix_order_items_kitchen_queue.
+            stmt = stmt.where(Order.status == OrderStatus.OPEN, OrderItem.status.in_(KITCHEN_QUEUE_STATUSES))
+        else:
+            stmt = stmt.where(or_(OrderItem.updated_at > since, Order.updated_at > since))
+
+        tickets: Dict[int, Dict] = {}
+        for row in (await db.execute(stmt)).all():
+            ticket = tickets.get(row.order_id)
+            if ticket is None:
+                ticket = tickets[row.order_id] = self._kitchen_ticket(row)
+            ticket["items"].append({
+                "id": row.id,
+                "product_id": row.product_id,
+                "product_name": row.product_name,
+                "quantity": row.quantity,
+                "notes": row.notes,
+                "status": row.status,
+                "updated_at": row.updated_at,
+            })
+        if not full:
+            await self._add_kitchen_removals(db, tickets, store_id=current_user.store_id, since=since)
+        return now, list(tickets.values()), full
+
+    @staticmethod
+    def _kitchen_ticket(row) -> Dict:
+        return {
+            "id": row.order_id,
+            "status": row.order_status,
+            "order_type": row.order_type,
+            "table_id": row.table_id,
+            "table_number": row.table_number,
+            "created_at": row.created_at,
+            "items": [],
+            "removed_item_ids": [],
+        }
+
+    async def _add_kitchen_removals(self, db: AsyncSession, tickets: Dict[int, Dict], *, store_id: int, since: datetime) -> None:
+        """
+        Acrescenta às comandas os itens removidos desde `since`. Comandas que ficaram sem
+        nenhum item não aparecem na consulta principal e são carregadas aqui.
+        """
+        removals = (await db.execute(
+            select(OrderItemRemoval.order_id, OrderItemRemoval.order_item_id)
+            .where(OrderItemRemoval.store_id == store_id, OrderItemRemoval.removed_at > since)
+            .order_by(OrderItemRemoval.id)
+        )).all()
+        if not removals:
+            return
+        missing = {order_id for order_id, _ in removals if order_id not in tickets}
+        if missing:
+            headers = await db.execute(
+                select(
+                    Order.id.label("order_id"), Order.status.label("order_status"), Order.order_type,
+                    Order.table_id, Table.number.label("table_number"), Order.created_at,
+                )
+                .outerjoin(Table, Order.table_id == Table.id)
+                .where(Order.id.in_(missing))
+            )
+            for row in headers.all():
+                tickets[row.order_id] = self._kitchen_ticket(row)
+        for order_id, order_item_id in removals:
+            if order_id in tickets:
+                tickets[order_id]["removed_item_ids"].append(order_item_id)
+
+    async def update_items_status(
+        self, db: AsyncSession, *, item_ids: List[int], new_status: OrderItemStatus, current_user: User
+    ) -> List[Dict]:
+        """
+        Altera o status de vários itens de comandas abertas da loja em um único UPDATE.
+        Retorna os itens efetivamente alterados (id, order_id, table_id, status).
+        """
+        stmt = (
+            update(OrderItem)
+            .where(
+                OrderItem.id.in_(item_ids),
+                OrderItem.order_id == Order.id,
+                Order.store_id == current_user.store_id,
+                Order.status == OrderStatus.OPEN,
+            )
+            .values(status=new_status)
+            .returning(OrderItem.id, OrderItem.order_id, Order.table_id, OrderItem.status)
+            .execution_options(synchronize_session="fetch")
+        )
+        changed = [dict(row._mapping) for row in (await db.execute(stmt)).all()]
+        # Itens prontos mudam o indicador `has_ready_items` das mesas.
+        floor_state.touch(db, current_user.store_id, {item["table_id"] for item in changed})
+        await db.commit()
+
+        if changed:
+            event_hub.publish(current_user.store_id, events.ORDER_ITEM_STATUS_CHANGED, {"items": changed})
+        return changed
+
+
+    async def process_partial_payment(
+        self, db: AsyncSession, *, order_id: int, payment_request: PartialPaymentRequest, current_user: User,
+        idempotency_key: Optional[str] = None
+    ) -> Order:
         logger.info(f"Iniciando pagamento para comanda ID: {order_id} pelo usuário ID: {current_user.id}")
+
+        idempotency_scope = f"orders/{order_id}/pay"
+        if idempotency_key:
+            request_hash = idempotency_service.request_hash(payment_request)
+            if await idempotency_service.find(
+                db, store_id=current_user.store_id, scope=idempotency_scope, key=idempotency_key, request_hash=request_hash
+            ) is not None:
+                return await get_full_order(db, id=order_id)
         
         order = await get_full_order(db, id=order_id)
         
@@ -117,14 +296,35 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
             if order.table:
                 order.table.status = TableStatus.AVAILABLE
                 db.add(order.table)
+            floor_state.touch(db, order.store_id, [order.table_id])
             logger.info(f"Comanda ID {order.id} totalmente paga. Liberando a mesa {order.table_id}.")
 
-        await db.commit()
-        await db.refresh(db_sale)
+        await db.flush()
+
+        if idempotency_key and not await idempotency_service.claim(
+            db, store_id=current_user.store_id, scope=idempotency_scope, key=idempotency_key,
+            request_hash=request_hash, sale_id=db_sale.id
+        ):
+            # Uma requisição concorrente com a mesma chave já confirmou o pagamento.
+            await db.rollback()
+            if await idempotency_service.find(
+                db, store_id=current_user.store_id, scope=idempotency_scope, key=idempotency_key, request_hash=request_hash
+            ) is None:
+                # A chave sumiu entre o conflito e a leitura (ex.: removida pela limpeza).
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A requisição com esta chave de idempotência não pôde ser confirmada; tente novamente."
+                )
+            return await get_full_order(db, id=order_id)
 
         logger.info(f"Venda (Sale) ID {db_sale.id} criada a partir da comanda. Executando serviços de pós-venda...")
-        await db.run_sync(_run_sync_post_sale_services, sale=db_sale)
-        logger.info("Serviços de pós-venda concluídos.")
+        # A venda, a comanda e o pós-venda são confirmados numa única transação.
+        await post_sale_service.process_sale(db, sale=db_sale)
+
+        if all_items_paid:
+            _publish_order_status(order)
+            if order.table_id:
+                _publish_table_status(order.store_id, order.table_id, TableStatus.AVAILABLE)
         
         return await get_full_order(db, id=order.id)
     
@@ -142,8 +342,10 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         order.status = OrderStatus.CLOSED
         order.closed_at = datetime.utcnow()
         db.add(order)
+        floor_state.touch(db, order.store_id, [order.table_id])
         await db.commit()
         await db.refresh(order)
+        _publish_order_status(order)
         return order
 
     async def add_item_to_order(self, db: AsyncSession, *, order: Order, item_in: OrderItemCreate, current_user: User) -> Order:
@@ -160,12 +362,23 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
                 existing_item.quantity = new_quantity
                 db.add(existing_item)
             else:
+                # A remoção fica registrada para a busca incremental da cozinha, e a comanda é
+                # marcada como alterada mesmo que não reste nenhum item.
+                db.add(OrderItemRemoval(store_id=order.store_id, order_id=order.id, order_item_id=existing_item.id))
                 await db.delete(existing_item)
+                order.updated_at = func.now()
+                await db.execute(delete(OrderItemRemoval).where(
+                    OrderItemRemoval.store_id == order.store_id,
+                    OrderItemRemoval.removed_at < func.now() - timedelta(hours=settings.KITCHEN_REMOVAL_RETENTION_HOURS)
+                ))
         elif item_in.quantity > 0:
             new_item = OrderItem(order_id=order.id, product_id=item_in.product_id, quantity=item_in.quantity, price_at_order=product.price, notes=item_in.notes)
             db.add(new_item)
+        floor_state.touch(db, order.store_id, [order.table_id])
         await db.commit()
-        return await get_full_order(db, id=order.id)
+        updated_order = await get_full_order(db, id=order.id)
+        _publish_order_items(updated_order)
+        return updated_order
     
     async def cancel_order(self, db: AsyncSession, *, order: Order, current_user: User) -> Order:
         if order.status != OrderStatus.OPEN:
@@ -178,10 +391,31 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         order.status = OrderStatus.CANCELLED
         order.closed_at = datetime.utcnow()
         db.add(order)
+        floor_state.touch(db, order.store_id, [order.table_id])
         await db.commit()
         await db.refresh(order)
+        _publish_order_status(order)
+        if order.table_id:
+            _publish_table_status(order.store_id, order.table_id, TableStatus.AVAILABLE)
         return order
 
+    async def get_multi_for_store(
+        self, db: AsyncSession, *, current_user: User, order_status: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[Order], Optional[str]]:
+        """ Página de comandas da loja, da mais recente para a mais antiga, e o próximo cursor. """
+        stmt = select(Order).where(Order.store_id == current_user.store_id).options(
+            selectinload(Order.items).options(joinedload(OrderItem.product)),
+            selectinload(Order.table),
+            selectinload(Order.user),
+            selectinload(Order.customer)
+        )
+        if order_status:
+            stmt = stmt.where(Order.status == order_status)
+        return await self.paginate(
+            db, stmt, order_by=[Order.created_at], cursor=cursor, limit=limit, descending=True
+        )
+
     async def get_for_user(self, db: AsyncSession, *, id: int, current_user: User) -> Optional[Order]:
         stmt = select(Order).filter(Order.id == id, Order.store_id == current_user.store_id)
         result = await db.execute(stmt)
@@ -201,9 +435,14 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         order_data = obj_in.model_dump()
         db_order = Order(**order_data, user_id=current_user.id, store_id=current_user.store_id, status=OrderStatus.OPEN)
         db.add(db_order)
+        floor_state.touch(db, current_user.store_id, [db_order.table_id])
         await db.commit()
         await db.refresh(db_order)
-        return await get_full_order(db, id=db_order.id)
+        if db_order.table_id and obj_in.order_type == OrderType.DINE_IN:
+            _publish_table_status(db_order.store_id, db_order.table_id, TableStatus.OCCUPIED)
+        created_order = await get_full_order(db, id=db_order.id)
+        _publish_order_items(created_order)
+        return created_order
     
     # --- INÍCIO DAS NOVAS FUNÇÕES ---
     async def transfer_order(self, db: AsyncSession, *, source_order: Order, target_table_id: int, current_user: User) -> Order:
@@ -215,6 +454,7 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
             raise HTTPException(status_code=400, detail="Mesa de destino não está livre.")
         
         # Libera a mesa antiga
+        previous_table_id = source_order.table_id
         if source_order.table:
             source_order.table.status = TableStatus.AVAILABLE
             db.add(source_order.table)
@@ -224,9 +464,14 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         source_order.table_id = target_table.id
         db.add(target_table)
         db.add(source_order)
+        floor_state.touch(db, current_user.store_id, [previous_table_id, target_table.id])
         
         await db.commit()
         await db.refresh(source_order)
+        if previous_table_id:
+            _publish_table_status(source_order.store_id, previous_table_id, TableStatus.AVAILABLE)
+        _publish_table_status(source_order.store_id, target_table.id, TableStatus.OCCUPIED)
+        _publish_order_items(source_order)
         return source_order
 
     async def merge_orders(self, db: AsyncSession, *, target_order: Order, source_order_id: int, current_user: User) -> Order:
@@ -240,11 +485,14 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
             item.order_id = target_order.id
             db.add(item)
             
-        # Cancela a comanda de origem
+        floor_state.touch(db, target_order.store_id, [target_order.table_id])
+        # Cancela a comanda de origem (o commit dela grava também a mudança dos itens)
         await self.cancel_order(db, order=source_order, current_user=current_user)
         
         await db.commit()
-        return await get_full_order(db, id=target_order.id)
+        merged_order = await get_full_order(db, id=target_order.id)
+        _publish_order_items(merged_order)
+        return merged_order
     # --- FIM DAS NOVAS FUNÇÕES ---
         
 order = CRUDOrder(Order)
\ No newline at end of file
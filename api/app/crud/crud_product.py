@@ -1,16 +1,41 @@
 # api/app/crud/crud_product.py
-from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy.orm import Session, selectinload, joinedload, lazyload
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession # <-- ADICIONE ESTA LINHA
-from typing import List, Any, Dict, Union, Optional
+from sqlalchemy.engine import Row
+from typing import List, Any, Dict, Union, Optional, Tuple
 from app.models.user import User as UserModel
 
 from app.crud.base import CRUDBase
-from app.models.product import Product
+from app.models.category import ProductCategory
+from app.models.product import Product, ProductType
 from app.models.supplier import Supplier # <-- Importar Supplier
+from app.models.variation import ProductVariation
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.services.product_lookup_service import product_lookup_service
+from app.services.recipe_service import recipe_service
+from app.services.search_service import search_service
 from fastapi.encoders import jsonable_encoder
 
+def product_detail_options() -> tuple:
+    """
+    Relacionamentos serializados pelo schema Product, incluindo os aninhados (subcategorias da
+    categoria e opções das variações): sem eles a serialização tenta um lazy load fora do greenlet.
+    Lotes e ficha técnica não fazem parte do schema: um produto com milhares de lotes os
+    carregaria inteiros (selectin do modelo) a cada leitura.
+
+    Montadas a cada consulta: criá-las na importação do módulo configura os mappers antes de
+    todos os modelos estarem importados.
+    """
+    return (
+        selectinload(Product.variations).selectinload(ProductVariation.options),
+        joinedload(Product.category).selectinload(ProductCategory.subcategories),
+        joinedload(Product.subcategory),
+        joinedload(Product.supplier),
+        lazyload(Product.batches),
+        lazyload(Product.recipe_items),
+    )
+
 class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
 
     async def _get_product_with_relations(self, db: AsyncSession, product_id: int) -> Product | None:
@@ -18,13 +43,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         statement = (
             select(Product)
             .where(Product.id == product_id)
-            .options(
-                selectinload(Product.variations), # Mantido
-                joinedload(Product.category),     # Mantido
-                joinedload(Product.subcategory), # Mantido
-                joinedload(Product.supplier)      # <-- ADICIONADO Supplier
-                # selectinload(Product.recipe_items).selectinload(RecipeItem.ingredient) # Adicionar depois para receitas
-            )
+            .options(*product_detail_options())
         )
         result = await db.execute(statement)
         return result.scalars().first()
@@ -41,42 +60,78 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         self,
         db: AsyncSession,
         *,
-        skip: int = 0,
+        cursor: Optional[str] = None,
         limit: int = 100,
         current_user: UserModel,
         search: Optional[str] = None,
         category_id: Optional[int] = None, # <-- NOVO Filtro
         supplier_id: Optional[int] = None  # <-- NOVO Filtro
-    ) -> List[Product]:
-        """ Obtém uma lista de produtos da loja do usuário, com filtros opcionais. """
+    ) -> Tuple[List[Product], Optional[str]]:
+        """ Obtém uma página de produtos da loja do usuário (por nome), com filtros opcionais, e o próximo cursor. """
         statement = (
             select(self.model)
             .where(self.model.store_id == current_user.store_id if current_user.role != 'super_admin' else True) # Permite super_admin ver tudo
-            .options(
-                selectinload(self.model.variations),
-                joinedload(self.model.category),
-                joinedload(self.model.subcategory),
-                joinedload(self.model.supplier) # <-- Carrega Supplier para a lista
-            )
-            .order_by(self.model.name)
+            .options(*product_detail_options())
         )
 
         if search:
-            statement = statement.where(self.model.name.ilike(f"%{search}%"))
+            statement = statement.where(await search_service.contains(db, self.model.name, search))
         if category_id:
             statement = statement.where(self.model.category_id == category_id)
         if supplier_id:
             statement = statement.where(self.model.supplier_id == supplier_id)
 
-        statement = statement.offset(skip).limit(limit)
+        return await self.paginate(db, statement, order_by=[self.model.name], cursor=cursor, limit=limit)
 
-        result = await db.execute(statement)
-        return result.scalars().all()
+    async def get_catalog(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        current_user: UserModel,
+        search: Optional[str] = None,
+        category_id: Optional[int] = None
+    ) -> Tuple[List[Row], Optional[str]]:
+        """
+        Projeção enxuta para a grade do POS: apenas as colunas exibidas, sem carregar
+        relacionamentos (variações, categoria, fornecedor, lotes, receita). Uma única consulta.
+        """
+        statement = select(
+            self.model.id, self.model.name, self.model.price, self.model.stock,
+            self.model.barcode, self.model.image_url, self.model.category_id
+        ).where(self.model.store_id == current_user.store_id)
+
+        if search:
+            statement = statement.where(await search_service.contains(db, self.model.name, search))
+        if category_id:
+            statement = statement.where(self.model.category_id == category_id)
+
+        return await self.paginate(
+            db, statement, order_by=[self.model.name], cursor=cursor, limit=limit, entities=False
+        )
+
+    async def search(
+        self, db: AsyncSession, *, q: str, limit: int = 20, current_user: UserModel
+    ) -> List[Dict[str, Any]]:
+        """ Produtos da loja ordenados por relevância para o termo (ver SearchService). """
+        return await search_service.search(
+            db,
+            columns=[
+                self.model.id, self.model.name, self.model.price, self.model.stock,
+                self.model.barcode, self.model.image_url, self.model.category_id
+            ],
+            search_column=self.model.name,
+            where=[self.model.store_id == current_user.store_id],
+            term=q,
+            limit=limit,
+        )
 
     async def create(self, db: AsyncSession, *, obj_in: ProductCreate, current_user: UserModel) -> Product:
         """ Cria um novo produto e o retorna com relacionamentos carregados. """
         # CRUDBase.create lida com store_id e campos básicos
         db_obj = await super().create(db=db, obj_in=obj_in, current_user=current_user)
+        product_lookup_service.upsert(db_obj)
         # Recarrega com relações após criar
         return await self._get_product_with_relations(db, db_obj.id)
 
@@ -84,10 +139,24 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         self, db: AsyncSession, *, db_obj: Product, obj_in: Union[ProductUpdate, Dict[str, Any]], current_user: UserModel
     ) -> Product:
         """ Atualiza um produto e o retorna com relacionamentos carregados. """
+        was_composed = db_obj.product_type == ProductType.COMPOSED
         # CRUDBase.update aplica as mudanças
         await super().update(db=db, db_obj=db_obj, obj_in=obj_in, current_user=current_user)
+        product_lookup_service.upsert(db_obj)
+        if was_composed or db_obj.product_type == ProductType.COMPOSED:
+            # Produto entrou ou saiu do grafo de receitas.
+            recipe_service.invalidate(store_id=db_obj.store_id)
         # Recarrega com relações após atualizar
         return await self._get_product_with_relations(db, db_obj.id)
 
+    async def remove(self, db: AsyncSession, *, id: int, current_user: UserModel) -> Optional[Product]:
+        """ Exclui um produto e o retira do índice de busca do POS. """
+        db_obj = await super().remove(db=db, id=id, current_user=current_user)
+        if db_obj:
+            product_lookup_service.remove(store_id=db_obj.store_id, product_id=db_obj.id)
+            if db_obj.product_type == ProductType.COMPOSED:
+                recipe_service.invalidate(store_id=db_obj.store_id)
+        return db_obj
+
 
 product = CRUDProduct(Product)
\ No newline at end of file
@@ -6,6 +6,7 @@ from sqlalchemy import delete
 from app.models.recipe import RecipeItem
 from app.models.product import Product
 from app.schemas.recipe import RecipeUpdate
+from app.services.recipe_service import recipe_service
 
 async def update_product_recipe(db: AsyncSession, product: Product, recipe_in: RecipeUpdate) -> Product:
     """
@@ -18,6 +19,7 @@ async def update_product_recipe(db: AsyncSession, product: Product, recipe_in: R
     # 2. Cria os novos itens da receita
     new_recipe_items = [
         RecipeItem(
+            store_id=product.store_id,
             product_id=product.id,
             ingredient_id=item.ingredient_id,
             quantity_needed=item.quantity_needed
@@ -27,6 +29,7 @@ async def update_product_recipe(db: AsyncSession, product: Product, recipe_in: R
     db.add_all(new_recipe_items)
     
     await db.commit()
+    recipe_service.invalidate(store_id=product.store_id)
     await db.refresh(product, ["recipe_items"]) # Recarrega o produto com a nova receita
     
     return product
@@ -1,14 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, desc, extract # Adicionado extract
+from sqlalchemy import func, desc
 from datetime import date, timedelta
-from typing import List, Dict, Any # Adicionado Dict e Any
+from typing import List, Dict, Any, Optional # Adicionado Dict e Any
 
-from app.models.sale import Sale, SaleItem
 from app.models.product import Product
 from app.models.user import User
-from app.models.payment import Payment # Adicionado Payment
 from app.models.category import ProductCategory # Adicionado ProductCategory
+# Os relatórios leem das tabelas de rollup (mantidas por app/services/sales_rollup_service.py),
+# de modo que o custo depende do número de dias do período e não do número de vendas.
+from app.models.sales_rollup import (
+    SalesHourlyRollup, SalesPaymentRollup, SalesCategoryRollup, SalesProductRollup
+)
 
 # Schemas são usados para tipagem de retorno, mas a lógica está aqui
 from app.schemas.report import (
@@ -16,24 +19,31 @@ from app.schemas.report import (
     SalesByPaymentMethodItem, SalesByHourItem, SalesByCategoryItem # Adicionados
 )
 
+def _rollup_filters(model, start_date: Optional[date], end_date: Optional[date], store_id: Optional[int]) -> list:
+    """ Monta os filtros de período (inclusivo) e loja para uma tabela de rollup. """
+    filters = []
+    if start_date is not None:
+        filters.append(model.sale_date >= start_date)
+    if end_date is not None:
+        filters.append(model.sale_date <= end_date)
+    if store_id is not None:
+        filters.append(model.store_id == store_id)
+    return filters
+
 async def get_top_selling_products_by_period(
-    db: AsyncSession, start_date: date, end_date: date, limit: int = 5, order_by: str = 'revenue'
+    db: AsyncSession, start_date: date, end_date: date, limit: int = 5, order_by: str = 'revenue', *, store_id: Optional[int] = None
 ) -> List[TopSellingProduct]:
     """ Retorna os produtos mais vendidos (por receita ou quantidade) em um período específico. """
     stmt = (
         select(
-            SaleItem.product_id,
+            SalesProductRollup.product_id,
             Product.name.label("product_name"),
-            func.sum(SaleItem.quantity).label("total_quantity_sold"),
-            func.sum(SaleItem.quantity * SaleItem.price_at_sale).label("total_revenue") # Usar total_revenue agora
+            func.sum(SalesProductRollup.quantity_sold).label("total_quantity_sold"),
+            func.sum(SalesProductRollup.total_revenue).label("total_revenue")
         )
-        .join(Product, SaleItem.product_id == Product.id)
-        .join(Sale, SaleItem.sale_id == Sale.id) # *** JOIN com Sale para filtrar data ***
-        .where(
-            func.date(Sale.created_at) >= start_date, # *** Filtro de data ***
-            func.date(Sale.created_at) <= end_date   # *** Filtro de data ***
-        )
-        .group_by(SaleItem.product_id, Product.name)
+        .join(Product, SalesProductRollup.product_id == Product.id)
+        .where(*_rollup_filters(SalesProductRollup, start_date, end_date, store_id))
+        .group_by(SalesProductRollup.product_id, Product.name)
     )
 
     if order_by == 'revenue':
@@ -45,21 +55,17 @@ async def get_top_selling_products_by_period(
 
     result = await db.execute(stmt)
     # Convertendo para o schema Pydantic explicitamente
-    # Ajuste: O schema espera 'total_revenue', não 'total_revenue_generated'
     return [TopSellingProduct(**row._mapping) for row in result]
 
-async def get_sales_by_period(db: AsyncSession, start_date: date, end_date: date) -> SalesByPeriod:
+async def get_sales_by_period(db: AsyncSession, start_date: date, end_date: date, *, store_id: Optional[int] = None) -> SalesByPeriod:
     """
     Calcula o total de vendas, número de transações e ticket médio
     dentro de um período de datas.
     """
     stmt = select(
-        func.coalesce(func.sum(Sale.total_amount), 0.0).label("total_sales"),
-        func.coalesce(func.count(Sale.id), 0).label("num_transactions")
-    ).where(
-        func.date(Sale.created_at) >= start_date,
-        func.date(Sale.created_at) <= end_date
-    )
+        func.coalesce(func.sum(SalesHourlyRollup.total_amount), 0.0).label("total_sales"),
+        func.coalesce(func.sum(SalesHourlyRollup.transaction_count), 0).label("num_transactions")
+    ).where(*_rollup_filters(SalesHourlyRollup, start_date, end_date, store_id))
     result = await db.execute(stmt)
     data = result.one() # Usar one() pois esperamos sempre uma linha
 
@@ -73,19 +79,20 @@ async def get_sales_by_period(db: AsyncSession, start_date: date, end_date: date
         average_ticket=average_ticket
     )
 
-async def get_top_selling_products(db: AsyncSession, limit: int = 5) -> List[TopSellingProduct]:
+async def get_top_selling_products(db: AsyncSession, limit: int = 5, *, store_id: Optional[int] = None) -> List[TopSellingProduct]:
     """
     Retorna uma lista dos produtos mais vendidos por quantidade.
     """
     stmt = (
         select(
-            SaleItem.product_id,
+            SalesProductRollup.product_id,
             Product.name.label("product_name"),
-            func.sum(SaleItem.quantity).label("total_quantity_sold"), # Nome da coluna corrigido
-            func.sum(SaleItem.quantity * SaleItem.price_at_sale).label("total_revenue")
+            func.sum(SalesProductRollup.quantity_sold).label("total_quantity_sold"), # Nome da coluna corrigido
+            func.sum(SalesProductRollup.total_revenue).label("total_revenue")
         )
-        .join(Product, SaleItem.product_id == Product.id)
-        .group_by(SaleItem.product_id, Product.name)
+        .join(Product, SalesProductRollup.product_id == Product.id)
+        .where(*_rollup_filters(SalesProductRollup, None, None, store_id))
+        .group_by(SalesProductRollup.product_id, Product.name)
         .order_by(desc("total_quantity_sold")) # Ordenar pelo nome corrigido
         .limit(limit)
     )
@@ -94,43 +101,38 @@ async def get_top_selling_products(db: AsyncSession, limit: int = 5) -> List[Top
     return [TopSellingProduct(**row._mapping) for row in result]
 
 
-async def get_sales_by_user(db: AsyncSession, start_date: date, end_date: date) -> List[SalesByUser]:
+async def get_sales_by_user(db: AsyncSession, start_date: date, end_date: date, *, store_id: Optional[int] = None) -> List[SalesByUser]:
     """
     Agrupa o total de vendas e transações por usuário em um período.
     """
     stmt = (
         select(
-            Sale.user_id,
+            SalesHourlyRollup.user_id,
             User.full_name.label("user_full_name"),
-            func.coalesce(func.sum(Sale.total_amount), 0.0).label("total_sales_amount"),
-            func.coalesce(func.count(Sale.id), 0).label("number_of_transactions")
+            func.coalesce(func.sum(SalesHourlyRollup.total_amount), 0.0).label("total_sales_amount"),
+            func.coalesce(func.sum(SalesHourlyRollup.transaction_count), 0).label("number_of_transactions")
         )
-        .join(User, Sale.user_id == User.id)
-        .where(
-            func.date(Sale.created_at) >= start_date,
-            func.date(Sale.created_at) <= end_date
-        )
-        .group_by(Sale.user_id, User.full_name)
+        .join(User, SalesHourlyRollup.user_id == User.id)
+        .where(*_rollup_filters(SalesHourlyRollup, start_date, end_date, store_id))
+        .group_by(SalesHourlyRollup.user_id, User.full_name)
         .order_by(desc("total_sales_amount"))
     )
     result = await db.execute(stmt)
     return [SalesByUser(**row._mapping) for row in result]
 
 
-async def get_sales_evolution_by_period(db: AsyncSession, start_date: date, end_date: date) -> List[SalesEvolutionItem]:
+async def get_sales_evolution_by_period(db: AsyncSession, start_date: date, end_date: date, *, store_id: Optional[int] = None) -> List[SalesEvolutionItem]:
     """
     Retorna o total de vendas agrupado por dia para um gráfico de evolução.
     """
     stmt = (
         select(
-            func.date(Sale.created_at).label("sale_date"), # Alias diferente para evitar conflito
-            func.coalesce(func.sum(Sale.total_amount), 0.0).label("value")
-        ).where(
-            func.date(Sale.created_at) >= start_date,
-            func.date(Sale.created_at) <= end_date
+            SalesHourlyRollup.sale_date,
+            func.coalesce(func.sum(SalesHourlyRollup.total_amount), 0.0).label("value")
         )
-        .group_by(func.date(Sale.created_at))
-        .order_by(func.date(Sale.created_at))
+        .where(*_rollup_filters(SalesHourlyRollup, start_date, end_date, store_id))
+        .group_by(SalesHourlyRollup.sale_date)
+        .order_by(SalesHourlyRollup.sale_date)
     )
     result = await db.execute(stmt)
 
@@ -148,41 +150,33 @@ async def get_sales_evolution_by_period(db: AsyncSession, start_date: date, end_
 
 # --- INÍCIO DAS NOVAS FUNÇÕES ---
 
-async def get_sales_by_payment_method(db: AsyncSession, start_date: date, end_date: date) -> List[SalesByPaymentMethodItem]:
+async def get_sales_by_payment_method(db: AsyncSession, start_date: date, end_date: date, *, store_id: Optional[int] = None) -> List[SalesByPaymentMethodItem]:
     """ Agrupa o total de vendas e transações por método de pagamento em um período. """
     stmt = (
         select(
-            Payment.payment_method,
-            func.coalesce(func.sum(Payment.amount), 0.0).label("total_amount"),
-            func.coalesce(func.count(Payment.id), 0).label("transaction_count")
-        )
-        # Junta Payment com Sale para poder filtrar pela data da venda
-        .join(Sale, Payment.sale_id == Sale.id)
-        .where(
-            func.date(Sale.created_at) >= start_date,
-            func.date(Sale.created_at) <= end_date
+            SalesPaymentRollup.payment_method,
+            func.coalesce(func.sum(SalesPaymentRollup.total_amount), 0.0).label("total_amount"),
+            func.coalesce(func.sum(SalesPaymentRollup.transaction_count), 0).label("transaction_count")
         )
-        .group_by(Payment.payment_method)
-        .order_by(Payment.payment_method)
+        .where(*_rollup_filters(SalesPaymentRollup, start_date, end_date, store_id))
+        .group_by(SalesPaymentRollup.payment_method)
+        .order_by(SalesPaymentRollup.payment_method)
     )
     result = await db.execute(stmt)
     return [SalesByPaymentMethodItem(**row._mapping) for row in result]
 
 
-async def get_sales_by_hour(db: AsyncSession, start_date: date, end_date: date) -> List[SalesByHourItem]:
+async def get_sales_by_hour(db: AsyncSession, start_date: date, end_date: date, *, store_id: Optional[int] = None) -> List[SalesByHourItem]:
     """ Agrupa o total de vendas e transações por hora do dia em um período. """
     stmt = (
         select(
-            extract('hour', Sale.created_at).label('hour'),
-            func.coalesce(func.sum(Sale.total_amount), 0.0).label('total_amount'),
-            func.coalesce(func.count(Sale.id), 0).label('transaction_count')
+            SalesHourlyRollup.hour,
+            func.coalesce(func.sum(SalesHourlyRollup.total_amount), 0.0).label('total_amount'),
+            func.coalesce(func.sum(SalesHourlyRollup.transaction_count), 0).label('transaction_count')
         )
-        .where(
-            func.date(Sale.created_at) >= start_date,
-            func.date(Sale.created_at) <= end_date
-        )
-        .group_by(extract('hour', Sale.created_at))
-        .order_by(extract('hour', Sale.created_at))
+        .where(*_rollup_filters(SalesHourlyRollup, start_date, end_date, store_id))
+        .group_by(SalesHourlyRollup.hour)
+        .order_by(SalesHourlyRollup.hour)
     )
     result = await db.execute(stmt)
     sales_data = {item.hour: item for item in result.mappings().all()}
@@ -198,22 +192,17 @@ async def get_sales_by_hour(db: AsyncSession, start_date: date, end_date: date)
     return hourly_sales
 
 
-async def get_sales_by_category(db: AsyncSession, start_date: date, end_date: date) -> List[SalesByCategoryItem]:
+async def get_sales_by_category(db: AsyncSession, start_date: date, end_date: date, *, store_id: Optional[int] = None) -> List[SalesByCategoryItem]:
     """ Agrupa o total de vendas e transações por categoria de produto em um período. """
     stmt = (
         select(
             ProductCategory.name.label("category_name"),
-            func.coalesce(func.sum(SaleItem.quantity * SaleItem.price_at_sale), 0.0).label("total_amount"),
-            func.coalesce(func.count(func.distinct(Sale.id)), 0).label("transaction_count") # Conta vendas distintas
-        )
-        .select_from(SaleItem) # Começa a query a partir de SaleItem
-        .join(Sale, SaleItem.sale_id == Sale.id)
-        .join(Product, SaleItem.product_id == Product.id)
-        .join(ProductCategory, Product.category_id == ProductCategory.id) # Junta com Categoria
-        .where(
-            func.date(Sale.created_at) >= start_date,
-            func.date(Sale.created_at) <= end_date
+            func.coalesce(func.sum(SalesCategoryRollup.total_amount), 0.0).label("total_amount"),
+            # Soma das vendas distintas por dia; uma venda pertence a um único dia.
+            func.coalesce(func.sum(SalesCategoryRollup.transaction_count), 0).label("transaction_count")
         )
+        .join(ProductCategory, SalesCategoryRollup.category_id == ProductCategory.id) # Junta com Categoria
+        .where(*_rollup_filters(SalesCategoryRollup, start_date, end_date, store_id))
         .group_by(ProductCategory.name)
         .order_by(ProductCategory.name)
     )
@@ -224,4 +213,4 @@ async def get_sales_by_category(db: AsyncSession, start_date: date, end_date: da
 
 # TODO: Implementar get_low_stock_products, get_top_customers, get_inactive_customers
 # Essas funções podem depender de como você define "top" ou "inativo" e podem
-# precisar de lógica adicional nos models ou schemas.
\ No newline at end of file
+# precisar de lógica adicional nos models ou schemas.
@@ -12,6 +12,7 @@ from app.models.user import User
 from app.models.table import Table # Importa o modelo Table
 from app.schemas.enums import TableStatus # Importa o Enum TableStatus
 from app.schemas.reservation import ReservationCreate, ReservationUpdate
+from app.core.floor_state import floor_state
 
 class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate]):
 
@@ -60,6 +61,8 @@ class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate
         table.status = TableStatus.RESERVED
         db.add(table)
 
+        floor_state.touch(db, table.store_id, [table.id])
+
         # Cria a reserva usando o método da classe base (CRUDBase)
         # O CRUDBase já adiciona o store_id automaticamente baseado no current_user
         db_obj = await super().create(db=db, obj_in=obj_in, current_user=current_user)
@@ -101,6 +104,7 @@ class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate
 
             # Deleta a reserva
             await db.delete(db_obj)
+            floor_state.touch(db, db_obj.store_id, [db_obj.table_id])
             await db.commit()
 
         return db_obj
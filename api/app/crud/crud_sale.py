@@ -2,13 +2,14 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import Session, selectinload, joinedload
-from typing import List, Optional
+from sqlalchemy.orm import selectinload, joinedload
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
 from decimal import Decimal, ROUND_HALF_UP
 from loguru import logger
 
 from app.crud.base import CRUDBase
+from app.crud.crud_product import product_detail_options
 from app.models.sale import Sale, SaleItem as SaleItemModel
 from app.models.payment import Payment
 from app.models.product import Product
@@ -17,9 +18,8 @@ from app.models.user import User
 
 from app.crud.crud_order import get_full_order
 
-from app.services.crm_service import crm_service
-from app.services.stock_service import stock_service
-from app.services.cash_register_service import cash_register_service
+from app.services.post_sale_service import post_sale_service
+from app.services.idempotency_service import idempotency_service
 
 
 async def get_full_sale(db: AsyncSession, *, id: int) -> Optional[Sale]:
@@ -28,7 +28,7 @@ async def get_full_sale(db: AsyncSession, *, id: int) -> Optional[Sale]:
     """
     stmt = select(Sale).where(Sale.id == id).options(
         selectinload(Sale.items).options(
-            joinedload(SaleItemModel.product)
+            joinedload(SaleItemModel.product).options(*product_detail_options())
         ),
         selectinload(Sale.payments),
         selectinload(Sale.customer),
@@ -38,32 +38,20 @@ async def get_full_sale(db: AsyncSession, *, id: int) -> Optional[Sale]:
     return result.scalars().first()
 
 
-def _run_sync_post_sale_services(db_session: Session, *, sale: Sale):
-    """
-    Executa os serviços síncronos de forma segura e atômica.
-    """
-    sync_sale = db_session.merge(sale)
-    
-    cash_register_service.add_sale_transaction(db_session, sale=sync_sale)
-    crm_service.update_customer_stats_from_sale(db_session, sale=sync_sale)
-    stock_service.deduct_stock_from_sale(db_session, sale=sync_sale)
-    
-    db_session.commit()
-
-
 class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
     
     async def get_multi_detailed(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, current_user: User
-    ) -> List[Sale]:
+        self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100, current_user: User
+    ) -> Tuple[List[Sale], Optional[str]]:
         """
-        Busca uma lista de vendas com detalhes do cliente e usuário para a loja atual.
+        Busca uma página de vendas com detalhes do cliente e usuário para a loja atual,
+        da mais recente para a mais antiga, e o cursor da página seguinte.
         """
         stmt = (
             select(self.model)
             .where(self.model.store_id == current_user.store_id)
             .options(
-                selectinload(self.model.items).options(selectinload(SaleItemModel.product)),
+                selectinload(self.model.items).options(selectinload(SaleItemModel.product).options(*product_detail_options())),
                 selectinload(self.model.customer),
                 selectinload(self.model.user),
                 # --- CORREÇÃO PRINCIPAL AQUI ---
@@ -72,14 +60,22 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
                 selectinload(self.model.payments)
                 # --- FIM DA CORREÇÃO ---
             )
-            .order_by(self.model.created_at.desc())
-            .offset(skip)
-            .limit(limit)
         )
-        result = await db.execute(stmt)
-        return result.scalars().all()
+        return await self.paginate(
+            db, stmt, order_by=[self.model.created_at], cursor=cursor, limit=limit, descending=True
+        )
+
+    async def create_with_items(
+        self, db: AsyncSession, *, obj_in: SaleCreate, current_user: User, idempotency_key: Optional[str] = None
+    ) -> Sale:
+        if idempotency_key:
+            request_hash = idempotency_service.request_hash(obj_in)
+            replayed_sale_id = await idempotency_service.find(
+                db, store_id=current_user.store_id, scope="sales", key=idempotency_key, request_hash=request_hash
+            )
+            if replayed_sale_id is not None:
+                return await get_full_sale(db, id=replayed_sale_id)
 
-    async def create_with_items(self, db: AsyncSession, *, obj_in: SaleCreate, current_user: User) -> Sale:
         sale_data = obj_in.model_dump()
         items_data = sale_data.pop("items", [])
         payments_data = sale_data.pop("payments", [])
@@ -107,10 +103,27 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         )
         
         db.add(db_sale)
-        await db.commit()
-        await db.refresh(db_sale)
-
-        await db.run_sync(_run_sync_post_sale_services, sale=db_sale)
+        # A venda e o pós-venda (caixa, CRM, estoque, rollups) são confirmados numa única transação.
+        await db.flush()
+
+        if idempotency_key and not await idempotency_service.claim(
+            db, store_id=current_user.store_id, scope="sales", key=idempotency_key,
+            request_hash=request_hash, sale_id=db_sale.id
+        ):
+            # Uma requisição concorrente com a mesma chave já confirmou a venda.
+            await db.rollback()
+            replayed_sale_id = await idempotency_service.find(
+                db, store_id=current_user.store_id, scope="sales", key=idempotency_key, request_hash=request_hash
+            )
+            if replayed_sale_id is None:
+                # A chave sumiu entre o conflito e a leitura (ex.: removida pela limpeza).
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A requisição com esta chave de idempotência não pôde ser confirmada; tente novamente."
+                )
+            return await get_full_sale(db, id=replayed_sale_id)
+
+        await post_sale_service.process_sale(db, sale=db_sale)
         
         refreshed_sale = await get_full_sale(db, id=db_sale.id)
         
@@ -120,7 +133,7 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         stmt = (
             select(self.model)
             .filter(Sale.customer_id == customer_id, Sale.store_id == current_user.store_id)
-            .options(selectinload(Sale.items).selectinload(SaleItemModel.product))
+            .options(selectinload(Sale.items).selectinload(SaleItemModel.product).options(*product_detail_options()))
             .order_by(Sale.created_at.desc())
         )
         result = await db.execute(stmt)
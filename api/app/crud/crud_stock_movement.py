@@ -0,0 +1,44 @@
+# api/app/crud/crud_stock_movement.py
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.crud.base import CRUDBase
+from app.models.stock_movement import StockMovement
+from app.models.user import User
+
+
+class CRUDStockMovement(CRUDBase[StockMovement, BaseModel, BaseModel]):
+    """ Leitura do livro de movimentações; as escritas passam pelo StockService. """
+
+    async def get_history_page(
+        self,
+        db: AsyncSession,
+        *,
+        current_user: User,
+        product_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[StockMovement], Optional[str]]:
+        """
+        Movimentações de um produto em [start, end), das mais recentes para as mais antigas,
+        paginadas por cursor (created_at, id) sobre o índice (store_id, product_id, created_at, id).
+        """
+        stmt = select(self.model).where(
+            self.model.store_id == current_user.store_id,
+            self.model.product_id == product_id
+        )
+        if start is not None:
+            stmt = stmt.where(self.model.created_at >= start)
+        if end is not None:
+            stmt = stmt.where(self.model.created_at < end)
+        return await self.paginate(
+            db, stmt, order_by=[self.model.created_at], cursor=cursor, limit=limit, descending=True
+        )
+
+stock_movement = CRUDStockMovement(StockMovement)
@@ -1,25 +1,103 @@
 # api/app/crud/crud_table.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from sqlalchemy.future import select
+from sqlalchemy import func, case, cast, Numeric
+from typing import Any, Dict, List, Optional
 
+from app.core.cache import create_result_cache
+from app.core.config import settings
+from app.core.floor_state import floor_state
 from app.crud.base import CRUDBase
+from app.models.order import Order, OrderItem
 from app.models.table import Table
 from app.models.user import User
+from app.schemas.enums import OrderStatus, OrderItemStatus, TableStatus
 from app.schemas.table import TableCreate, TableUpdate, TableLayoutUpdate
+
+# Estado completo do mapa de mesas por (loja, versão): como a chave muda a cada alteração,
+# não há invalidação; tablets consultando a mesma versão compartilham uma única consulta.
+floor_cache = create_result_cache(
+    "floor_plan",
+    maxsize=settings.FLOOR_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FLOOR_CACHE_TTL_SECONDS,
+)
+
 class CRUDTable(CRUDBase[Table, TableCreate, TableUpdate]):
     """
     Operações CRUD para Mesas, herdando a funcionalidade padrão da CRUDBase.
     """
+    async def get_floor(
+        self, db: AsyncSession, *, store_id: int, table_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Mesas da loja (ou apenas `table_ids`) com os dados da comanda aberta, em uma única
+        consulta e já ordenadas: números em ordem numérica primeiro, depois os nomes.
+        """
+        open_orders = (
+            select(
+                Order.table_id,
+                Order.id.label("open_order_id"),
+                Order.created_at.label("open_order_created_at"),
+                func.bool_or(OrderItem.status == OrderItemStatus.READY).label("has_ready_items"),
+            )
+            .join(OrderItem, Order.id == OrderItem.order_id)
+            .where(Order.store_id == store_id, Order.status == OrderStatus.OPEN, Order.table_id.is_not(None))
+            .group_by(Order.table_id, Order.id, Order.created_at)
+            # Uma linha por mesa: a comanda aberta mais recente.
+            .order_by(Order.table_id, Order.created_at.desc())
+            .distinct(Order.table_id)
+            .subquery()
+        )
+
+        is_numeric = Table.number.op("~")("^[0-9]+$")
+        stmt = (
+            select(
+                Table.id, Table.number, Table.status, Table.capacity, Table.shape,
+                Table.pos_x, Table.pos_y, Table.rotation, Table.store_id,
+                open_orders.c.open_order_id, open_orders.c.open_order_created_at, open_orders.c.has_ready_items,
+            )
+            .outerjoin(open_orders, open_orders.c.table_id == Table.id)
+            .where(Table.store_id == store_id)
+            .order_by(case((is_numeric, 0), else_=1), case((is_numeric, cast(Table.number, Numeric))), Table.number)
+        )
+        if table_ids is not None:
+            stmt = stmt.where(Table.id.in_(table_ids))
+
+        floor = []
+        for row in (await db.execute(stmt)).mappings():
+            table = dict(row)
+            if table["status"] != TableStatus.OCCUPIED or table["open_order_id"] is None:
+                table["open_order_id"] = None
+                table["open_order_created_at"] = None
+            table["has_ready_items"] = bool(table["open_order_id"] and table["has_ready_items"])
+            floor.append(table)
+        return floor
+
+    async def create(self, db: AsyncSession, *, obj_in: TableCreate, current_user: User) -> Table:
+        obj_in_data = obj_in.model_dump()
+        if current_user.role != 'super_admin':
+            obj_in_data['store_id'] = current_user.store_id
+        db_obj = Table(**obj_in_data)
+        db.add(db_obj)
+        # O ID da nova mesa é necessário para marcá-la no mapa de mesas na mesma transação.
+        await db.flush()
+        floor_state.touch(db, db_obj.store_id, [db_obj.id])
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
     async def update_layout(self, db: AsyncSession, *, tables_layout: List[TableLayoutUpdate], current_user: User) -> List[Table]:
-        # Esta função já espera a lista corretamente
-        updated_tables = []
-        for table_update in tables_layout:
-            db_table = await self.get(db, id=table_update.id, current_user=current_user)
-            if db_table:
-                updated_table = await self.update(db=db, db_obj=db_table, obj_in=table_update, current_user=current_user)
-                updated_tables.append(updated_table)
-        # Atenção: O commit ocorre dentro de cada chamada self.update.
-        # Se precisar de uma única transação, a lógica precisaria ser ajustada aqui.
-        return updated_tables
+        # Posição e rotação de todas as mesas em uma única transação (ver CRUDBase.update_many).
+        # Só as mesas da loja são marcadas: um ID de mesa já excluída não pode desfazer a exclusão.
+        owned_ids = (await db.execute(
+            select(Table.id).where(
+                Table.id.in_({table_layout.id for table_layout in tables_layout}),
+                Table.store_id == current_user.store_id
+            )
+        )).scalars().all()
+        floor_state.touch(db, current_user.store_id, owned_ids)
+        return await self.update_many(
+            db, objs_in=tables_layout, fields=("pos_x", "pos_y", "rotation"), current_user=current_user
+        )
 
 table = CRUDTable(Table)
\ No newline at end of file
@@ -1,12 +1,27 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import func
-from typing import Optional
+from typing import Any, Dict, Optional, Union
 
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
+from app.core.cache import create_result_cache
+from app.core.config import settings
+
+# Usuários autenticados resolvidos a partir do JWT, por ID. Guarda apenas os valores das colunas
+# (não o objeto ORM), para que cada requisição receba a sua própria instância.
+principal_cache = create_result_cache(
+    "user_principal",
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+# Colunas da tabela (não os atributos do mapper): inspecionar o mapper aqui forçaria a
+# configuração dos relacionamentos antes de todos os modelos serem importados.
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+# Campos cuja alteração incrementa User.token_version (além da senha).
+_TOKEN_REVOKING_FIELDS = ("role", "store_id", "is_active")
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
@@ -43,6 +58,52 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return db_obj
     # --- FIM DA CORREÇÃO ---
 
+    async def get_principal(self, db: AsyncSession, *, id: int, token_version: int) -> Optional[User]:
+        """
+        Usuário para autenticação, servido do cache (TTL curto) quando possível.
+        A chave inclui a versão do token: um token de versão anterior à do usuário não é aceito.
+        A instância retornada não está ligada a nenhuma sessão.
+        """
+        async def load() -> Optional[Dict[str, Any]]:
+            result = await db.execute(select(User).filter(User.id == id))
+            db_user = result.scalars().first()
+            if db_user is None or db_user.token_version != token_version:
+                return None
+            return {key: getattr(db_user, key) for key in _USER_COLUMNS}
+
+        columns = await principal_cache.get_or_set((id, token_version), load)
+        return User(**columns) if columns is not None else None
+
+    def invalidate_principal(self, *, id: int, token_version: int) -> None:
+        principal_cache.invalidate((id, token_version))
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]], current_user: User
+    ) -> User:
+        update_data = dict(obj_in) if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = get_password_hash(password)
+        previous_version = db_obj.token_version
+        # Troca de senha, papel ou loja e desativação revogam os tokens já emitidos.
+        if password or any(
+            field in update_data and update_data[field] != getattr(db_obj, field)
+            for field in _TOKEN_REVOKING_FIELDS
+        ):
+            update_data["token_version"] = previous_version + 1
+        updated_user = await super().update(db, db_obj=db_obj, obj_in=update_data, current_user=current_user)
+        # Neste processo a alteração vale na próxima requisição. Nos demais, tokens novos (nova
+        # versão) nunca usam a entrada antiga, que expira em USER_CACHE_TTL_SECONDS; processos que
+        # ainda não tinham o usuário em cache já recusam o token antigo na primeira consulta.
+        self.invalidate_principal(id=updated_user.id, token_version=previous_version)
+        return updated_user
+
+    async def remove(self, db: AsyncSession, *, id: int, current_user: User) -> Optional[User]:
+        removed_user = await super().remove(db, id=id, current_user=current_user)
+        if removed_user is not None:
+            self.invalidate_principal(id=id, token_version=removed_user.token_version)
+        return removed_user
+
     async def get_count(self, db: AsyncSession) -> int:
         """Retorna o número total de usuários no banco de dados."""
         result = await db.execute(select(func.count()).select_from(User))
@@ -31,6 +31,8 @@ from app.models.stock_movement import StockMovement
 from app.models.variation import Attribute, AttributeOption, ProductVariation, VariationOptionsAssociation
 from app.models.reservation import Reservation
 from app.models.wall import Wall
+from app.models.sales_rollup import SalesHourlyRollup, SalesPaymentRollup, SalesCategoryRollup, SalesProductRollup
+from app.models.idempotency import IdempotencyKey
 # Adicione qualquer outro modelo que você tenha
 
 async def init_db() -> None:
@@ -0,0 +1,32 @@
+# api/app/db/rebuild_sales_rollups.py
+# Uso: python -m app.db.rebuild_sales_rollups [--store-id 1] [--start 2025-01-01] [--end 2025-01-31]
+import argparse
+import asyncio
+import logging
+from datetime import date
+
+# Configuração básica de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from app.db.session import AsyncSessionLocal
+# Importa os modelos para que os relacionamentos sejam resolvidos pelo SQLAlchemy
+from app.models import store, user, customer, product, sale, payment, order, table, sales_rollup
+from app.services.sales_rollup_service import sales_rollup_service
+
+async def rebuild(store_id: int | None, start_date: date | None, end_date: date | None) -> None:
+    logger.info(f"Reconstruindo rollups de vendas (loja={store_id}, início={start_date}, fim={end_date})...")
+    async with AsyncSessionLocal() as db:
+        await sales_rollup_service.rebuild(db, store_id=store_id, start_date=start_date, end_date=end_date)
+    logger.info("Reconstrução dos rollups concluída.")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstrói (backfill) as tabelas de rollup de vendas.")
+    parser.add_argument("--store-id", type=int, default=None, help="Reconstrói apenas esta loja.")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="Data inicial (AAAA-MM-DD), inclusiva.")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Data final (AAAA-MM-DD), inclusiva.")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.store_id, args.start, args.end))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from loguru import logger
 from app.core.config import settings
 
 # Usamos a variável DATABASE_URL do seu config.py
@@ -8,18 +15,179 @@ ASYNC_SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL.replace(
     "postgresql+psycopg2", "postgresql+asyncpg"
 )
 
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool padrão do engine assíncrono, com medição do tempo de espera por conexão.
+    Os contadores ficam no próprio pool e são expostos por `get_pool_stats`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            logger.error(f"Pool de conexões esgotado: {self.status()}")
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if waited * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+                logger.warning(f"Espera de {waited * 1000:.1f}ms por uma conexão do pool ({self.status()}).")
+
+    def recreate(self):
+        # Mantém os contadores quando o pool é recriado (ex: engine.dispose()).
+        new_pool = super().recreate()
+        new_pool.checkouts = self.checkouts
+        new_pool.checkout_timeouts = self.checkout_timeouts
+        new_pool.total_wait_seconds = self.total_wait_seconds
+        new_pool.max_wait_seconds = self.max_wait_seconds
+        return new_pool
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            # Negativo enquanto o pool ainda não abriu todas as conexões base.
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "avg_wait_ms": (self.total_wait_seconds / self.checkouts * 1000) if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+def create_engine_from_settings(url: str):
+    """ Cria um engine assíncrono com as configurações de pool definidas em `Settings`. """
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Cache de prepared statements do asyncpg (0 desativa; necessário atrás do pgbouncer em modo transação).
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+        echo=False
+    )
+
+
 # Criamos o motor de conexão assíncrono
-async_engine = create_async_engine(
-    ASYNC_SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False
-)
+async_engine = create_engine_from_settings(ASYNC_SQLALCHEMY_DATABASE_URL)
 
-# Criamos a fábrica de sessões assíncronas
+# Criamos a fábrica de sessões assíncronas.
+# A AsyncSession só retira uma conexão do pool na primeira consulta e a devolve ao fim
+# de cada transação (commit/rollback) ou ao ser fechada; requisições que não consultam
+# o banco (ex: usuário autenticado servido do cache) não ocupam conexão.
 AsyncSessionLocal = sessionmaker(
     bind=async_engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
-)
\ No newline at end of file
+)
+
+
+# --- Réplica de leitura (opcional) ---
+# Quando READ_REPLICA_DATABASE_URL não está definida, as leituras usam o primário.
+read_engine = (
+    create_engine_from_settings(settings.READ_REPLICA_DATABASE_URL.replace("postgresql+psycopg2", "postgresql+asyncpg"))
+    if settings.READ_REPLICA_DATABASE_URL else None
+)
+
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if read_engine is not None else None
+
+# Em uma réplica: segundos desde a última transação aplicada, ou 0 se já aplicou tudo o que recebeu.
+# Em um primário as funções retornam NULL e o resultado é 0.
+_REPLICA_LAG_SQL = text("""
+    SELECT COALESCE(
+        CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+             ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END, 0)
+""")
+
+
+class ReplicaHealth:
+    """
+    Decide se as leituras podem ir para a réplica. O atraso é medido no máximo uma vez
+    a cada READ_REPLICA_CHECK_INTERVAL_SECONDS; réplica inacessível ou atrasada além de
+    READ_REPLICA_MAX_LAG_SECONDS faz as leituras voltarem ao primário até a próxima verificação.
+    """
+
+    def __init__(self):
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def is_usable(self) -> bool:
+        if read_engine is None:
+            return False
+        if time.monotonic() - self._checked_at < settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+            return self.healthy
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+                await self._check()
+        return self.healthy
+
+    async def _check(self) -> None:
+        was_healthy = self.healthy
+        try:
+            async with read_engine.connect() as conn:
+                self.lag_seconds = float((await conn.execute(_REPLICA_LAG_SQL)).scalar_one())
+            self.healthy = self.lag_seconds <= settings.READ_REPLICA_MAX_LAG_SECONDS
+            if not self.healthy:
+                logger.warning(f"Réplica de leitura com atraso de {self.lag_seconds:.1f}s; leituras voltam ao primário.")
+        except Exception as e:
+            self.lag_seconds = None
+            self.healthy = False
+            logger.error(f"Réplica de leitura indisponível ({e}); leituras voltam ao primário.")
+        else:
+            if self.healthy and not was_healthy:
+                logger.info(f"Réplica de leitura em uso (atraso de {self.lag_seconds:.1f}s).")
+        self._checked_at = time.monotonic()
+
+    def mark_failed(self) -> None:
+        """ Força o uso do primário até a próxima verificação (ex: erro de conexão em uma leitura). """
+        self.healthy = False
+        self._checked_at = time.monotonic()
+
+
+replica_health = ReplicaHealth()
+
+
+async def get_read_sessionmaker() -> sessionmaker:
+    """ Fábrica de sessões para leituras tolerantes a atraso: réplica se utilizável, senão primário. """
+    if await replica_health.is_usable():
+        return ReadSessionLocal
+    return AsyncSessionLocal
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """ Utilização dos pools de conexão, por engine. """
+    stats = {"primary": async_engine.sync_engine.pool.stats()}
+    if read_engine is not None:
+        stats["replica"] = read_engine.sync_engine.pool.stats()
+    return stats
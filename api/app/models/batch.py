@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Float, ForeignKey, DateTime, func, Date
+from sqlalchemy import Integer, Float, ForeignKey, DateTime, Index, func, Date, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 
@@ -7,6 +7,20 @@ from app.db.base import Base
 class ProductBatch(Base):
     """ Modelo para Lotes de Produto com controle de validade. """
     __tablename__ = "product_batches"
+    __table_args__ = (
+        # Só lotes com saldo. Consumo FEFO na venda: lotes do produto por validade (NULLs por último).
+        Index(
+            "ix_product_batches_store_id_product_id_expiration_date",
+            "store_id", "product_id", "expiration_date", "id",
+            postgresql_where=text("quantity > 0")
+        ),
+        # Controle de validade da loja, paginado por cursor (expiration_date, id).
+        Index(
+            "ix_product_batches_store_id_expiration_date_id",
+            "store_id", "expiration_date", "id",
+            postgresql_where=text("quantity > 0")
+        ),
+    )
     store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
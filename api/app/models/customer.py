@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, func, Float, Integer, ForeignKey  # Adicionar Float e Integer
+from sqlalchemy import String, DateTime, func, Float, Integer, ForeignKey, Index  # Adicionar Float e Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List
@@ -7,6 +7,16 @@ from app.db.base import Base
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        # Listagem por loja em ordem alfabética com paginação por cursor (full_name, id).
+        Index("ix_customers_store_id_full_name_id", "store_id", "full_name", "id"),
+        # Ordenações do CRM (maiores compradores, visitas mais recentes) com paginação por cursor.
+        Index("ix_customers_store_id_total_spent_id", "store_id", "total_spent", "id"),
+        Index("ix_customers_store_id_last_seen_id", "store_id", "last_seen", "id"),
+        # A busca textual usa o índice GIN ix_customers_full_name_trgm e a busca por prefixo o
+        # btree ix_customers_store_id_name_prefix, ambos sobre lower(immutable_unaccent(full_name))
+        # e criados apenas pelas migrações (índices de expressão).
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     full_name: Mapped[str] = mapped_column(String(150), nullable=False)
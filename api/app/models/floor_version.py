@@ -0,0 +1,27 @@
+# api/app/models/floor_version.py
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+class FloorVersion(Base):
+    """
+    Versão do mapa de mesas por loja (ver app/core/floor_state.py). Incrementada na mesma
+    transação de toda alteração que muda o que GET /tables devolve, então é a mesma para
+    todos os processos da API.
+    """
+    __tablename__ = "floor_versions"
+
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+class FloorTableChange(Base):
+    """ Versão em que cada mesa mudou (ou foi excluída) pela última vez; base de GET /tables/changes. """
+    __tablename__ = "floor_table_changes"
+
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), primary_key=True)
+    # Sem chave estrangeira: a mesa excluída continua registrada aqui.
+    table_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    removed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
@@ -0,0 +1,27 @@
+# api/app/models/idempotency.py
+from sqlalchemy import String, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    """
+    Chave de idempotência enviada pelo cliente (cabeçalho `Idempotency-Key`) em operações
+    que criam vendas. Guarda a venda resultante para que repetições da mesma requisição
+    devolvam o resultado original sem executar a venda de novo.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("store_id", "scope", "key", name="uq_idempotency_keys_store_scope_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id", ondelete="CASCADE"), nullable=False)
+    # Operação protegida, ex: "sales" ou "orders/15/pay".
+    scope: Mapped[str] = mapped_column(String(100), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    # SHA-256 do corpo da requisição: a mesma chave com outro corpo é rejeitada.
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    sale_id: Mapped[int] = mapped_column(ForeignKey("sales.id", ondelete="CASCADE"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False, index=True)
@@ -0,0 +1,36 @@
+# api/app/models/ingredient_movement.py
+from sqlalchemy import String, Float, DateTime, Index, func, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+
+from app.db.base import Base
+from app.models.stock_movement import MovementType
+
+class IngredientMovement(Base):
+    """
+    Movimentação de estoque de um insumo. As vendas de produtos compostos geram uma linha
+    por insumo consumido (somando todos os itens da venda), com a baixa calculada pela ficha técnica.
+    """
+    __tablename__ = "ingredient_movements"
+    __table_args__ = (
+        # Histórico de um insumo na loja, do mais recente para o mais antigo.
+        Index("ix_ingredient_movements_store_id_ingredient_id_created_at", "store_id", "ingredient_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    ingredient_id: Mapped[int] = mapped_column(ForeignKey("ingredients.id"), nullable=False)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # Venda que originou a baixa (nulo em ajustes e compras).
+    sale_id: Mapped[Optional[int]] = mapped_column(ForeignKey("sales.id", ondelete="SET NULL"), nullable=True)
+
+    # Mesmo tipo do banco usado por stock_movements.
+    movement_type: Mapped[MovementType] = mapped_column(SQLAlchemyEnum(MovementType, name="movementtype", create_type=False), nullable=False)
+    # Quantidade na unidade de medida do insumo. Positivo para entradas, negativo para saídas.
+    quantity: Mapped[float] = mapped_column(Float, nullable=False)
+    # Estoque do insumo *após* a movimentação, para auditoria.
+    stock_after_movement: Mapped[float] = mapped_column(Float, nullable=False)
+    reason: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
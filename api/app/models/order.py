@@ -1,6 +1,6 @@
 # api/app/models/order.py
 from sqlalchemy import (
-    String, Integer, Float, ForeignKey, DateTime, func, Enum as SQLAlchemyEnum
+    String, Integer, Float, ForeignKey, DateTime, func, Index, Enum as SQLAlchemyEnum
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
@@ -18,6 +18,14 @@ from .additional import Additional
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Busca de comandas abertas por loja/mesa (mapa de mesas, POS).
+        Index("ix_orders_store_id_status_table_id", "store_id", "status", "table_id"),
+        # Busca incremental da fila da cozinha (?since=).
+        Index("ix_orders_store_id_updated_at", "store_id", "updated_at"),
+        # Paginação por cursor da listagem de comandas (created_at, id).
+        Index("ix_orders_store_id_created_at_id", "store_id", "created_at", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
@@ -35,6 +43,7 @@ class Order(Base):
     delivery_address: Mapped[Optional[str]] = mapped_column(String(500))
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     closed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
     table_id: Mapped[Optional[int]] = mapped_column(ForeignKey("tables.id"))
     customer_id: Mapped[Optional[int]] = mapped_column(ForeignKey("customers.id"))
@@ -69,6 +78,9 @@ class OrderItem(Base):
         default=OrderItemStatus.PENDING,
     )
 
+    # Atualizado a cada alteração (status, quantidade); base da busca incremental da cozinha.
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
 
@@ -77,4 +89,32 @@ class OrderItem(Base):
     additionals: Mapped[List["Additional"]] = relationship(
         secondary="order_item_additionals",
         lazy="selectin"
-    )
\ No newline at end of file
+    )
+
+
+# Fila da cozinha: índice parcial apenas com os itens ainda não prontos (pequeno, mesmo com
+# o histórico de comandas crescendo).
+Index(
+    "ix_order_items_kitchen_queue",
+    OrderItem.order_id,
+    postgresql_where=OrderItem.status.in_([OrderItemStatus.PENDING, OrderItemStatus.PREPARING]),
+)
+
+
+class OrderItemRemoval(Base):
+    """
+    Registro de um item removido de uma comanda (quantidade zerada). A linha do item é apagada;
+    este registro leva a remoção às telas da cozinha na busca incremental (?since=).
+    Registros mais antigos que KITCHEN_REMOVAL_RETENTION_HOURS são descartados.
+    """
+    __tablename__ = "order_item_removals"
+    __table_args__ = (
+        Index("ix_order_item_removals_store_id_removed_at", "store_id", "removed_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    # Sem chave estrangeira: o item já não existe.
+    order_item_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    removed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
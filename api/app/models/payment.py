@@ -13,7 +13,7 @@ class Payment(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
     order_id: Mapped[Optional[int]] = mapped_column(ForeignKey('orders.id'))
-    sale_id: Mapped[Optional[int]] = mapped_column(ForeignKey('sales.id'))
+    sale_id: Mapped[Optional[int]] = mapped_column(ForeignKey('sales.id'), index=True)
 
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     payment_method: Mapped[str] = mapped_column(String, nullable=False)
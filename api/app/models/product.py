@@ -1,5 +1,5 @@
 # /api/app/models/product.py
-from sqlalchemy import String, Float, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import String, Float, Integer, DateTime, func, ForeignKey, Index, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List, Optional
@@ -21,6 +21,12 @@ class ProductType(str, enum.Enum):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Listagem por loja em ordem alfabética com paginação por cursor (name, id).
+        Index("ix_products_store_id_name_id", "store_id", "name", "id"),
+        # A busca textual usa o índice GIN ix_products_name_trgm sobre
+        # lower(immutable_unaccent(name)), criado apenas pela migração (índice de expressão).
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
@@ -1,10 +1,14 @@
-from sqlalchemy import Integer, Float, ForeignKey
+from sqlalchemy import Integer, Float, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 class RecipeItem(Base):
     __tablename__ = "recipe_items"
+    __table_args__ = (
+        # Grafo de receitas da loja (recipe_service).
+        Index("ix_recipe_items_store_id_product_id", "store_id", "product_id"),
+    )
     store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
 
     id: Mapped[int] = mapped_column(primary_key=True)
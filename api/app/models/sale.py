@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Float, DateTime, String, func, ForeignKey
+from sqlalchemy import Integer, Float, DateTime, String, func, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List, Optional
@@ -12,6 +12,11 @@ from .payment import Payment # Importação do modelo Payment
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Filtros por loja + intervalo semiaberto de created_at (relatórios, histórico, rollups)
+        # e paginação por cursor do histórico de vendas (created_at, id).
+        Index("ix_sales_store_id_created_at_id", "store_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     total_amount: Mapped[float] = mapped_column(Float, nullable=False)
@@ -39,6 +44,9 @@ class Sale(Base):
 
 class SaleItem(Base):
     __tablename__ = "sale_items"
+    __table_args__ = (
+        Index("ix_sale_items_sale_id_product_id", "sale_id", "product_id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
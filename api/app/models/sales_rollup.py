@@ -0,0 +1,74 @@
+# api/app/models/sales_rollup.py
+from sqlalchemy import Integer, Float, String, Date, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+
+from app.db.base import Base
+
+# Tabelas de agregação (rollup) das vendas. São mantidas de forma incremental a cada
+# venda confirmada (ver app/services/sales_rollup_service.py) e podem ser reconstruídas
+# a qualquer momento com `python -m app.db.rebuild_sales_rollups`.
+# Cada tabela tem a sua própria granularidade para que as contagens de transações
+# não sejam duplicadas quando uma venda tem vários pagamentos ou categorias.
+
+class SalesHourlyRollup(Base):
+    """ Vendas agregadas por loja x dia x hora x usuário. """
+    __tablename__ = "sales_hourly_rollups"
+    __table_args__ = (
+        UniqueConstraint("store_id", "sale_date", "hour", "user_id", name="uq_sales_hourly_rollups_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    sale_date: Mapped[date] = mapped_column(Date, nullable=False)
+    hour: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    transaction_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+class SalesPaymentRollup(Base):
+    """ Pagamentos agregados por loja x dia x método de pagamento. """
+    __tablename__ = "sales_payment_rollups"
+    __table_args__ = (
+        UniqueConstraint("store_id", "sale_date", "payment_method", name="uq_sales_payment_rollups_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    sale_date: Mapped[date] = mapped_column(Date, nullable=False)
+    payment_method: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    transaction_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+class SalesCategoryRollup(Base):
+    """ Itens vendidos agregados por loja x dia x categoria (categoria no momento da venda). """
+    __tablename__ = "sales_category_rollups"
+    __table_args__ = (
+        UniqueConstraint("store_id", "sale_date", "category_id", name="uq_sales_category_rollups_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    sale_date: Mapped[date] = mapped_column(Date, nullable=False)
+    category_id: Mapped[int] = mapped_column(ForeignKey("product_categories.id", ondelete="CASCADE"), nullable=False)
+
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    # Número de vendas distintas que contêm ao menos um item da categoria.
+    transaction_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+class SalesProductRollup(Base):
+    """ Itens vendidos agregados por loja x dia x produto (usado nos rankings de produtos). """
+    __tablename__ = "sales_product_rollups"
+    __table_args__ = (
+        UniqueConstraint("store_id", "sale_date", "product_id", name="uq_sales_product_rollups_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    sale_date: Mapped[date] = mapped_column(Date, nullable=False)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+
+    quantity_sold: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    total_revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import String, Integer, DateTime, Index, func, ForeignKey, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 import enum
@@ -13,6 +13,12 @@ class MovementType(str, enum.Enum):
 
 class StockMovement(Base):
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Trechos do livro por período (fechamentos diários, estoque em uma data, resumos).
+        Index("ix_stock_movements_store_id_created_at", "store_id", "created_at"),
+        # Histórico de um produto, paginado por cursor (created_at, id).
+        Index("ix_stock_movements_store_id_product_id_created_at_id", "store_id", "product_id", "created_at", "id"),
+    )
     store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
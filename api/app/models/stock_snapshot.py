@@ -0,0 +1,31 @@
+# api/app/models/stock_snapshot.py
+from sqlalchemy import Integer, Date, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date, datetime
+
+from app.db.base import Base
+
+class StockSnapshot(Base):
+    """
+    Fechamento diário do estoque por loja x dia x produto (ver app/services/stock_snapshot_service.py).
+    `stock` é o estoque ao fim do dia; as demais colunas somam as movimentações do dia por tipo
+    (negativas para saídas). Consultas de estoque em uma data e resumos de período partem do
+    fechamento mais próximo e leem do livro de movimentações apenas o trecho que falta.
+    """
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        UniqueConstraint("store_id", "snapshot_date", "product_id", name="uq_stock_snapshots_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    snapshot_date: Mapped[date] = mapped_column(Date, nullable=False)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
+    sales: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    purchases: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    adjustments: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    returns: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, func, Boolean, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import String, DateTime, func, Boolean, ForeignKey, Integer, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List, Optional # Adicionar Optional
@@ -16,6 +16,9 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[UserRole] = mapped_column(SQLAlchemyEnum(UserRole), default=UserRole.CASHIER, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Versão dos tokens emitidos (claim "ver" do JWT). Incrementada ao trocar a senha, o papel,
+    # a loja ou ao desativar o usuário: tokens com versão anterior deixam de ser aceitos.
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     # --- INÍCIO DA CORREÇÃO ---
     # Tornamos o store_id opcional (nullable=True) para permitir a existência de Super Admins
@@ -24,4 +24,15 @@ class ProductBatch(ProductBatchBase):
     product: Optional[ProductInfo] = None # <-- Relacionamento para exibir o nome
 
     # Substitui a 'class Config' obsoleta pela nova sintaxe do Pydantic V2
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProductBatchExpiring(BaseModel):
+    """ Linha enxuta do controle de validade: lote com saldo e o nome do produto. """
+    id: int
+    product_id: int
+    product_name: str
+    quantity: float
+    expiration_date: date
+
+    model_config = ConfigDict(from_attributes=True)
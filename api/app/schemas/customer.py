@@ -1,4 +1,4 @@
-from pydantic import Field, EmailStr, validator
+from pydantic import BaseModel, Field, EmailStr, validator
 from typing import Optional
 from datetime import datetime
 
@@ -70,4 +70,19 @@ class Customer(CustomerBase):
     # --- FIM DA ATUALIZAÇÃO ---
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# =====================================================================================
+# Schema para Resultado de Busca de Cliente
+# =====================================================================================
+class CustomerSearchResult(BaseModel):
+    """Resultado enxuto de GET /customers/search."""
+    id: int
+    full_name: str
+    phone_number: Optional[str] = None
+    email: Optional[str] = None
+    document_number: Optional[str] = None
+    # Relevância de 0 a 1 (None quando a busca por trigramas não está disponível).
+    score: Optional[float] = None
+    # Nome com o trecho encontrado entre <mark> e </mark> (demais caracteres escapados para HTML).
+    highlight: Optional[str] = None
@@ -53,4 +53,17 @@ class OrderItemStatus(str, Enum):
     PENDING = "pending"
     PREPARING = "preparing"
     READY = "ready"
-    DELIVERED = "delivered"
\ No newline at end of file
+    DELIVERED = "delivered"
+
+class CustomerSortField(str, enum.Enum):
+    """ Ordenações da listagem de clientes (CRM). """
+    FULL_NAME = "full_name"      # A-Z
+    TOTAL_SPENT = "total_spent"  # maiores compradores primeiro
+    LAST_SEEN = "last_seen"      # visitas mais recentes primeiro
+
+class ReportJobStatus(str, enum.Enum):
+    """ Situação de um job de geração de relatório PDF. """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
@@ -69,6 +69,48 @@ class OrderItemStatusUpdate(BaseModel):
     """Schema para atualizar o status de um item de pedido (usado pelo KDS)."""
     status: OrderItemStatus
 
+class OrderItemsStatusUpdate(BaseModel):
+    """Schema para atualizar o status de vários itens de uma vez (ex: 'Marcar tudo como pronto')."""
+    item_ids: List[int] = Field(..., min_length=1)
+    status: OrderItemStatus
+
+class OrderItemStatusChange(BaseModel):
+    """Item cujo status foi alterado."""
+    id: int
+    order_id: int
+    status: OrderItemStatus
+
+class KitchenItem(BaseModel):
+    id: int
+    product_id: int
+    product_name: str
+    quantity: int
+    notes: Optional[str] = None
+    status: OrderItemStatus
+    updated_at: datetime
+
+class KitchenTicket(BaseModel):
+    """Uma comanda na fila da cozinha, apenas com os campos usados pelo KDS."""
+    id: int
+    status: OrderStatus
+    order_type: OrderType
+    table_id: Optional[int] = None
+    table_number: Optional[str] = None
+    created_at: datetime
+    items: List[KitchenItem] = []
+    # Apenas na busca incremental: itens removidos da comanda desde o cursor.
+    removed_item_ids: List[int] = []
+
+class KitchenQueue(BaseModel):
+    """
+    Fila da cozinha. Sem `since`, traz os itens pendentes/em preparo das comandas abertas.
+    Com `since`, traz apenas as comandas e itens alterados desde o cursor (incluindo os que
+    saíram da fila: itens prontos, itens removidos e comandas que não estão mais abertas).
+    """
+    cursor: str = Field(..., description="Cursor opaco para a próxima busca incremental.")
+    full: bool = Field(True, description="Fila completa: o cliente substitui o estado em vez de mesclar.")
+    orders: List[KitchenTicket]
+
 class OrderTransfer(BaseModel):
     """Schema para a requisição de transferência de uma comanda para outra mesa."""
     target_table_id: int
@@ -1,5 +1,5 @@
 # api/app/schemas/product.py
-from pydantic import Field, validator, ConfigDict
+from pydantic import BaseModel, Field, validator, ConfigDict
 from typing import Optional, List
 from datetime import datetime
 import enum # Import enum
@@ -78,4 +78,26 @@ class Product(ProductBase):
     variations: List[ProductVariation] = []
     # recipe_items: List[RecipeItemSchema] = [] # Adicionar se/quando implementar receitas
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# =====================================================================================
+# Schema enxuto para a grade do POS (GET /products/catalog)
+# =====================================================================================
+class ProductCatalogItem(BaseModel):
+    id: int
+    name: str
+    price: float
+    stock: int
+    barcode: Optional[str] = None
+    image_url: Optional[str] = None
+    category_id: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProductSearchResult(ProductCatalogItem):
+    """ Resultado de GET /products/search. """
+    # Relevância de 0 a 1 (None quando a busca por trigramas não está disponível).
+    score: Optional[float] = None
+    # Nome com o trecho encontrado entre <mark> e </mark> (demais caracteres escapados para HTML).
+    highlight: Optional[str] = None
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
-from datetime import date
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.schemas.enums import ReportJobStatus
 
 class SalesByPeriod(BaseModel):
     """ Relatório de vendas totais em um período. """
@@ -22,6 +24,10 @@ class PurchaseSuggestion(BaseModel):
     current_stock: int
     low_stock_threshold: int
     sales_last_30_days: int
+    average_daily_demand: Optional[float] = None
+    forecast_daily_demand: Optional[float] = None
+    days_of_cover: Optional[float] = None  # None quando não há demanda prevista
+    reorder_point: Optional[float] = None
     suggested_purchase_quantity: int
     
 class SalesByUser(BaseModel):
@@ -72,4 +78,15 @@ class InactiveCustomerItem(BaseModel):
     customer_id: int
     customer_name: str
     last_seen: date
-    
\ No newline at end of file
+    
+
+class ReportJob(BaseModel):
+    """ Situação de um job de relatório PDF; o arquivo fica em `download_url` quando `status` é "done". """
+    job_id: str
+    status: ReportJobStatus
+    start_date: date
+    end_date: date
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
@@ -1,6 +1,63 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import List, Optional
+
+from app.models.stock_movement import MovementType
 
 class StockAdjustment(BaseModel):
     new_stock_level: int = Field(..., ge=0, description="A nova quantidade total em estoque para o produto.")
-    reason: str = Field(..., min_length=5, max_length=255, description="A justificativa para o ajuste de estoque.")
\ No newline at end of file
+    reason: str = Field(..., min_length=5, max_length=255, description="A justificativa para o ajuste de estoque.")
+
+
+class StockAsOfItem(BaseModel):
+    """ Estoque de um produto em uma data/hora (GET /stock/as-of). """
+    product_id: int
+    product_name: str
+    stock: int
+
+
+class StockSummaryItem(BaseModel):
+    """ Resumo de um produto no período (GET /stock/summary). Saídas são negativas. """
+    product_id: int
+    product_name: str
+    opening_stock: int
+    sales: int
+    purchases: int
+    adjustments: int
+    returns: int
+    closing_stock: int
+
+
+class StockMovementItem(BaseModel):
+    """ Linha do histórico de movimentações de um produto. """
+    id: int
+    product_id: int
+    user_id: Optional[int] = None
+    movement_type: MovementType
+    quantity: int
+    stock_after_movement: int
+    reason: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class InventoryCountDiff(BaseModel):
+    """ Produto cujo estoque difere da quantidade contada. """
+    product_id: int
+    product_name: str
+    barcode: Optional[str] = None
+    previous_stock: int
+    counted_stock: int
+    delta: int
+
+
+class InventoryCountReport(BaseModel):
+    """ Relatório de diferenças de uma contagem de inventário (POST /stock/inventory-counts). """
+    dry_run: bool
+    lines: int
+    products_counted: int
+    products_changed: int
+    total_delta: int
+    not_found: List[str]
+    items: List[InventoryCountDiff]
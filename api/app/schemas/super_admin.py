@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from .dashboard import DashboardKPIs # Reutilizamos o schema de KPIs
 
 class TopStore(BaseModel):
@@ -10,4 +10,25 @@ class GlobalDashboardSummary(BaseModel):
     """Schema para o dashboard consolidado do Super Admin."""
     global_kpis_today: DashboardKPIs
     global_kpis_last_7_days: DashboardKPIs
-    top_5_stores_by_revenue_last_7_days: List[TopStore]
\ No newline at end of file
+    top_5_stores_by_revenue_last_7_days: List[TopStore]
+
+class CacheStats(BaseModel):
+    """Contadores de um cache de resultados da aplicação."""
+    name: str
+    hits: int
+    misses: int
+    invalidations: int
+    hit_ratio: float
+    size: Optional[int] = None
+
+class PoolStats(BaseModel):
+    """Utilização de um pool de conexões com o banco."""
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    checkout_timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
@@ -48,4 +48,13 @@ class TableLayoutUpdate(BaseModel):
     rotation: Optional[int] = None
 
 class TableLayoutUpdateRequest(BaseModel):
-    tables: List[TableLayoutUpdate]
\ No newline at end of file
+    tables: List[TableLayoutUpdate]
+
+class FloorPlanChanges(BaseModel):
+    """ Resposta de GET /tables/changes: mesas alteradas desde `since_version`. """
+    version: str
+    # True quando `since_version` não pôde ser usado (ausente, inválido ou posterior à versão atual):
+    # `tables` contém o mapa completo e substitui o estado do cliente.
+    full: bool
+    tables: List[Table]
+    removed_ids: List[int] = []
@@ -1,66 +1,245 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case
-from datetime import datetime, timedelta
+# api/app/services/analytics_service.py
+import asyncio
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Sequence
 
+import numpy as np
+from sqlalchemy import Date, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from loguru import logger
+
+from app.core.cache import create_result_cache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, get_read_sessionmaker
 from app.models.product import Product
-from app.models.sale import Sale, SaleItem
+# A matriz de vendas diárias vem do rollup por produto, mantido a cada venda confirmada.
+from app.models.sales_rollup import SalesProductRollup
+
+# Previsões de demanda por loja. Dependem só das vendas de dias encerrados: são recalculadas
+# de madrugada (run_nightly_refresh) e o TTL apenas garante que não sobrevivam à virada do dia.
+forecast_cache = create_result_cache(
+    "demand_forecast",
+    maxsize=settings.FORECAST_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FORECAST_CACHE_TTL_SECONDS
+)
+
+
+@dataclass
+class DemandForecast:
+    """ Demanda diária prevista dos produtos de uma loja (arrays alinhados por produto). """
+    product_ids: np.ndarray       # ordenados, para busca com searchsorted
+    moving_average: np.ndarray    # média móvel dos últimos FORECAST_MOVING_AVERAGE_DAYS
+    smoothed: np.ndarray          # suavização exponencial simples sobre todo o histórico
+    std: np.ndarray               # desvio padrão diário na janela da média móvel
+    sales_last_30_days: np.ndarray
+    history_end: date             # último dia (encerrado) considerado
+
+
+def _build_forecast(
+    product_ids: Sequence[int], row_ids: Sequence[int], day_index: Sequence[int], quantities: Sequence[float],
+    start: date, days: int
+) -> DemandForecast:
+    """
+    Executado no pool de threads: monta a matriz produtos x dias e calcula as previsões.
+    As linhas do rollup chegam como colunas (produto, dia desde `start`, quantidade).
+    """
+    ids = np.sort(np.asarray(product_ids, dtype=np.int64))
+    matrix = np.zeros((len(ids), days), dtype=np.float64)
+    if len(row_ids) and len(ids):
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        day_index = np.asarray(day_index, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        product_index = np.searchsorted(ids, row_ids)
+        # Linhas de produtos excluídos desde então não têm posição na matriz.
+        known = (product_index < len(ids)) & (ids[np.minimum(product_index, len(ids) - 1)] == row_ids)
+        cells = product_index[known] * days + day_index[known]
+        matrix = np.bincount(cells, weights=quantities[known], minlength=len(ids) * days).reshape(len(ids), days)
+
+    window = matrix[:, -settings.FORECAST_MOVING_AVERAGE_DAYS:]
+    alpha = settings.FORECAST_SMOOTHING_ALPHA
+    # Nível da suavização exponencial em forma fechada: pesos alpha * (1 - alpha)^idade,
+    # com o peso restante no primeiro dia (valor inicial da série).
+    weights = alpha * (1.0 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1.0 - alpha) ** (days - 1)
+    return DemandForecast(
+        product_ids=ids,
+        moving_average=window.mean(axis=1),
+        smoothed=matrix @ weights,
+        std=window.std(axis=1),
+        sales_last_30_days=matrix[:, -30:].sum(axis=1),
+        history_end=start + timedelta(days=days - 1),
+    )
+
+
+def _score(
+    forecast: DemandForecast, product_ids: Sequence[int], names: Sequence[str],
+    stock: Sequence[int], threshold: Sequence[int]
+) -> List[Dict[str, Any]]:
+    """
+    Executado no pool de threads: cruza a previsão com o estoque atual e calcula cobertura,
+    ponto de pedido e quantidade sugerida, devolvendo só os produtos que precisam de compra.
+    Os produtos chegam como colunas alinhadas (id, nome, estoque, estoque mínimo).
+    """
+    if not len(product_ids):
+        return []
+    ids = np.asarray(product_ids, dtype=np.int64)
+    stock = np.asarray(stock, dtype=np.float64)
+    threshold = np.asarray(threshold, dtype=np.float64)
+
+    # Produtos cadastrados depois da previsão ficam com demanda zero.
+    known = np.zeros(len(ids), dtype=bool)
+    clipped = np.zeros(len(ids), dtype=np.int64)
+    if len(forecast.product_ids):
+        position = np.searchsorted(forecast.product_ids, ids)
+        clipped = np.minimum(position, len(forecast.product_ids) - 1)
+        known = (position < len(forecast.product_ids)) & (forecast.product_ids[clipped] == ids)
+
+    def aligned(values: np.ndarray) -> np.ndarray:
+        result = np.zeros(len(ids), dtype=np.float64)
+        result[known] = values[clipped[known]]
+        return result
+
+    moving_average, smoothed, std, sold_30 = (
+        aligned(forecast.moving_average), aligned(forecast.smoothed),
+        aligned(forecast.std), aligned(forecast.sales_last_30_days)
+    )
+    # Demanda prevista: a suavização reage a mudanças recentes; a média móvel evita que um
+    # dia atípico zere a previsão de um produto com vendas regulares.
+    demand = np.maximum(smoothed, 0.5 * moving_average)
+    lead_time = settings.FORECAST_LEAD_TIME_DAYS
+    safety_stock = settings.FORECAST_SAFETY_FACTOR * std * math.sqrt(lead_time)
+    reorder_point = demand * lead_time + safety_stock
+    target_stock = demand * (lead_time + settings.FORECAST_REVIEW_PERIOD_DAYS) + safety_stock
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(demand > 0, stock / demand, np.inf)
+
+    needs_purchase = (stock <= reorder_point) & (demand > 0) | (stock < threshold)
+    suggested = np.ceil(np.maximum(np.maximum(target_stock, threshold) - stock, 0.0))
+    selected = np.flatnonzero(needs_purchase & (suggested > 0))
+    # Menor cobertura primeiro.
+    selected = selected[np.argsort(days_of_cover[selected], kind="stable")]
+
+    # Valores convertidos para tipos do Python de uma vez, só para os produtos selecionados.
+    columns = zip(
+        ids[selected].tolist(), stock[selected].tolist(), threshold[selected].tolist(), sold_30[selected].tolist(),
+        moving_average[selected].tolist(), demand[selected].tolist(), days_of_cover[selected].tolist(),
+        reorder_point[selected].tolist(), suggested[selected].tolist(), selected.tolist()
+    )
+    return [
+        {
+            "product_id": product_id,
+            "product_name": names[i],
+            "current_stock": int(current),
+            "low_stock_threshold": int(minimum),
+            "sales_last_30_days": int(sold),
+            "average_daily_demand": round(average, 3),
+            "forecast_daily_demand": round(forecast_demand, 3),
+            "days_of_cover": round(cover, 1) if math.isfinite(cover) else None,
+            "reorder_point": round(reorder, 1),
+            "suggested_purchase_quantity": int(quantity),
+        }
+        for product_id, current, minimum, sold, average, forecast_demand, cover, reorder, quantity, i in columns
+    ]
+
 
 class AnalyticsService:
-    def get_purchase_suggestions(self, db: Session) -> list[dict]:
-        """
-        Gera uma lista de sugestões de compra para produtos com estoque baixo.
+    """
+    Sugestões de compra por loja a partir da previsão de demanda.
 
-        A lógica é a seguinte:
-        1. Encontra todos os produtos cujo `stock` está abaixo do `low_stock_threshold`.
-        2. Para cada um desses produtos, calcula a quantidade vendida nos últimos 30 dias.
-        3. A quantidade sugerida para compra é a quantidade vendida nos últimos 30 dias,
-           com um mínimo de 10 unidades para garantir um estoque de segurança.
-        """
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    A previsão usa as vendas diárias dos últimos FORECAST_HISTORY_DAYS dias encerrados
+    (matriz produtos x dias lida do rollup em uma consulta) e é calculada com NumPy em um
+    pool de threads, fora do event loop. Fica em cache por loja e é recalculada de madrugada;
+    cada consulta cruza a previsão com o estoque atual.
+    """
+
+    async def _load_forecast(self, store_id: int) -> DemandForecast:
+        # Sessão própria (réplica, quando disponível): o cálculo é compartilhado pelo cache entre
+        # as requisições que chegam enquanto ele roda e não pode depender da sessão de uma delas.
+        session_factory = await get_read_sessionmaker()
+        async with session_factory() as db:
+            return await self._build_forecast(db, store_id)
 
-        # Subquery para calcular as vendas de cada produto nos últimos 30 dias
-        sales_subquery = (
-            db.query(
-                SaleItem.product_id,
-                func.sum(SaleItem.quantity).label("sales_last_30_days")
+    async def _build_forecast(self, db: AsyncSession, store_id: int) -> DemandForecast:
+        days = settings.FORECAST_HISTORY_DAYS
+        history_end = date.today() - timedelta(days=1)
+        start = history_end - timedelta(days=days - 1)
+        # Colunas agregadas em arrays: uma linha por consulta em vez de uma por produto/dia.
+        product_ids = (await db.execute(
+            select(func.array_agg(Product.id)).where(Product.store_id == store_id)
+        )).scalar() or []
+        row_ids, day_index, quantities = (await db.execute(
+            select(
+                func.array_agg(SalesProductRollup.product_id),
+                func.array_agg(SalesProductRollup.sale_date - literal(start, Date)),
+                func.array_agg(SalesProductRollup.quantity_sold)
             )
-            .join(Sale)
-            .filter(Sale.created_at >= thirty_days_ago)
-            .group_by(SaleItem.product_id)
-            .subquery()
+            .where(
+                SalesProductRollup.store_id == store_id,
+                SalesProductRollup.sale_date >= start,
+                SalesProductRollup.sale_date <= history_end
+            )
+        )).one()
+        started = datetime.now()
+        forecast = await asyncio.get_running_loop().run_in_executor(
+            None, _build_forecast, product_ids, row_ids or [], day_index or [], quantities or [], start, days
+        )
+        logger.info(
+            f"Previsão de demanda da loja {store_id}: {len(product_ids)} produto(s) x {days} dia(s) "
+            f"em {(datetime.now() - started).total_seconds() * 1000:.0f}ms."
         )
+        return forecast
+
+    async def get_forecast(self, *, store_id: int) -> DemandForecast:
+        forecast = await forecast_cache.get_or_set(("forecast", store_id), lambda: self._load_forecast(store_id))
+        if forecast.history_end < date.today() - timedelta(days=1):
+            # Previsão de ontem que o refresh noturno ainda não substituiu.
+            forecast_cache.invalidate(("forecast", store_id))
+            forecast = await forecast_cache.get_or_set(("forecast", store_id), lambda: self._load_forecast(store_id))
+        return forecast
 
-        # Query principal que junta os produtos com a subquery de vendas
-        suggestions_query = (
-            db.query(
-                Product.id,
-                Product.name,
-                Product.stock,
-                Product.low_stock_threshold,
-                # Usa a subquery, tratando casos onde não houve vendas recentes
-                func.coalesce(sales_subquery.c.sales_last_30_days, 0).label("sales_last_30_days")
+    async def get_purchase_suggestions(self, db: AsyncSession, *, store_id: int) -> List[Dict[str, Any]]:
+        """
+        Produtos da loja que precisam de compra, do que acaba primeiro para o último.
+
+        Para cada produto: demanda diária prevista, dias de cobertura do estoque atual, ponto
+        de pedido (demanda no prazo de entrega + estoque de segurança) e quantidade sugerida
+        para cobrir o prazo de entrega e o período de revisão, respeitando o estoque mínimo.
+        """
+        forecast = await self.get_forecast(store_id=store_id)
+        product_ids, names, stock, threshold = (await db.execute(
+            select(
+                func.array_agg(Product.id), func.array_agg(Product.name),
+                func.array_agg(Product.stock), func.array_agg(Product.low_stock_threshold)
             )
-            .outerjoin(sales_subquery, Product.id == sales_subquery.c.product_id)
-            .filter(Product.stock < Product.low_stock_threshold)
-            .order_by(Product.name)
-            .all()
-        )
+            .where(Product.store_id == store_id)
+        )).one()
+        if not product_ids:
+            return []
+        return await asyncio.get_running_loop().run_in_executor(None, _score, forecast, product_ids, names, stock, threshold)
 
-        suggestions = []
-        for product in suggestions_query:
-            # Lógica para a quantidade sugerida
-            suggested_quantity = max(product.sales_last_30_days, 10)
-            
-            suggestions.append({
-                "product_id": product.id,
-                "product_name": product.name,
-                "current_stock": product.stock,
-                "low_stock_threshold": product.low_stock_threshold,
-                "sales_last_30_days": product.sales_last_30_days,
-                "suggested_purchase_quantity": int(suggested_quantity)
-            })
-            
-        return suggestions
+    async def run_nightly_refresh(self) -> None:
+        """
+        Tarefa de fundo iniciada com a aplicação: a cada madrugada (FORECAST_REFRESH_HOUR)
+        recalcula as previsões de todas as lojas com produtos.
+        """
+        while True:
+            now = datetime.now()
+            next_run = now.replace(hour=settings.FORECAST_REFRESH_HOUR, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            try:
+                async with AsyncSessionLocal() as db:
+                    store_ids = (await db.execute(select(Product.store_id).distinct())).scalars().all()
+                for store_id in store_ids:
+                    forecast_cache.invalidate(("forecast", store_id))
+                    await self.get_forecast(store_id=store_id)
+                logger.info(f"Previsões de demanda recalculadas para {len(store_ids)} loja(s).")
+            except Exception as e:
+                logger.error(f"Falha ao recalcular as previsões de demanda: {e}")
 
 # Instância única do serviço
-analytics_service = AnalyticsService()
\ No newline at end of file
+analytics_service = AnalyticsService()
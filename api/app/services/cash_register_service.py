@@ -1,7 +1,9 @@
 # api/app/services/cash_register_service.py
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, insert, values, column, literal, Float, String, Integer
 from fastapi import HTTPException, status
 from loguru import logger
 from datetime import datetime
@@ -53,25 +55,55 @@ class CashRegisterService:
         
         return cash_register_obj
 
-    def add_sale_transaction(self, db: Session, *, sale: Sale) -> None:
+    async def add_sale_transaction(self, db: AsyncSession, *, sale: Sale) -> None:
         """
-        Registra os pagamentos de uma venda como transações no caixa aberto.
+        Registra os pagamentos de uma venda como transações no caixa aberto da loja.
+
+        O caixa aberto é resolvido dentro do próprio INSERT ... SELECT (sem uma consulta
+        separada) e todas as transações são inseridas num único comando. Se nenhuma linha
+        for inserida, não há caixa aberto e a operação falha (o chamador faz o rollback).
         """
-        open_register = self.get_open_register(db, store_id=sale.store_id)
+        if not sale.payments:
+            return
+
+        payment_rows = values(
+            column("amount", Float), column("description", String), name="sale_payments"
+        ).data([
+            (payment.amount, f"Pagamento da Venda #{sale.id} via {getattr(payment.payment_method, 'value', payment.payment_method)}")
+            for payment in sale.payments
+        ])
+        open_register_id = (
+            select(CashRegister.id)
+            .where(CashRegister.store_id == sale.store_id, CashRegister.status == CashRegisterStatus.OPEN)
+            .order_by(CashRegister.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        transaction_type = literal(TransactionType.SALE_PAYMENT, type_=CashRegisterTransaction.__table__.c.transaction_type.type)
 
-        for payment in sale.payments:
-            transaction = CashRegisterTransaction(
-                cash_register_id=open_register.id,
-                sale_id=sale.id,
-                transaction_type=TransactionType.SALE_PAYMENT,
-                amount=payment.amount,
-                description=f"Pagamento da Venda #{sale.id} via {payment.payment_method}"
+        stmt = (
+            insert(CashRegisterTransaction)
+            .from_select(
+                ["cash_register_id", "sale_id", "transaction_type", "amount", "description"],
+                select(
+                    open_register_id,
+                    literal(sale.id, type_=Integer),
+                    transaction_type,
+                    payment_rows.c.amount,
+                    payment_rows.c.description
+                ).where(open_register_id.isnot(None))
             )
-            db.add(transaction)
-        
-        # --- CORREÇÃO AQUI ---
-        # A linha db.flush() foi removida.
-        logger.info(f"Transações de pagamento para a Venda ID {sale.id} adicionadas ao Caixa ID {open_register.id}.")
+            .returning(CashRegisterTransaction.cash_register_id)
+        )
+        register_ids = (await db.execute(stmt)).scalars().all()
+
+        if not register_ids:
+            logger.warning(f"Tentativa de operação em caixa, mas nenhum caixa aberto foi encontrado para a loja ID {sale.store_id}.")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Operação falhou: Nenhum caixa aberto encontrado para a loja ID {sale.store_id}.",
+            )
+        logger.info(f"Transações de pagamento para a Venda ID {sale.id} adicionadas ao Caixa ID {register_ids[0]}.")
 
     def close_register(self, db: Session, *, user: User, close_info: CashRegisterClose) -> CashRegister:
         """
@@ -1,29 +1,41 @@
 # api/app/services/dashboard_service.py
 from sqlalchemy.ext.asyncio import AsyncSession # Usar AsyncSession
 from sqlalchemy.future import select # Usar select assíncrono
-from sqlalchemy import func, extract
+from sqlalchemy import func, or_
 from datetime import datetime, timedelta, time
 from typing import Optional, List, Dict, Any 
 
-from app.models.sale import Sale, SaleItem
 from app.models.product import Product
 from app.models.customer import Customer
 from app.models.store import Store
+# Os KPIs e rankings leem das tabelas de rollup em vez de reagregar as vendas brutas.
+from app.models.sales_rollup import SalesHourlyRollup, SalesProductRollup
 from app.schemas.dashboard import DashboardKPIs # Importar schema para tipagem
+from app.core.cache import create_result_cache
+from app.core.config import settings
+
+# Resultados dos dashboards são guardados por loja (e um global) por alguns segundos e
+# invalidados quando uma venda é confirmada (ver invalidate_store).
+dashboard_cache = create_result_cache(
+    "dashboard",
+    maxsize=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
+GLOBAL_DASHBOARD_KEY = ("global_dashboard",)
 
 class DashboardService:
 
     async def _get_kpis_for_period(self, db: AsyncSession, start_date: datetime, end_date: datetime, *, store_id: Optional[int] = None) -> Dict[str, Any]: # Usar Dict ou DashboardKPIs
-        """ Calcula KPIs para um período de forma assíncrona. """
+        """ Calcula KPIs para um período semiaberto [start_date, end_date) de forma assíncrona. """
         stmt = select(
-            func.coalesce(func.sum(Sale.total_amount), 0.0).label("total_revenue"),
-            func.coalesce(func.count(Sale.id), 0).label("total_sales")
-        ).filter(Sale.created_at.between(start_date, end_date))
+            func.coalesce(func.sum(SalesHourlyRollup.total_amount), 0.0).label("total_revenue"),
+            func.coalesce(func.sum(SalesHourlyRollup.transaction_count), 0).label("total_sales")
+        ).filter(SalesHourlyRollup.sale_date >= start_date.date(), SalesHourlyRollup.sale_date < end_date.date())
 
-        customer_stmt = select(func.count(Customer.id)).filter(Customer.created_at.between(start_date, end_date))
+        customer_stmt = select(func.count(Customer.id)).filter(Customer.created_at >= start_date, Customer.created_at < end_date)
 
         if store_id:
-            stmt = stmt.filter(Sale.store_id == store_id)
+            stmt = stmt.filter(SalesHourlyRollup.store_id == store_id)
             customer_stmt = customer_stmt.filter(Customer.store_id == store_id)
 
         result_kpi = await db.execute(stmt)
@@ -32,121 +44,205 @@ class DashboardService:
         result_customer = await db.execute(customer_stmt)
         new_customers = result_customer.scalar() or 0
 
-        total_revenue = float(kpi_data.total_revenue)
-        total_sales = int(kpi_data.total_sales)
-        average_ticket = (total_revenue / total_sales) if total_sales > 0 else 0.0
+        return self._build_kpis(kpi_data.total_revenue, kpi_data.total_sales, new_customers)
 
+    def _build_kpis(self, total_revenue: Any, total_sales: Any, new_customers: Any) -> Dict[str, Any]:
+        """ Monta o dicionário de KPIs, calculando o ticket médio. """
+        total_revenue = float(total_revenue or 0.0)
+        total_sales = int(total_sales or 0)
         return {
             "total_revenue": total_revenue,
             "total_sales": total_sales,
-            "average_ticket": average_ticket,
-            "new_customers": new_customers
+            "average_ticket": (total_revenue / total_sales) if total_sales > 0 else 0.0,
+            "new_customers": int(new_customers or 0)
         }
 
-    async def _get_top_products(self, db: AsyncSession, start_date: datetime, end_date: datetime, order_by: str = 'revenue', *, store_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """ Busca top produtos de forma assíncrona. """
+    async def _get_kpis_and_hours(self, db: AsyncSession, today_start: datetime, today_end: datetime, period_start: datetime, *, store_id: int) -> Dict[str, Any]:
+        """
+        Calcula, numa única consulta agrupada por hora, os KPIs de hoje, os KPIs do período
+        [period_start, today_end) e as vendas por hora de hoje (cláusulas FILTER).
+        Os novos clientes entram como subconsultas escalares, avaliadas uma única vez.
+        """
+        is_today = SalesHourlyRollup.sale_date >= today_start.date()
+
+        def new_customers_since(start: datetime):
+            return (
+                select(func.count(Customer.id))
+                .where(Customer.store_id == store_id, Customer.created_at >= start, Customer.created_at < today_end)
+                .scalar_subquery()
+            )
+
         stmt = (
             select(
-                Product.id.label("product_id"),
-                Product.name.label("product_name"),
-                func.sum(SaleItem.quantity).label("total_quantity_sold"),
-                func.sum(SaleItem.quantity * SaleItem.price_at_sale).label("total_revenue_generated")
+                SalesHourlyRollup.hour,
+                func.coalesce(func.sum(SalesHourlyRollup.total_amount).filter(is_today), 0.0).label("today_revenue"),
+                func.coalesce(func.sum(SalesHourlyRollup.transaction_count).filter(is_today), 0).label("today_sales"),
+                func.sum(SalesHourlyRollup.total_amount).label("period_revenue"),
+                func.sum(SalesHourlyRollup.transaction_count).label("period_sales"),
+                new_customers_since(today_start).label("today_new_customers"),
+                new_customers_since(period_start).label("period_new_customers")
             )
-            .join(SaleItem, Product.id == SaleItem.product_id)
-            .join(Sale, SaleItem.sale_id == Sale.id) # Junta com Sale para filtrar por data e loja
-            .filter(Sale.created_at.between(start_date, end_date))
+            .where(
+                SalesHourlyRollup.store_id == store_id,
+                SalesHourlyRollup.sale_date >= period_start.date(),
+                SalesHourlyRollup.sale_date < today_end.date()
+            )
+            .group_by(SalesHourlyRollup.hour)
         )
+        rows = (await db.execute(stmt)).mappings().all()
+
+        if rows:
+            today_new_customers = rows[0]["today_new_customers"]
+            period_new_customers = rows[0]["period_new_customers"]
+        else:
+            # Sem vendas no período: as subconsultas não foram avaliadas, busca só os clientes.
+            customers = (await db.execute(select(
+                new_customers_since(today_start).label("today_new_customers"),
+                new_customers_since(period_start).label("period_new_customers")
+            ))).one()
+            today_new_customers = customers.today_new_customers
+            period_new_customers = customers.period_new_customers
+
+        sales_by_hour_map = {row["hour"]: int(row["today_sales"]) for row in rows}
+        return {
+            "kpis_today": self._build_kpis(
+                sum(float(row["today_revenue"]) for row in rows),
+                sum(int(row["today_sales"]) for row in rows),
+                today_new_customers
+            ),
+            "kpis_period": self._build_kpis(
+                sum(float(row["period_revenue"]) for row in rows),
+                sum(int(row["period_sales"]) for row in rows),
+                period_new_customers
+            ),
+            # Retorna a lista completa com 0 para horas sem vendas
+            "sales_by_hour": [{"hour": h, "total_sales": sales_by_hour_map.get(h, 0)} for h in range(24)]
+        }
 
-        if store_id:
-            stmt = stmt.filter(Sale.store_id == store_id) # Filtrar por loja
-
-        stmt = stmt.group_by(Product.id, Product.name) # Agrupar após filtros
-
-        if order_by == 'revenue':
-            stmt = stmt.order_by(func.sum(SaleItem.quantity * SaleItem.price_at_sale).desc())
-        else: # order_by 'quantity'
-            stmt = stmt.order_by(func.sum(SaleItem.quantity).desc())
-
-        stmt = stmt.limit(5)
-
-        result = await db.execute(stmt)
-        # Usar mappings().all() para obter lista de dicionários
-        return [dict(row) for row in result.mappings().all()]
-
-
-    async def _get_sales_by_hour(self, db: AsyncSession, start_date: datetime, end_date: datetime, *, store_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """ Busca vendas por hora de forma assíncrona. """
+    async def _get_top_products_ranked(self, db: AsyncSession, start_date: datetime, end_date: datetime, *, store_id: int, limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Calcula os dois rankings de produtos (receita e quantidade) numa única varredura do
+        período, usando funções de janela sobre os totais por produto.
+        """
+        product_totals = (
+            select(
+                SalesProductRollup.product_id,
+                func.sum(SalesProductRollup.quantity_sold).label("total_quantity_sold"),
+                func.sum(SalesProductRollup.total_revenue).label("total_revenue_generated")
+            )
+            .where(
+                SalesProductRollup.store_id == store_id,
+                SalesProductRollup.sale_date >= start_date.date(),
+                SalesProductRollup.sale_date < end_date.date()
+            )
+            .group_by(SalesProductRollup.product_id)
+            .cte("product_totals")
+        )
+        ranked = (
+            select(
+                product_totals,
+                func.row_number().over(
+                    order_by=(product_totals.c.total_revenue_generated.desc(), product_totals.c.product_id)
+                ).label("revenue_rank"),
+                func.row_number().over(
+                    order_by=(product_totals.c.total_quantity_sold.desc(), product_totals.c.product_id)
+                ).label("quantity_rank")
+            )
+            .subquery("ranked")
+        )
         stmt = (
             select(
-                extract('hour', Sale.created_at).label('hour'),
-                func.count(Sale.id).label('total_sales')
+                ranked.c.product_id,
+                Product.name.label("product_name"),
+                ranked.c.total_quantity_sold,
+                ranked.c.total_revenue_generated,
+                ranked.c.revenue_rank,
+                ranked.c.quantity_rank
             )
-            .filter(Sale.created_at.between(start_date, end_date))
+            .join(Product, Product.id == ranked.c.product_id)
+            .where(or_(ranked.c.revenue_rank <= limit, ranked.c.quantity_rank <= limit))
         )
-
-        if store_id:
-            stmt = stmt.filter(Sale.store_id == store_id) # Filtrar por loja
-
-        stmt = stmt.group_by('hour').order_by('hour') # Agrupar e ordenar após filtro
-
-        result = await db.execute(stmt)
-        sales_data = result.mappings().all() # Obter todos os resultados como dicionários
-
-        sales_by_hour_map = {item['hour']: item['total_sales'] for item in sales_data}
-        # Retorna a lista completa com 0 para horas sem vendas
-        return [{"hour": h, "total_sales": sales_by_hour_map.get(h, 0)} for h in range(24)]
+        rows = (await db.execute(stmt)).mappings().all()
+
+        def ranking(rank_column: str) -> List[Dict[str, Any]]:
+            selected = sorted((row for row in rows if row[rank_column] <= limit), key=lambda row: row[rank_column])
+            return [
+                {
+                    "product_id": row["product_id"],
+                    "product_name": row["product_name"],
+                    "total_quantity_sold": row["total_quantity_sold"],
+                    "total_revenue_generated": row["total_revenue_generated"]
+                }
+                for row in selected
+            ]
+
+        return {"revenue": ranking("revenue_rank"), "quantity": ranking("quantity_rank")}
+
+    def invalidate_store(self, *, store_id: int) -> None:
+        """ Descarta os dashboards em cache afetados por uma nova venda da loja. """
+        dashboard_cache.invalidate(("dashboard", store_id))
+        dashboard_cache.invalidate(GLOBAL_DASHBOARD_KEY)
 
     async def get_dashboard_summary(self, db: AsyncSession, *, store_id: int) -> Dict[str, Any]:
-        """ Agrega todos os dados do dashboard de forma assíncrona. """
+        """ Retorna o resumo do dashboard da loja, usando o cache quando possível. """
+        return await dashboard_cache.get_or_set(
+            ("dashboard", store_id),
+            lambda: self._compute_dashboard_summary(db, store_id=store_id)
+        )
+
+    async def _compute_dashboard_summary(self, db: AsyncSession, *, store_id: int) -> Dict[str, Any]:
+        """
+        Agrega todos os dados do dashboard de forma assíncrona, em duas consultas:
+        uma para KPIs + vendas por hora e outra para os dois rankings de produtos.
+        """
         today_start = datetime.combine(datetime.utcnow().date(), time.min)
-        today_end = datetime.combine(datetime.utcnow().date(), time.max)
+        # Intervalos semiabertos [início, fim): o fim é a meia-noite do dia seguinte.
+        today_end = today_start + timedelta(days=1)
         seven_days_ago = today_start - timedelta(days=7) # Corrigido cálculo
         thirty_days_ago = today_start - timedelta(days=30)
 
-        # Chama as funções auxiliares assíncronas com await
-        kpis_today = await self._get_kpis_for_period(db, today_start, today_end, store_id=store_id)
-        kpis_last_7_days = await self._get_kpis_for_period(db, seven_days_ago, today_end, store_id=store_id)
-        top_revenue = await self._get_top_products(db, thirty_days_ago, today_end, 'revenue', store_id=store_id)
-        top_quantity = await self._get_top_products(db, thirty_days_ago, today_end, 'quantity', store_id=store_id)
-        sales_hour = await self._get_sales_by_hour(db, today_start, today_end, store_id=store_id)
+        kpis = await self._get_kpis_and_hours(db, today_start, today_end, seven_days_ago, store_id=store_id)
+        top_products = await self._get_top_products_ranked(db, thirty_days_ago, today_end, store_id=store_id)
 
         return {
-            "kpis_today": kpis_today,
-            "kpis_last_7_days": kpis_last_7_days,
-            "top_5_products_by_revenue_last_30_days": top_revenue,
-            "top_5_products_by_quantity_last_30_days": top_quantity,
-            "sales_by_hour_today": sales_hour,
+            "kpis_today": kpis["kpis_today"],
+            "kpis_last_7_days": kpis["kpis_period"],
+            "top_5_products_by_revenue_last_30_days": top_products["revenue"],
+            "top_5_products_by_quantity_last_30_days": top_products["quantity"],
+            "sales_by_hour_today": kpis["sales_by_hour"],
         }
 
     async def get_global_dashboard_summary(self, db: AsyncSession) -> Dict[str, Any]:
+        """ Retorna o resumo do dashboard global, usando o cache quando possível. """
+        return await dashboard_cache.get_or_set(
+            GLOBAL_DASHBOARD_KEY,
+            lambda: self._compute_global_dashboard_summary(db)
+        )
+
+    async def _compute_global_dashboard_summary(self, db: AsyncSession) -> Dict[str, Any]:
         """ Agrega dados do dashboard global de forma assíncrona. """
         today_start = datetime.combine(datetime.utcnow().date(), time.min)
-        today_end = datetime.combine(datetime.utcnow().date(), time.max)
+        # Intervalos semiabertos [início, fim): o fim é a meia-noite do dia seguinte.
+        today_end = today_start + timedelta(days=1)
         seven_days_ago = today_start - timedelta(days=7)
 
         # Query para top lojas (assíncrona)
         top_stores_stmt = (
             select(
                 Store.name.label("store_name"),
-                func.sum(Sale.total_amount).label("total_revenue")
+                func.sum(SalesHourlyRollup.total_amount).label("total_revenue")
             )
-            .join(Sale, Store.id == Sale.store_id)
-            .filter(Sale.created_at.between(seven_days_ago, today_end))
+            .join(SalesHourlyRollup, Store.id == SalesHourlyRollup.store_id)
+            .filter(SalesHourlyRollup.sale_date >= seven_days_ago.date(), SalesHourlyRollup.sale_date < today_end.date())
             .group_by(Store.name)
-            .order_by(func.sum(Sale.total_amount).desc())
+            .order_by(func.sum(SalesHourlyRollup.total_amount).desc())
             .limit(5)
         )
 
-        # Executa as chamadas assíncronas em paralelo (melhora performance)
-        results = await asyncio.gather(
-             self._get_kpis_for_period(db, today_start, today_end), # store_id=None
-             self._get_kpis_for_period(db, seven_days_ago, today_end), # store_id=None
-             db.execute(top_stores_stmt)
-        )
-
-        kpis_today_global = results[0]
-        kpis_7_days_global = results[1]
-        top_stores_result = results[2]
+        # Uma AsyncSession não suporta consultas concorrentes, por isso as chamadas são sequenciais.
+        kpis_today_global = await self._get_kpis_for_period(db, today_start, today_end) # store_id=None
+        kpis_7_days_global = await self._get_kpis_for_period(db, seven_days_ago, today_end) # store_id=None
+        top_stores_result = await db.execute(top_stores_stmt)
 
         return {
             "global_kpis_today": kpis_today_global,
@@ -154,8 +250,5 @@ class DashboardService:
             "top_5_stores_by_revenue_last_7_days": [dict(row) for row in top_stores_result.mappings().all()]
         }
 
-# Precisa importar asyncio para usar asyncio.gather
-import asyncio
-
 # Instância do serviço
 dashboard_service = DashboardService()
\ No newline at end of file
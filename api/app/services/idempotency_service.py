@@ -0,0 +1,89 @@
+# api/app/services/idempotency_service.py
+import asyncio
+import hashlib
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.idempotency import IdempotencyKey
+
+class IdempotencyService:
+    """
+    Chaves de idempotência para operações que geram vendas (POST /sales e POST /orders/{id}/pay).
+
+    Fluxo esperado no CRUD:
+      1. `find` antes de qualquer escrita: se a chave já existe, devolve a venda original.
+      2. `claim` logo após o flush da venda, na mesma transação: se outra requisição com a
+         mesma chave já confirmou, o chamador desfaz a sua transação e devolve o resultado dela.
+    Como a chave é gravada junto com a venda, uma venda que falha não deixa chave registrada.
+    """
+
+    def request_hash(self, payload: BaseModel) -> str:
+        return hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+    async def find(
+        self, db: AsyncSession, *, store_id: int, scope: str, key: str, request_hash: str
+    ) -> Optional[int]:
+        """ Retorna o ID da venda já registrada para a chave, ou None. """
+        stmt = select(IdempotencyKey.sale_id, IdempotencyKey.request_hash).where(
+            IdempotencyKey.store_id == store_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        )
+        existing = (await db.execute(stmt)).first()
+        if existing is None:
+            return None
+        if existing.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="A chave de idempotência já foi usada com uma requisição diferente."
+            )
+        logger.info(f"Requisição repetida com chave de idempotência '{key}' ({scope}); devolvendo a Venda ID {existing.sale_id}.")
+        return existing.sale_id
+
+    async def claim(
+        self, db: AsyncSession, *, store_id: int, scope: str, key: str, request_hash: str, sale_id: int
+    ) -> bool:
+        """
+        Registra a chave para a venda na transação atual (sem commit).
+        Retorna False se a chave já pertence a outra requisição; nesse caso o INSERT
+        aguarda a transação concorrente terminar, então o resultado dela já pode ser lido
+        após o rollback.
+        """
+        stmt = (
+            pg_insert(IdempotencyKey)
+            .values(store_id=store_id, scope=scope, key=key, request_hash=request_hash, sale_id=sale_id)
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_store_scope_key")
+            .returning(IdempotencyKey.id)
+        )
+        return (await db.execute(stmt)).scalar_one_or_none() is not None
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """ Remove as chaves mais antigas que o período de retenção. """
+        cutoff = func.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_RETENTION_HOURS)
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+        await db.commit()
+        return result.rowcount or 0
+
+    async def run_cleanup_loop(self) -> None:
+        """ Tarefa de fundo iniciada com a aplicação: limpa as chaves expiradas periodicamente. """
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    removed = await self.purge_expired(db)
+                if removed:
+                    logger.info(f"{removed} chave(s) de idempotência expirada(s) removida(s).")
+            except Exception as e:
+                logger.error(f"Falha ao limpar chaves de idempotência: {e}")
+            await asyncio.sleep(settings.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS)
+
+idempotency_service = IdempotencyService()
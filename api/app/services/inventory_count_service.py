@@ -0,0 +1,224 @@
+# api/app/services/inventory_count_service.py
+import codecs
+import csv
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, any_, cast
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from loguru import logger
+
+from app.core.config import settings
+from app.models.product import Product
+from app.services.stock_service import stock_service
+
+# Erros de formato devolvidos de uma vez (os demais são omitidos).
+_MAX_REPORTED_ERRORS = 50
+_LOOKUP_CHUNK_SIZE = 5000
+# products.id e products.stock são INTEGER.
+_MAX_INTEGER = 2**31 - 1
+
+
+async def _lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """ Linhas de texto UTF-8 (com ou sem BOM) à medida que o corpo da requisição chega. """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _integer(value: Any, name: str) -> int:
+    """ Inteiro de uma célula do CSV ou valor JSON: aceita 12, "12" e "12.0", mas não 1.5 nem true. """
+    if isinstance(value, bool):
+        raise ValueError(f"{name} deve ser um número inteiro")
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"{name} deve ser um número inteiro")
+    return int(number)
+
+
+def _product_id(value: Any) -> int:
+    product_id = _integer(value, "product_id")
+    if not 1 <= product_id <= _MAX_INTEGER:
+        raise ValueError(f"product_id fora do intervalo (1 a {_MAX_INTEGER}); códigos de barras vão na coluna barcode")
+    return product_id
+
+
+def _quantity(value: Any) -> int:
+    """ Quantidade contada: inteiro de 0 a _MAX_INTEGER (aceita "12" e "12.0"). """
+    quantity = _integer(value, "counted_qty")
+    if not 0 <= quantity <= _MAX_INTEGER:
+        raise ValueError(f"counted_qty deve estar entre 0 e {_MAX_INTEGER}")
+    return quantity
+
+
+class InventoryCountService:
+    """
+    Contagem de inventário em massa (POST /stock/inventory-counts).
+
+    O arquivo é lido em streaming, linha a linha, em CSV (cabeçalho com `barcode` ou
+    `product_id` e `counted_qty`, separado por vírgula ou ponto e vírgula) ou JSON lines
+    (um objeto por linha com as mesmas chaves). Linhas repetidas para o mesmo produto são
+    somadas (contagens de prateleiras diferentes). Os códigos de barras são resolvidos em
+    lote e o estoque é ajustado por `StockService.apply_inventory_count`, em uma transação.
+    """
+
+    async def parse(self, stream: AsyncIterator[bytes], *, json_lines: bool) -> List[Tuple[int, Optional[int], Optional[str], int]]:
+        """
+        Entradas (linha, product_id, barcode, quantidade) do arquivo. Erros de formato são
+        acumulados e devolvidos juntos com 422; nesse caso nada é aplicado.
+        """
+        entries: List[Tuple[int, Optional[int], Optional[str], int]] = []
+        errors: List[str] = []
+        header: Optional[List[str]] = None
+        delimiter = ","
+        line_number = 0
+
+        async for line in _lines(stream):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                if json_lines:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("cada linha deve ser um objeto JSON")
+                elif header is None:
+                    delimiter = ";" if line.count(";") > line.count(",") else ","
+                    header = [name.strip().lower() for name in next(csv.reader([line], delimiter=delimiter))]
+                    if "counted_qty" not in header or not {"barcode", "product_id"} & set(header):
+                        raise HTTPException(
+                            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="O cabeçalho do CSV deve ter as colunas counted_qty e barcode ou product_id."
+                        )
+                    continue
+                else:
+                    record = dict(zip(header, next(csv.reader([line], delimiter=delimiter))))
+
+                product_id = record.get("product_id")
+                product_id = _product_id(product_id) if product_id not in (None, "") else None
+                barcode = str(record.get("barcode") or "").strip() or None
+                if product_id is None and barcode is None:
+                    raise ValueError("informe barcode ou product_id")
+                if "counted_qty" not in record:
+                    raise ValueError("counted_qty ausente")
+                entries.append((line_number, product_id, barcode, _quantity(record["counted_qty"])))
+            except (ValueError, TypeError) as e:
+                if len(errors) < _MAX_REPORTED_ERRORS:
+                    errors.append(f"Linha {line_number}: {e}")
+                else:
+                    break
+
+            if len(entries) > settings.INVENTORY_COUNT_MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"A contagem excede o limite de {settings.INVENTORY_COUNT_MAX_ROWS} linhas."
+                )
+
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"message": "Arquivo de contagem inválido; nenhum estoque foi alterado.", "errors": errors}
+            )
+        return entries
+
+    async def _resolve_barcodes(self, db: AsyncSession, *, store_id: int, barcodes: List[str]) -> Dict[str, int]:
+        resolved: Dict[str, int] = {}
+        for start in range(0, len(barcodes), _LOOKUP_CHUNK_SIZE):
+            chunk = barcodes[start:start + _LOOKUP_CHUNK_SIZE]
+            result = await db.execute(
+                select(Product.barcode, Product.id)
+                .where(Product.store_id == store_id, Product.barcode == any_(cast(chunk, ARRAY(String))))
+            )
+            resolved.update(dict(result.all()))
+        return resolved
+
+    async def apply(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        user_id: int,
+        entries: List[Tuple[int, Optional[int], Optional[str], int]],
+        reason: str,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """ Ajusta o estoque para as quantidades contadas (sem commit) e monta o relatório de diferenças. """
+        barcodes = sorted({barcode for _, product_id, barcode, _ in entries if product_id is None})
+        by_barcode = await self._resolve_barcodes(db, store_id=store_id, barcodes=barcodes)
+
+        counts: Dict[int, int] = defaultdict(int)
+        identifiers: Dict[int, str] = {}
+        not_found: List[str] = []
+        for _, product_id, barcode, quantity in entries:
+            if product_id is None:
+                product_id = by_barcode.get(barcode)
+                if product_id is None:
+                    not_found.append(barcode)
+                    continue
+            counts[product_id] += quantity
+            identifiers.setdefault(product_id, barcode or str(product_id))
+
+        # Linhas repetidas são somadas: o total também precisa caber no estoque.
+        overflow = [identifiers[product_id] for product_id, total in counts.items() if total > _MAX_INTEGER]
+        if overflow:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={
+                    "message": "Arquivo de contagem inválido; nenhum estoque foi alterado.",
+                    "errors": [f"{identifier}: a soma de counted_qty excede {_MAX_INTEGER}" for identifier in overflow[:_MAX_REPORTED_ERRORS]]
+                }
+            )
+
+        products = await stock_service.apply_inventory_count(
+            db, store_id=store_id, user_id=user_id, counts=counts, reason=reason, dry_run=dry_run
+        )
+        found = {product["id"] for product in products}
+        not_found.extend(identifiers[product_id] for product_id in counts if product_id not in found)
+
+        items = [
+            {
+                "product_id": product["id"],
+                "product_name": product["name"],
+                "barcode": product["barcode"],
+                "previous_stock": product["previous_stock"],
+                "counted_stock": product["counted_stock"],
+                "delta": product["counted_stock"] - product["previous_stock"],
+            }
+            for product in products
+            if product["counted_stock"] != product["previous_stock"]
+        ]
+        items.sort(key=lambda item: item["product_name"])
+        report = {
+            "dry_run": dry_run,
+            "lines": len(entries),
+            "products_counted": len(products),
+            "products_changed": len(items),
+            "total_delta": sum(item["delta"] for item in items),
+            "not_found": not_found,
+            "items": items,
+        }
+        logger.info(
+            f"Contagem de inventário na loja {store_id}{' (simulação)' if dry_run else ''}: "
+            f"{report['products_counted']} produto(s) contados, {report['products_changed']} alterado(s), "
+            f"{len(not_found)} não encontrado(s)."
+        )
+        return report
+
+inventory_count_service = InventoryCountService()
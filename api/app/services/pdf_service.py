@@ -18,6 +18,7 @@ from reportlab.lib.validators import Auto
 # --- FIM: Importações para Gráficos ---
 
 from datetime import date, datetime
+from types import SimpleNamespace
 from typing import Dict, Any, List
 import io
 # from loguru import logger # Descomente se precisar para debug
@@ -287,4 +288,29 @@ def generate_enhanced_sales_report_pdf(
 
     # --- Construir o PDF ---
     doc.build(story, onFirstPage=lambda canvas, doc: (header(canvas, doc), footer(canvas, doc)),
-                     onLaterPages=lambda canvas, doc: (header(canvas, doc), footer(canvas, doc)))
\ No newline at end of file
+                     onLaterPages=lambda canvas, doc: (header(canvas, doc), footer(canvas, doc)))
+
+
+# --- Ponto de entrada dos processos de renderização (report_job_service) ---
+# Faz parte da chave do cache de PDFs: incremente ao mudar o layout do relatório.
+SALES_REPORT_VERSION = 1
+
+def render_sales_report_pdf(report: Dict[str, Any]) -> bytes:
+    """
+    Gera o relatório de vendas por período a partir de dados simples (dicts, datas e números),
+    que podem ser enviados a outro processo, e devolve o conteúdo do PDF.
+    """
+    buffer = io.BytesIO()
+    generate_enhanced_sales_report_pdf(
+        buffer=buffer,
+        # O cabeçalho usa apenas o nome e o endereço da loja.
+        store=SimpleNamespace(**report["store"]),
+        start_date=report["start_date"],
+        end_date=report["end_date"],
+        summary_data=SalesByPeriod(**report["summary_data"]),
+        sales_by_user=[SalesByUser(**item) for item in report["sales_by_user"]],
+        sales_by_payment=[SalesByPaymentMethodItem(**item) for item in report["sales_by_payment"]],
+        sales_by_category=[SalesByCategoryItem(**item) for item in report["sales_by_category"]],
+        top_products=[TopSellingProduct(**item) for item in report["top_products"]]
+    )
+    return buffer.getvalue()
@@ -0,0 +1,38 @@
+# api/app/services/post_sale_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.models.sale import Sale
+from app.services.cash_register_service import cash_register_service
+from app.services.crm_service import crm_service
+from app.services.stock_service import stock_service
+from app.services.sales_rollup_service import sales_rollup_service
+from app.services.dashboard_service import dashboard_service
+
+class PostSaleService:
+    """
+    Etapa única de pós-venda, compartilhada por vendas diretas (POS) e pagamentos de comandas.
+
+    Roda nativamente na AsyncSession, na mesma transação da venda: a venda já deve ter
+    sido adicionada e enviada ao banco (flush), com `items` e `payments` em memória.
+    Cada serviço executa comandos em lote (sem carregar objeto por objeto).
+    """
+
+    async def process_sale(self, db: AsyncSession, *, sale: Sale) -> None:
+        """ Executa os serviços de pós-venda e confirma a transação. """
+        try:
+            await cash_register_service.add_sale_transaction(db, sale=sale)
+            await crm_service.update_customer_stats_from_sale(db, sale=sale)
+            await stock_service.deduct_stock_from_sale(db, sale=sale)
+            await stock_service.deduct_ingredients_from_sale(db, sale=sale)
+            await sales_rollup_service.apply_sale(db, sale_id=sale.id)
+        except Exception:
+            # Desfaz a venda inteira: nenhuma venda fica registrada sem caixa/estoque.
+            await db.rollback()
+            raise
+
+        await db.commit()
+        dashboard_service.invalidate_store(store_id=sale.store_id)
+        logger.info(f"Serviços de pós-venda concluídos para a Venda ID {sale.id}.")
+
+post_sale_service = PostSaleService()
@@ -0,0 +1,215 @@
+# api/app/services/product_lookup_service.py
+import asyncio
+import heapq
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.product import Product
+
+# Colunas guardadas no índice. O estoque não entra: muda a cada venda e é lido do banco
+# (por chave primária) apenas para os produtos encontrados.
+_INDEXED_COLUMNS = (
+    Product.id, Product.name, Product.price, Product.barcode, Product.image_url, Product.category_id
+)
+
+
+def _normalize(text: str) -> str:
+    """ Minúsculas e sem acentos, para que "pao" encontre "Pão". """
+    decomposed = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _StoreCatalog:
+    """ Índice de uma loja: código de barras -> produto, nomes ordenados (prefixo) e trigramas (substring). """
+
+    def __init__(self):
+        self.products: Dict[int, Dict[str, Any]] = {}
+        self.by_barcode: Dict[str, int] = {}
+        self.names: List[Tuple[str, int]] = []
+        self.trigrams: Dict[str, Set[int]] = defaultdict(set)
+        self.built_at = time.monotonic()
+
+    def add(self, product: Dict[str, Any]) -> None:
+        self.remove(product["id"])
+        normalized = _normalize(product["name"])
+        self.products[product["id"]] = {**product, "_normalized": normalized}
+        if product["barcode"]:
+            self.by_barcode[product["barcode"].strip()] = product["id"]
+        insort(self.names, (normalized, product["id"]))
+        for trigram in _trigrams(normalized):
+            self.trigrams[trigram].add(product["id"])
+
+    def remove(self, product_id: int) -> None:
+        existing = self.products.pop(product_id, None)
+        if existing is None:
+            return
+        if existing["barcode"] and self.by_barcode.get(existing["barcode"].strip()) == product_id:
+            del self.by_barcode[existing["barcode"].strip()]
+        position = bisect_left(self.names, (existing["_normalized"], product_id))
+        if position < len(self.names) and self.names[position] == (existing["_normalized"], product_id):
+            del self.names[position]
+        for trigram in _trigrams(existing["_normalized"]):
+            ids = self.trigrams.get(trigram)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.trigrams[trigram]
+
+    def search(self, term: str, limit: int) -> List[int]:
+        """ Código de barras exato; senão nomes que começam com o termo e, depois, que o contêm. """
+        product_id = self.by_barcode.get(term.strip())
+        if product_id is not None:
+            return [product_id]
+
+        normalized = _normalize(term)
+        if not normalized:
+            return []
+        found: List[int] = []
+        position = bisect_left(self.names, (normalized,))
+        while position < len(self.names) and len(found) < limit:
+            name, product_id = self.names[position]
+            if not name.startswith(normalized):
+                break
+            found.append(product_id)
+            position += 1
+
+        if len(found) < limit and len(normalized) >= 3:
+            # Candidatos: produtos que têm todos os trigramas do termo (o menor conjunto primeiro).
+            candidate_sets = sorted((self.trigrams.get(t, set()) for t in _trigrams(normalized)), key=len)
+            candidates = set.intersection(*candidate_sets) if candidate_sets else set()
+            seen = set(found)
+            matches = heapq.nsmallest(
+                limit - len(found),
+                ((self.products[pid]["_normalized"], pid) for pid in candidates
+                 if pid not in seen and normalized in self.products[pid]["_normalized"])
+            )
+            found.extend(pid for _, pid in matches)
+        return found
+
+
+class ProductLookupService:
+    """
+    Busca de produtos para a leitura de código de barras e a busca rápida do POS (GET /products/lookup).
+
+    Cada processo mantém um índice em memória por loja, montado na primeira consulta (ou no
+    aquecimento ao iniciar) e atualizado pelo CRUD de produtos ao criar, editar ou excluir.
+    Como outros processos não recebem essas atualizações, o índice é remontado após
+    PRODUCT_LOOKUP_INDEX_TTL_SECONDS, e um código de barras que não está no índice ainda é
+    procurado no banco (produto criado em outro processo).
+    """
+
+    def __init__(self):
+        self._catalogs: Dict[int, _StoreCatalog] = {}
+        self._building: Dict[int, asyncio.Task] = {}
+        # Lojas com produtos alterados desde o início da última montagem: o índice montado
+        # nesse intervalo é usado, mas já nasce expirado e é remontado na próxima consulta.
+        self._dirty: Set[int] = set()
+
+    async def _load(self, store_id: int) -> _StoreCatalog:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(*_INDEXED_COLUMNS).where(Product.store_id == store_id))
+            rows = result.mappings().all()
+        catalog = _StoreCatalog()
+        for row in rows:
+            catalog.add(dict(row))
+        logger.info(
+            f"Índice de produtos da loja {store_id} montado: {len(rows)} produto(s) "
+            f"em {(time.perf_counter() - started) * 1000:.0f}ms."
+        )
+        return catalog
+
+    async def _build(self, store_id: int) -> _StoreCatalog:
+        self._dirty.discard(store_id)
+        try:
+            try:
+                catalog = await self._load(store_id)
+            except Exception as e:
+                previous = self._catalogs.get(store_id)
+                if previous is None:
+                    raise
+                # Mantém o índice anterior e tenta novamente após o TTL.
+                logger.error(f"Falha ao remontar o índice de produtos da loja {store_id}: {e}")
+                previous.built_at = time.monotonic()
+                return previous
+            if store_id in self._dirty:
+                # Um produto mudou durante a leitura: o índice pode estar desatualizado.
+                catalog.built_at = 0.0
+            self._catalogs[store_id] = catalog
+            return catalog
+        finally:
+            self._building.pop(store_id, None)
+
+    async def _catalog(self, store_id: int) -> _StoreCatalog:
+        catalog = self._catalogs.get(store_id)
+        if catalog is not None and time.monotonic() - catalog.built_at < settings.PRODUCT_LOOKUP_INDEX_TTL_SECONDS:
+            return catalog
+        task = self._building.get(store_id)
+        if task is None:
+            task = self._building[store_id] = asyncio.create_task(self._build(store_id))
+        if catalog is not None:
+            # Índice expirado: continua respondendo com ele enquanto o novo é montado.
+            return catalog
+        return await asyncio.shield(task)
+
+    async def lookup(self, db: AsyncSession, *, store_id: int, term: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """ Produtos encontrados para o termo, com o estoque atual lido do banco. """
+        catalog = await self._catalog(store_id)
+        product_ids = catalog.search(term, limit)
+
+        if not product_ids:
+            # Código de barras de um produto que este processo ainda não indexou.
+            row = (await db.execute(
+                select(*_INDEXED_COLUMNS).where(Product.store_id == store_id, Product.barcode == term.strip())
+            )).mappings().first()
+            if row is None:
+                return []
+            catalog.add(dict(row))
+            product_ids = [row["id"]]
+
+        stock = dict((await db.execute(
+            select(Product.id, Product.stock).where(Product.id.in_(product_ids), Product.store_id == store_id)
+        )).all())
+        return [
+            {key: value for key, value in catalog.products[pid].items() if key != "_normalized"} | {"stock": stock[pid]}
+            for pid in product_ids if pid in stock
+        ]
+
+    def upsert(self, product: Product) -> None:
+        """ Reflete um produto criado ou editado (chamado após o commit). """
+        self._dirty.add(product.store_id)
+        catalog = self._catalogs.get(product.store_id)
+        if catalog is not None:
+            catalog.add({column.key: getattr(product, column.key) for column in _INDEXED_COLUMNS})
+
+    def remove(self, *, store_id: int, product_id: int) -> None:
+        """ Retira um produto excluído (chamado após o commit). """
+        self._dirty.add(store_id)
+        catalog = self._catalogs.get(store_id)
+        if catalog is not None:
+            catalog.remove(product_id)
+
+    async def warm_up(self) -> None:
+        """ Monta os índices de todas as lojas com produtos; executado ao iniciar a aplicação. """
+        try:
+            async with AsyncSessionLocal() as db:
+                store_ids = (await db.execute(select(Product.store_id).distinct())).scalars().all()
+            for store_id in store_ids:
+                await self._catalog(store_id)
+        except Exception as e:
+            logger.error(f"Falha ao aquecer o índice de produtos: {e}")
+
+product_lookup_service = ProductLookupService()
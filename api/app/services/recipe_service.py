@@ -0,0 +1,61 @@
+# api/app/services/recipe_service.py
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.cache import create_result_cache
+from app.core.config import settings
+from app.models.product import Product, ProductType
+from app.models.recipe import RecipeItem
+
+# Fichas técnicas por loja, montadas com uma consulta e invalidadas quando uma ficha ou o
+# tipo de um produto muda. Outros processos não recebem a invalidação: o TTL limita o atraso.
+recipe_cache = create_result_cache(
+    "recipes",
+    maxsize=settings.RECIPE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RECIPE_CACHE_TTL_SECONDS
+)
+
+# Produto composto -> ((insumo, quantidade por unidade vendida), ...)
+RecipeGraph = Dict[int, Tuple[Tuple[int, float], ...]]
+
+
+class RecipeService:
+
+    async def _load_graph(self, db: AsyncSession, store_id: int) -> RecipeGraph:
+        result = await db.execute(
+            select(RecipeItem.product_id, RecipeItem.ingredient_id, RecipeItem.quantity_needed)
+            .join(Product, Product.id == RecipeItem.product_id)
+            .where(
+                RecipeItem.store_id == store_id,
+                Product.store_id == store_id,
+                Product.product_type == ProductType.COMPOSED
+            )
+        )
+        graph: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+        for product_id, ingredient_id, quantity_needed in result.all():
+            graph[product_id].append((ingredient_id, quantity_needed))
+        return {product_id: tuple(items) for product_id, items in graph.items()}
+
+    async def get_graph(self, db: AsyncSession, *, store_id: int) -> RecipeGraph:
+        """ Fichas técnicas dos produtos compostos da loja (em cache). """
+        return await recipe_cache.get_or_set(("recipes", store_id), lambda: self._load_graph(db, store_id))
+
+    def explode(self, graph: RecipeGraph, quantities: Iterable[Tuple[int, float]]) -> Dict[int, float]:
+        """
+        Consumo total de cada insumo para as quantidades vendidas, dadas como pares
+        (produto, quantidade). Produtos sem ficha técnica não consomem insumos.
+        """
+        consumption: Dict[int, float] = defaultdict(float)
+        for product_id, quantity in quantities:
+            for ingredient_id, quantity_needed in graph.get(product_id, ()):
+                consumption[ingredient_id] += quantity_needed * quantity
+        return consumption
+
+    def invalidate(self, *, store_id: int) -> None:
+        """ Descarta as fichas técnicas da loja (chamado após o commit de uma alteração). """
+        recipe_cache.invalidate(("recipes", store_id))
+
+recipe_service = RecipeService()
@@ -0,0 +1,192 @@
+# api/app/services/report_job_service.py
+import asyncio
+import multiprocessing
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.crud import crud_report
+from app.db.session import get_read_sessionmaker
+from app.models.store import Store
+from app.schemas.enums import ReportJobStatus
+from app.services.pdf_service import SALES_REPORT_VERSION, render_sales_report_pdf
+
+# (loja, início, fim, versão do layout)
+_JobKey = Tuple[int, date, date, int]
+
+
+class ReportJob:
+    """ Geração de um relatório de vendas por período; guarda o PDF depois de pronto. """
+
+    def __init__(self, job_id: str, key: _JobKey):
+        self.id = job_id
+        self.key = key
+        self.store_id, self.start_date, self.end_date, _ = key
+        self.status = ReportJobStatus.PENDING
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.content: Optional[bytes] = None
+        # Instante (monotônico) em que o job sai do registro; definido ao terminar.
+        self.expires_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def filename(self) -> str:
+        return f"relatorio_vendas_{self.start_date}_a_{self.end_date}.pdf"
+
+
+class ReportJobService:
+    """
+    Fila de geração dos relatórios PDF de vendas por período.
+
+    `submit` devolve o job na hora; a busca dos dados roda no event loop (consultas
+    assíncronas, na réplica de leitura quando disponível) e o desenho das tabelas e gráficos
+    do ReportLab roda em um pool de processos, para não bloquear a API. No máximo
+    REPORT_RENDER_WORKERS jobs são executados ao mesmo tempo; os demais ficam "pending".
+
+    O PDF pronto fica em memória por (loja, período, versão do layout): um novo pedido do
+    mesmo relatório recebe o job existente (em andamento ou concluído) em vez de gerá-lo
+    de novo. Como outras vendas ainda entram em períodos que incluem o dia de hoje, esses
+    expiram em REPORT_OPEN_PERIOD_CACHE_TTL_SECONDS; os demais em REPORT_CACHE_TTL_SECONDS.
+    O registro é por processo: a consulta de um job deve chegar ao processo que o criou.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Ordem de uso mais recente, para descartar os PDFs menos usados acima do limite.
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._by_key: Dict[_JobKey, ReportJob] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn": o processo da API tem threads e conexões abertas que não devem ser copiadas.
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.REPORT_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _ttl(self, job: ReportJob) -> float:
+        if job.end_date >= date.today():
+            return settings.REPORT_OPEN_PERIOD_CACHE_TTL_SECONDS
+        return settings.REPORT_CACHE_TTL_SECONDS
+
+    def _drop(self, job: ReportJob) -> None:
+        self._jobs.pop(job.id, None)
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+    def _purge(self) -> None:
+        """ Remove os jobs expirados e, acima de REPORT_CACHE_MAX_ENTRIES, os concluídos menos usados. """
+        now = time.monotonic()
+        finished = []
+        for job in list(self._jobs.values()):
+            if job.expires_at is None:
+                continue
+            if job.expires_at <= now:
+                self._drop(job)
+            else:
+                finished.append(job)
+        for job in finished[:max(len(finished) - settings.REPORT_CACHE_MAX_ENTRIES, 0)]:
+            self._drop(job)
+
+    def submit(self, *, store_id: int, start_date: date, end_date: date) -> ReportJob:
+        """ Job do relatório pedido: o já existente para a mesma chave ou um novo, colocado na fila. """
+        self._purge()
+        key = (store_id, start_date, end_date, SALES_REPORT_VERSION)
+        job = self._by_key.get(key)
+        if job is not None and job.status != ReportJobStatus.FAILED:
+            self._jobs.move_to_end(job.id)
+            return job
+
+        job = ReportJob(secrets.token_urlsafe(12), key)
+        self._jobs[job.id] = job
+        self._by_key[key] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str, *, store_id: int) -> Optional[ReportJob]:
+        """ Job pelo ID, apenas se pertencer à loja informada. """
+        self._purge()
+        job = self._jobs.get(job_id)
+        if job is None or job.store_id != store_id:
+            return None
+        return job
+
+    async def wait(self, job: ReportJob) -> ReportJob:
+        """ Aguarda o fim do job; se quem aguarda desistir, a geração continua para os próximos pedidos. """
+        if job.task is not None:
+            await asyncio.shield(job.task)
+        return job
+
+    async def _fetch(self, job: ReportJob) -> Dict[str, Any]:
+        """ Dados do relatório em tipos simples, que podem ser enviados ao processo de renderização. """
+        period = {"start_date": job.start_date, "end_date": job.end_date, "store_id": job.store_id}
+        session_factory = await get_read_sessionmaker()
+        async with session_factory() as db:
+            store = await db.get(Store, job.store_id)
+            if store is None:
+                raise ValueError("Loja não encontrada.")
+            summary_data = await crud_report.get_sales_by_period(db, **period)
+            sales_by_user = await crud_report.get_sales_by_user(db, **period)
+            sales_by_payment = await crud_report.get_sales_by_payment_method(db, **period)
+            sales_by_category = await crud_report.get_sales_by_category(db, **period)
+            # Top 5 produtos por receita no período
+            top_products = await crud_report.get_top_selling_products_by_period(db, limit=5, order_by='revenue', **period)
+        return {
+            "store": {"name": store.name, "address": store.address},
+            "start_date": job.start_date,
+            "end_date": job.end_date,
+            "summary_data": summary_data.model_dump(),
+            "sales_by_user": [item.model_dump() for item in sales_by_user],
+            "sales_by_payment": [item.model_dump() for item in sales_by_payment],
+            "sales_by_category": [item.model_dump() for item in sales_by_category],
+            "top_products": [item.model_dump() for item in top_products],
+        }
+
+    async def _run(self, job: ReportJob) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.REPORT_RENDER_WORKERS)
+        async with self._slots:
+            job.status = ReportJobStatus.RUNNING
+            started = time.perf_counter()
+            try:
+                report = await self._fetch(job)
+                job.content = await asyncio.get_running_loop().run_in_executor(
+                    self._pool(), render_sales_report_pdf, report
+                )
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # Um processo de renderização morreu: o próximo job cria um pool novo.
+                    self._executor = None
+                logger.exception(f"Falha ao gerar o relatório PDF {job.id} da loja {job.store_id}: {e}")
+                job.status = ReportJobStatus.FAILED
+                job.error = str(e) or e.__class__.__name__
+            else:
+                job.status = ReportJobStatus.DONE
+                logger.info(
+                    f"Relatório PDF {job.id} da loja {job.store_id} gerado: {len(job.content)} bytes "
+                    f"em {(time.perf_counter() - started) * 1000:.0f}ms."
+                )
+            job.finished_at = datetime.now(timezone.utc)
+            job.expires_at = time.monotonic() + self._ttl(job)
+
+    def shutdown(self) -> None:
+        """ Cancela os jobs em andamento e encerra o pool; executado ao desligar a aplicação. """
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+report_job_service = ReportJobService()
@@ -0,0 +1,159 @@
+# api/app/services/sales_rollup_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import func, extract, delete, Integer
+from datetime import date, datetime, time, timedelta
+from typing import Optional, List
+from loguru import logger
+
+from app.models.sale import Sale, SaleItem
+from app.models.product import Product
+from app.models.payment import Payment
+from app.models.sales_rollup import (
+    SalesHourlyRollup, SalesPaymentRollup, SalesCategoryRollup, SalesProductRollup
+)
+
+class SalesRollupService:
+    """
+    Mantém as tabelas de rollup de vendas (app/models/sales_rollup.py).
+
+    A mesma consulta de agregação é usada nos dois caminhos:
+    - incremental: agrega apenas a venda recém-criada e soma ao rollup existente (upsert);
+    - reconstrução: apaga o intervalo de datas e reagrega todas as vendas desse intervalo.
+    """
+
+    def _hourly_select(self, *filters):
+        sale_date = func.date(Sale.created_at)
+        hour = extract('hour', Sale.created_at).cast(Integer)
+        return (
+            select(
+                Sale.store_id,
+                sale_date.label("sale_date"),
+                hour.label("hour"),
+                Sale.user_id,
+                func.sum(Sale.total_amount).label("total_amount"),
+                func.count(Sale.id).label("transaction_count")
+            )
+            .where(*filters)
+            .group_by(Sale.store_id, sale_date, hour, Sale.user_id)
+        )
+
+    def _payment_select(self, *filters):
+        sale_date = func.date(Sale.created_at)
+        return (
+            select(
+                Sale.store_id,
+                sale_date.label("sale_date"),
+                Payment.payment_method,
+                func.sum(Payment.amount).label("total_amount"),
+                func.count(Payment.id).label("transaction_count")
+            )
+            .join(Sale, Payment.sale_id == Sale.id)
+            .where(*filters)
+            .group_by(Sale.store_id, sale_date, Payment.payment_method)
+        )
+
+    def _category_select(self, *filters):
+        sale_date = func.date(Sale.created_at)
+        return (
+            select(
+                Sale.store_id,
+                sale_date.label("sale_date"),
+                Product.category_id,
+                func.sum(SaleItem.quantity * SaleItem.price_at_sale).label("total_amount"),
+                func.count(func.distinct(Sale.id)).label("transaction_count")
+            )
+            .select_from(SaleItem)
+            .join(Sale, SaleItem.sale_id == Sale.id)
+            .join(Product, SaleItem.product_id == Product.id)
+            .where(Product.category_id.isnot(None), *filters)
+            .group_by(Sale.store_id, sale_date, Product.category_id)
+        )
+
+    def _product_select(self, *filters):
+        sale_date = func.date(Sale.created_at)
+        return (
+            select(
+                Sale.store_id,
+                sale_date.label("sale_date"),
+                SaleItem.product_id,
+                func.sum(SaleItem.quantity).label("quantity_sold"),
+                func.sum(SaleItem.quantity * SaleItem.price_at_sale).label("total_revenue")
+            )
+            .select_from(SaleItem)
+            .join(Sale, SaleItem.sale_id == Sale.id)
+            .where(*filters)
+            .group_by(Sale.store_id, sale_date, SaleItem.product_id)
+        )
+
+    async def _upsert(self, db: AsyncSession, model, source, key_columns: List[str], measure_columns: List[str]) -> None:
+        """ INSERT ... SELECT ... ON CONFLICT DO UPDATE somando as medidas ao valor existente. """
+        table = model.__table__
+        stmt = pg_insert(table).from_select(key_columns + measure_columns, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={col: table.c[col] + stmt.excluded[col] for col in measure_columns}
+        )
+        await db.execute(stmt)
+
+    async def _apply(self, db: AsyncSession, *filters) -> None:
+        await self._upsert(
+            db, SalesHourlyRollup, self._hourly_select(*filters),
+            ["store_id", "sale_date", "hour", "user_id"], ["total_amount", "transaction_count"]
+        )
+        await self._upsert(
+            db, SalesPaymentRollup, self._payment_select(*filters),
+            ["store_id", "sale_date", "payment_method"], ["total_amount", "transaction_count"]
+        )
+        await self._upsert(
+            db, SalesCategoryRollup, self._category_select(*filters),
+            ["store_id", "sale_date", "category_id"], ["total_amount", "transaction_count"]
+        )
+        await self._upsert(
+            db, SalesProductRollup, self._product_select(*filters),
+            ["store_id", "sale_date", "product_id"], ["quantity_sold", "total_revenue"]
+        )
+
+    async def apply_sale(self, db: AsyncSession, *, sale_id: int) -> None:
+        """
+        Soma uma venda recém-confirmada aos rollups. Não faz commit; o chamador decide.
+        """
+        await self._apply(db, Sale.id == sale_id)
+
+    async def rebuild(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> None:
+        """
+        Reconstrói os rollups a partir das tabelas de vendas, para uma loja e/ou um
+        intervalo de datas (inclusivo). Sem argumentos, reconstrói tudo.
+        """
+        rollup_models = (SalesHourlyRollup, SalesPaymentRollup, SalesCategoryRollup, SalesProductRollup)
+        for model in rollup_models:
+            delete_stmt = delete(model)
+            if store_id is not None:
+                delete_stmt = delete_stmt.where(model.store_id == store_id)
+            if start_date is not None:
+                delete_stmt = delete_stmt.where(model.sale_date >= start_date)
+            if end_date is not None:
+                delete_stmt = delete_stmt.where(model.sale_date <= end_date)
+            await db.execute(delete_stmt)
+
+        sale_filters = []
+        if store_id is not None:
+            sale_filters.append(Sale.store_id == store_id)
+        if start_date is not None:
+            sale_filters.append(Sale.created_at >= datetime.combine(start_date, time.min))
+        if end_date is not None:
+            sale_filters.append(Sale.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+
+        await self._apply(db, *sale_filters)
+        await db.commit()
+        logger.info(f"Rollups de vendas reconstruídos (loja={store_id}, início={start_date}, fim={end_date}).")
+
+sales_rollup_service = SalesRollupService()
@@ -0,0 +1,139 @@
+# api/app/services/search_service.py
+import html
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, func, or_, literal, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+from loguru import logger
+
+
+def _fold(char: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", char.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def highlight(value: Optional[str], term: str) -> Optional[str]:
+    """
+    Valor com a primeira ocorrência do termo (sem diferenciar acentos/maiúsculas) entre
+    <mark> e </mark>; o restante é escapado para exibição em HTML.
+    """
+    if value is None:
+        return None
+    folded_term = "".join(_fold(char) for char in term.strip())
+    # Texto normalizado e, para cada caractere dele, a posição correspondente no original.
+    folded, positions = [], []
+    for index, char in enumerate(value):
+        for folded_char in _fold(char):
+            folded.append(folded_char)
+            positions.append(index)
+    start = "".join(folded).find(folded_term) if folded_term else -1
+    if start < 0:
+        return html.escape(value)
+    begin, end = positions[start], positions[start + len(folded_term) - 1] + 1
+    return f"{html.escape(value[:begin])}<mark>{html.escape(value[begin:end])}</mark>{html.escape(value[end:])}"
+
+
+class SearchService:
+    """
+    Busca textual de produtos e clientes.
+
+    No PostgreSQL com pg_trgm e a função `immutable_unaccent` (migração de busca), a
+    comparação ignora acentos e maiúsculas, usa os índices GIN de trigramas e ordena os
+    resultados por `word_similarity`, tolerando erros de digitação. Sem eles (outro banco,
+    como SQLite, ou migração não aplicada) cai para ILIKE, com os nomes que começam com o
+    termo primeiro.
+    """
+
+    def __init__(self):
+        self._trigram_available: Optional[bool] = None
+
+    async def trigram_available(self, db: AsyncSession) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        if self._trigram_available is None:
+            self._trigram_available = bool((await db.execute(text(
+                "SELECT to_regproc('immutable_unaccent') IS NOT NULL "
+                "AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            ))).scalar())
+            if not self._trigram_available:
+                logger.warning("pg_trgm/immutable_unaccent indisponíveis: a busca textual usará ILIKE.")
+        return self._trigram_available
+
+    @staticmethod
+    def _normalized(value: Any) -> ColumnElement:
+        """ Mesma expressão dos índices GIN: lower(immutable_unaccent(valor)). """
+        return func.lower(func.immutable_unaccent(value))
+
+    async def contains(self, db: AsyncSession, column: InstrumentedAttribute, term: str) -> ColumnElement:
+        """ Filtro "contém o termo" para listagens que mantêm a própria ordenação. """
+        pattern = f"%{_escape_like(term.strip())}%"
+        if await self.trigram_available(db):
+            return self._normalized(column).like(self._normalized(literal(pattern)), escape="\\")
+        return column.ilike(pattern, escape="\\")
+
+    async def starts_with(self, db: AsyncSession, column: InstrumentedAttribute, term: str) -> ColumnElement:
+        """ Filtro "começa com o termo" (prefixo), atendido por índice btree com text_pattern_ops. """
+        pattern = f"{_escape_like(term.strip())}%"
+        if await self.trigram_available(db):
+            return self._normalized(column).like(self._normalized(literal(pattern)), escape="\\")
+        return column.ilike(pattern, escape="\\")
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        columns: Sequence[InstrumentedAttribute],
+        search_column: InstrumentedAttribute,
+        where: Sequence[ColumnElement],
+        term: str,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca ranqueada: retorna as `columns` selecionadas de cada linha mais `score`
+        (relevância de 0 a 1; None no modo ILIKE) e `highlight` (valor de `search_column`
+        com o trecho encontrado marcado).
+        """
+        term = term.strip()
+        pattern = f"%{_escape_like(term)}%"
+        if await self.trigram_available(db):
+            normalized_column = self._normalized(search_column)
+            normalized_term = self._normalized(literal(term))
+            score = func.word_similarity(normalized_term, normalized_column)
+            stmt = (
+                select(*columns, score.label("score"))
+                .where(
+                    *where,
+                    or_(
+                        normalized_column.like(self._normalized(literal(pattern)), escape="\\"),
+                        # Semelhança por palavra acima do limiar do pg_trgm (tolera erros de digitação).
+                        normalized_column.op("%>")(normalized_term),
+                    )
+                )
+                .order_by(score.desc(), search_column, columns[0])
+                .limit(limit)
+            )
+        else:
+            starts_with = case((search_column.ilike(f"{_escape_like(term)}%", escape="\\"), 0), else_=1)
+            stmt = (
+                select(*columns, literal(None).label("score"))
+                .where(*where, search_column.ilike(pattern, escape="\\"))
+                .order_by(starts_with, search_column, columns[0])
+                .limit(limit)
+            )
+
+        results = []
+        for row in (await db.execute(stmt)).mappings():
+            result = dict(row)
+            result["highlight"] = highlight(result.get(search_column.key), term)
+            results.append(result)
+        return results
+
+search_service = SearchService()
@@ -1,96 +1,383 @@
 # api/app/services/stock_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update, insert, column, literal, true, cast, func, any_, Integer, Float, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Row
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
 from loguru import logger
 
 from app.models.sale import Sale
 from app.models.product import Product
+from app.models.batch import ProductBatch
 from app.models.user import User
 from app.models.stock_movement import StockMovement, MovementType
+from app.models.ingredient import Ingredient
+from app.models.ingredient_movement import IngredientMovement
+from app.services.recipe_service import recipe_service
+
+# Lotes lidos por produto em cada rodada do consumo FEFO. Normalmente o primeiro lote já
+# cobre a venda; produtos com milhares de lotes nunca são carregados por inteiro.
+_FEFO_CHUNK_SIZE = 50
+
+# Produtos por comando nas operações em massa (inventário). Os IDs vão em arrays (um
+# parâmetro só), então o limite é o tamanho de cada comando, não o de parâmetros do asyncpg.
+_BULK_CHUNK_SIZE = 5000
+
+
+def _chunks(items: Sequence[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 class StockService:
-    def _create_stock_movement(
+    """
+    Toda alteração de estoque passa por `_apply_stock_deltas`: o novo valor é calculado
+    pelo banco (stock = stock + delta) e nunca a partir de um objeto ORM lido antes,
+    então vendas simultâneas do mesmo produto não perdem atualizações e o
+    `stock_after_movement` de cada movimentação corresponde ao estoque real.
+    O commit fica sempre a cargo do chamador.
+    """
+
+    async def _apply_stock_deltas(
+        self, db: AsyncSession, *, store_id: int, deltas: Dict[int, int]
+    ) -> Dict[int, Row]:
+        """
+        Método privado central: aplica as variações de estoque por produto e retorna,
+        por ID, as linhas atualizadas (id, name, stock, low_stock_threshold).
+        Produtos inexistentes ou de outra loja não aparecem no retorno.
+        """
+        if not deltas:
+            return {}
+        product_ids = sorted(deltas)
+
+        # Trava as linhas sempre em ordem de ID: duas vendas com os mesmos produtos
+        # esperam uma pela outra em vez de entrarem em deadlock. FOR NO KEY UPDATE (e não
+        # FOR UPDATE) porque os itens da venda, já inseridos, mantêm FOR KEY SHARE nos produtos
+        # pela chave estrangeira: FOR UPDATE esperaria pelos itens de outra venda em andamento.
+        ids_array = cast(product_ids, ARRAY(Integer))
+        await db.execute(
+            select(Product.id)
+            .where(Product.id == any_(ids_array), Product.store_id == store_id)
+            .order_by(Product.id)
+            .with_for_update(key_share=True)
+        )
+
+        # IDs e variações em dois arrays (unnest): o comando tem o mesmo texto para qualquer
+        # número de produtos, então é compilado uma vez e reaproveitado do cache do SQLAlchemy.
+        delta_values = func.unnest(
+            ids_array, cast([deltas[product_id] for product_id in product_ids], ARRAY(Integer))
+        ).table_valued(column("product_id", Integer), column("delta", Integer)).render_derived(name="stock_deltas")
+
+        stmt = (
+            update(Product)
+            .where(Product.id == delta_values.c.product_id, Product.store_id == store_id)
+            .values(stock=Product.stock + delta_values.c.delta)
+            .returning(Product.id, Product.name, Product.stock, Product.low_stock_threshold)
+            .execution_options(synchronize_session="fetch")
+        )
+        updated = {row.id: row for row in (await db.execute(stmt)).all()}
+
+        for row in updated.values():
+            if row.stock <= (row.low_stock_threshold or 0):
+                logger.warning(
+                    f"Estoque baixo para o produto ID {row.id} ('{row.name}'). "
+                    f"Estoque atual: {row.stock}, Limite: {row.low_stock_threshold}."
+                )
+        return updated
+
+    async def apply_movements(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
-        product: Product,
-        user_id: int,
-        quantity_change: int,
+        store_id: int,
+        user_id: Optional[int],
+        deltas: Dict[int, int],
         movement_type: MovementType,
         reason: str = None
-    ) -> StockMovement:
+    ) -> Dict[int, Row]:
         """
-        Método privado central para criar um registro de movimentação de estoque
-        e atualizar o estoque do produto.
+        Aplica as variações de estoque e registra uma movimentação por produto,
+        com o estoque resultante retornado pelo próprio UPDATE.
         """
-        product.stock += quantity_change
-        
-        # --- CORREÇÃO AQUI ---
-        # A trava que impedia o estoque de ficar negativo foi removida.
-        # if product.stock < 0:
-        #     product.stock = 0
-            
-        db.add(product)
-        # O commit será feito pela função que chama o serviço
+        updated = await self._apply_stock_deltas(db, store_id=store_id, deltas=deltas)
 
-        movement = StockMovement(
-            product_id=product.id,
-            user_id=user_id,
-            movement_type=movement_type,
-            quantity=quantity_change,
-            stock_after_movement=product.stock,
-            reason=reason,
-            store_id=product.store_id # Garante que o store_id seja salvo
-        )
-        db.add(movement)
-        
-        if product.stock <= product.low_stock_threshold:
-            logger.warning(
-                f"Estoque baixo para o produto ID {product.id} ('{product.name}'). "
-                f"Estoque atual: {product.stock}, Limite: {product.low_stock_threshold}."
+        product_ids, quantities, stocks_after = [], [], []
+        for product_id, quantity_change in deltas.items():
+            row = updated.get(product_id)
+            if row is None:
+                logger.error(f"Produto com ID {product_id} não encontrado na loja {store_id}; estoque não alterado.")
+                continue
+            product_ids.append(product_id)
+            quantities.append(quantity_change)
+            stocks_after.append(row.stock)
+
+        if product_ids:
+            # Um INSERT ... SELECT sobre arrays, em vez de um executemany com uma linha por produto.
+            rows = func.unnest(
+                cast(product_ids, ARRAY(Integer)), cast(quantities, ARRAY(Integer)), cast(stocks_after, ARRAY(Integer))
+            ).table_valued(
+                column("product_id", Integer), column("quantity", Integer), column("stock_after_movement", Integer)
+            ).render_derived(name="movements")
+            await db.execute(
+                insert(StockMovement).from_select(
+                    ["product_id", "quantity", "stock_after_movement", "user_id", "movement_type", "reason", "store_id"],
+                    select(
+                        rows.c.product_id, rows.c.quantity, rows.c.stock_after_movement,
+                        literal(user_id, Integer), literal(movement_type, StockMovement.movement_type.type),
+                        literal(reason, String), literal(store_id, Integer)
+                    )
+                )
             )
-            
-        return movement
+        return updated
 
-    def deduct_stock_from_sale(self, db: Session, *, sale: Sale) -> None:
-        """Refatorado para usar o método central _create_stock_movement."""
+    async def deduct_stock_from_sale(self, db: AsyncSession, *, sale: Sale) -> None:
+        """
+        Baixa o estoque de todos os itens de uma venda em lote: as quantidades são somadas
+        por produto e aplicadas com um único UPDATE ... FROM unnest(...) RETURNING.
+        """
+        quantities: Dict[int, int] = defaultdict(int)
         for item in sale.items:
-            product = db.get(Product, item.product_id)
-
-            if product:
-                if product.store_id != sale.store_id:
-                    logger.error(f"Tentativa de dedução de estoque para o produto ID {item.product_id} que não pertence à loja da venda ID {sale.id}.")
-                    continue 
-
-                self._create_stock_movement(
-                    db=db,
-                    product=product,
-                    user_id=sale.user_id,
-                    quantity_change=-item.quantity,
-                    movement_type=MovementType.SALE,
-                    reason=f"Venda ID: {sale.id}"
+            quantities[item.product_id] -= item.quantity
+
+        await self.apply_movements(
+            db,
+            store_id=sale.store_id,
+            user_id=sale.user_id,
+            deltas=quantities,
+            movement_type=MovementType.SALE,
+            reason=f"Venda ID: {sale.id}"
+        )
+        # As linhas dos produtos já estão travadas: vendas simultâneas consomem os lotes em sequência.
+        await self.consume_batches_fefo(
+            db, store_id=sale.store_id, quantities={pid: -delta for pid, delta in quantities.items()}
+        )
+
+    async def consume_batches_fefo(self, db: AsyncSession, *, store_id: int, quantities: Dict[int, float]) -> None:
+        """
+        Baixa as quantidades vendidas dos lotes de cada produto, do que vence primeiro para o
+        último (FEFO; lotes sem validade por último). Em cada rodada, um único SELECT com
+        LATERAL trava até _FEFO_CHUNK_SIZE lotes com saldo por produto (índice parcial
+        store_id, product_id, expiration_date) e um único UPDATE ... FROM unnest(...) aplica
+        as baixas. Só há nova rodada para produtos cuja venda esgotou todos os lotes lidos.
+        Produtos sem lotes não são afetados.
+        """
+        pending = {product_id: float(quantity) for product_id, quantity in quantities.items() if quantity > 0}
+        while pending:
+            demand = func.unnest(cast(sorted(pending), ARRAY(Integer))).table_valued(
+                column("product_id", Integer)
+            ).render_derived(name="batch_demand")
+            candidates = (
+                select(ProductBatch.id, ProductBatch.product_id, ProductBatch.quantity, ProductBatch.expiration_date)
+                .where(
+                    ProductBatch.store_id == store_id,
+                    ProductBatch.product_id == demand.c.product_id,
+                    ProductBatch.quantity > 0
+                )
+                .order_by(ProductBatch.expiration_date.asc().nulls_last(), ProductBatch.id)
+                .limit(_FEFO_CHUNK_SIZE)
+                .with_for_update(key_share=True)
+                .lateral("fefo_batches")
+            )
+            rows = (await db.execute(
+                select(candidates)
+                .select_from(demand.join(candidates, true()))
+                .order_by(candidates.c.product_id, candidates.c.expiration_date.asc().nulls_last(), candidates.c.id)
+            )).all()
+
+            taken: Dict[int, float] = {}
+            batches_read: Dict[int, int] = defaultdict(int)
+            for row in rows:
+                batches_read[row.product_id] += 1
+                remaining = pending[row.product_id]
+                if remaining <= 0:
+                    continue
+                take = min(row.quantity, remaining)
+                taken[row.id] = take
+                pending[row.product_id] = remaining - take
+
+            if taken:
+                batch_ids = sorted(taken)
+                taken_values = func.unnest(
+                    cast(batch_ids, ARRAY(Integer)), cast([taken[batch_id] for batch_id in batch_ids], ARRAY(Float))
+                ).table_valued(column("batch_id", Integer), column("taken", Float)).render_derived(name="batch_taken")
+                await db.execute(
+                    update(ProductBatch)
+                    .where(ProductBatch.id == taken_values.c.batch_id)
+                    .values(quantity=ProductBatch.quantity - taken_values.c.taken)
+                    .execution_options(synchronize_session=False)
                 )
-            else:
-                logger.error(f"Produto com ID {item.product_id} não encontrado para dedução de estoque na venda {sale.id}.")
 
-    def adjust_stock(
-        self, db: Session, *, product_id: int, new_stock_level: int, user: User, reason: str
-    ) -> StockMovement:
+            next_pending = {}
+            for product_id, remaining in pending.items():
+                if remaining <= 0:
+                    continue
+                if batches_read[product_id] == _FEFO_CHUNK_SIZE:
+                    next_pending[product_id] = remaining
+                elif batches_read[product_id]:
+                    logger.warning(
+                        f"Lotes insuficientes para o produto ID {product_id} na loja {store_id}: "
+                        f"{remaining:g} unidade(s) vendidas sem lote correspondente."
+                    )
+            pending = next_pending
+
+    async def _apply_ingredient_deltas(
+        self, db: AsyncSession, *, store_id: int, deltas: Dict[int, float]
+    ) -> Dict[int, Row]:
+        """
+        Mesmo processo de `_apply_stock_deltas` para os insumos: trava as linhas em ordem de ID
+        e aplica todas as variações com um UPDATE ... FROM unnest(...) RETURNING (id, name, stock).
+        """
+        if not deltas:
+            return {}
+        ingredient_ids = sorted(deltas)
+
+        ids_array = cast(ingredient_ids, ARRAY(Integer))
+        await db.execute(
+            select(Ingredient.id)
+            .where(Ingredient.id == any_(ids_array), Ingredient.store_id == store_id)
+            .order_by(Ingredient.id)
+            .with_for_update(key_share=True)
+        )
+
+        delta_values = func.unnest(
+            ids_array, cast([deltas[ingredient_id] for ingredient_id in ingredient_ids], ARRAY(Float))
+        ).table_valued(column("ingredient_id", Integer), column("delta", Float)).render_derived(name="ingredient_deltas")
+
+        stmt = (
+            update(Ingredient)
+            .where(Ingredient.id == delta_values.c.ingredient_id, Ingredient.store_id == store_id)
+            .values(stock=Ingredient.stock + delta_values.c.delta)
+            .returning(Ingredient.id, Ingredient.name, Ingredient.stock)
+            .execution_options(synchronize_session="fetch")
+        )
+        updated = {row.id: row for row in (await db.execute(stmt)).all()}
+
+        for row in updated.values():
+            if row.stock < 0:
+                logger.warning(f"Estoque negativo para o insumo ID {row.id} ('{row.name}'). Estoque atual: {row.stock}.")
+        return updated
+
+    async def deduct_ingredients_from_sale(self, db: AsyncSession, *, sale: Sale) -> None:
+        """
+        Baixa os insumos dos produtos compostos da venda: cada item é expandido pela ficha
+        técnica (grafo de receitas da loja, em cache), o consumo é somado por insumo para a
+        venda inteira e aplicado em lote, com uma movimentação por insumo.
+        """
+        graph = await recipe_service.get_graph(db, store_id=sale.store_id)
+        if not graph:
+            return
+        consumption = recipe_service.explode(graph, ((item.product_id, item.quantity) for item in sale.items))
+        deltas = {ingredient_id: -quantity for ingredient_id, quantity in consumption.items() if quantity}
+        updated = await self._apply_ingredient_deltas(db, store_id=sale.store_id, deltas=deltas)
+
+        movements = []
+        for ingredient_id, quantity_change in deltas.items():
+            row = updated.get(ingredient_id)
+            if row is None:
+                logger.error(f"Insumo com ID {ingredient_id} não encontrado na loja {sale.store_id}; estoque não alterado.")
+                continue
+            movements.append({
+                "store_id": sale.store_id,
+                "ingredient_id": ingredient_id,
+                "user_id": sale.user_id,
+                "sale_id": sale.id,
+                "movement_type": MovementType.SALE,
+                "quantity": quantity_change,
+                "stock_after_movement": row.stock,
+                "reason": f"Venda ID: {sale.id}",
+            })
+
+        if movements:
+            await db.execute(insert(IngredientMovement), movements)
+
+    async def apply_inventory_count(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        user_id: Optional[int],
+        counts: Dict[int, int],
+        reason: str,
+        dry_run: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Ajusta o estoque dos produtos contados para as quantidades informadas (inventário),
+        com uma movimentação ADJUSTMENT por produto alterado. Os produtos são travados em
+        ordem de ID antes da leitura do estoque atual, então as diferenças consideram vendas
+        concorrentes; tudo é aplicado em blocos de _BULK_CHUNK_SIZE na transação do chamador.
+        Com `dry_run` apenas calcula as diferenças (sem travar nem alterar).
+        Retorna, por produto encontrado na loja: id, name, barcode, previous_stock e counted_stock.
+        """
+        current: Dict[int, Row] = {}
+        for chunk in _chunks(sorted(counts), _BULK_CHUNK_SIZE):
+            stmt = (
+                select(Product.id, Product.name, Product.barcode, Product.stock)
+                .where(Product.id == any_(cast(chunk, ARRAY(Integer))), Product.store_id == store_id)
+                .order_by(Product.id)
+            )
+            if not dry_run:
+                stmt = stmt.with_for_update(key_share=True)
+            current.update({row.id: row for row in (await db.execute(stmt)).all()})
+
+        deltas = {
+            product_id: counts[product_id] - (row.stock or 0)
+            for product_id, row in current.items()
+            if counts[product_id] != (row.stock or 0)
+        }
+        if not dry_run:
+            for chunk in _chunks(sorted(deltas), _BULK_CHUNK_SIZE):
+                await self.apply_movements(
+                    db,
+                    store_id=store_id,
+                    user_id=user_id,
+                    deltas={product_id: deltas[product_id] for product_id in chunk},
+                    movement_type=MovementType.ADJUSTMENT,
+                    reason=reason
+                )
+
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "barcode": row.barcode,
+                "previous_stock": row.stock or 0,
+                "counted_stock": counts[row.id],
+            }
+            for row in current.values()
+        ]
+
+    async def adjust_stock(
+        self, db: AsyncSession, *, product_id: int, new_stock_level: int, user: User, reason: str
+    ) -> Optional[StockMovement]:
         """
         Ajusta o estoque de um produto para um valor específico (para inventário).
+        A linha fica travada entre a leitura do estoque atual e o UPDATE, de modo que
+        a diferença registrada na movimentação considera vendas concorrentes.
         """
-        product = db.get(Product, product_id)
-        if not product:
+        current_stock = (await db.execute(
+            select(Product.stock)
+            .where(Product.id == product_id, Product.store_id == user.store_id)
+            .with_for_update(key_share=True)
+        )).first()
+        if current_stock is None:
             return None
-            
-        quantity_change = new_stock_level - product.stock
 
-        return self._create_stock_movement(
-            db=db,
-            product=product,
+        quantity_change = new_stock_level - (current_stock.stock or 0)
+        updated = await self._apply_stock_deltas(
+            db, store_id=user.store_id, deltas={product_id: quantity_change}
+        )
+
+        movement = StockMovement(
+            product_id=product_id,
             user_id=user.id,
-            quantity_change=quantity_change,
             movement_type=MovementType.ADJUSTMENT,
-            reason=reason
+            quantity=quantity_change,
+            stock_after_movement=updated[product_id].stock,
+            reason=reason,
+            store_id=user.store_id
         )
+        db.add(movement)
+        return movement
 
-stock_service = StockService()
\ No newline at end of file
+stock_service = StockService()
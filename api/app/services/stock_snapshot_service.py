@@ -0,0 +1,337 @@
+# api/app/services/stock_snapshot_service.py
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from loguru import logger
+
+from app.core.config import settings
+from app.crud.crud_product import product as crud_product
+from app.db.session import AsyncSessionLocal
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, MovementType
+from app.models.stock_snapshot import StockSnapshot
+
+# Coluna do fechamento que soma cada tipo de movimentação.
+_TYPE_COLUMNS = {
+    MovementType.SALE: "sales",
+    MovementType.PURCHASE: "purchases",
+    MovementType.ADJUSTMENT: "adjustments",
+    MovementType.RETURN: "returns",
+}
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+class StockSnapshotService:
+    """
+    Fechamentos diários de estoque (stock_snapshots) e consultas sobre o livro de movimentações.
+
+    Uma tarefa de fundo grava, para cada loja, o fechamento de cada dia encerrado: estoque
+    de cada produto ao fim do dia e as movimentações do dia somadas por tipo. Os dias são
+    fechados em sequência a partir do último fechamento, então os fechamentos de uma loja
+    não têm lacunas. As consultas partem do fechamento mais próximo e leem do livro apenas
+    as movimentações entre ele e o instante pedido (no máximo um dia, se os fechamentos
+    estiverem em dia), em vez de percorrer todo o histórico.
+    """
+
+    async def create_snapshot(self, db: AsyncSession, *, store_id: int, day: date) -> int:
+        """
+        Grava o fechamento do dia para os produtos da loja (sem commit; idempotente) e retorna
+        o número de linhas gravadas. O estoque ao fim do dia é o atual menos as movimentações
+        posteriores, o que também vale para produtos cadastrados com estoque inicial sem movimentação.
+        """
+        day_end = _day_start(day + timedelta(days=1))
+        later = (
+            select(StockMovement.product_id, func.sum(StockMovement.quantity).label("quantity"))
+            .where(StockMovement.store_id == store_id, StockMovement.created_at >= day_end)
+            .group_by(StockMovement.product_id)
+            .subquery("later_movements")
+        )
+        day_totals = (
+            select(
+                StockMovement.product_id,
+                *(
+                    func.sum(StockMovement.quantity).filter(StockMovement.movement_type == movement_type).label(name)
+                    for movement_type, name in _TYPE_COLUMNS.items()
+                )
+            )
+            .where(
+                StockMovement.store_id == store_id,
+                StockMovement.created_at >= _day_start(day),
+                StockMovement.created_at < day_end
+            )
+            .group_by(StockMovement.product_id)
+            .subquery("day_totals")
+        )
+        source = (
+            select(
+                Product.store_id,
+                literal(day, Date).label("snapshot_date"),
+                Product.id.label("product_id"),
+                (Product.stock - func.coalesce(later.c.quantity, 0)).label("stock"),
+                *(func.coalesce(day_totals.c[name], 0).label(name) for name in _TYPE_COLUMNS.values())
+            )
+            .outerjoin(later, later.c.product_id == Product.id)
+            .outerjoin(day_totals, day_totals.c.product_id == Product.id)
+            .where(Product.store_id == store_id, Product.created_at < day_end)
+        )
+        stmt = (
+            pg_insert(StockSnapshot)
+            .from_select(["store_id", "snapshot_date", "product_id", "stock", *_TYPE_COLUMNS.values()], source)
+            .on_conflict_do_nothing(constraint="uq_stock_snapshots_key")
+        )
+        return (await db.execute(stmt)).rowcount or 0
+
+    async def snapshot_pending_days(self, db: AsyncSession) -> int:
+        """
+        Fecha, em cada loja, os dias encerrados ainda sem fechamento (um commit por dia).
+        Na primeira execução de uma loja fecha apenas o dia anterior.
+        """
+        yesterday = date.today() - timedelta(days=1)
+        store_ids = (await db.execute(select(Product.store_id).distinct())).scalars().all()
+        last_dates = dict((await db.execute(
+            select(StockSnapshot.store_id, func.max(StockSnapshot.snapshot_date)).group_by(StockSnapshot.store_id)
+        )).all())
+
+        written = 0
+        for store_id in store_ids:
+            last_date = last_dates.get(store_id)
+            day = last_date + timedelta(days=1) if last_date else yesterday
+            while day <= yesterday:
+                written += await self.create_snapshot(db, store_id=store_id, day=day)
+                await db.commit()
+                day += timedelta(days=1)
+        return written
+
+    async def run_snapshot_loop(self) -> None:
+        """ Tarefa de fundo iniciada com a aplicação: grava os fechamentos pendentes periodicamente. """
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    written = await self.snapshot_pending_days(db)
+                if written:
+                    logger.info(f"Fechamentos de estoque gravados: {written} linha(s).")
+            except Exception as e:
+                logger.error(f"Falha ao gravar os fechamentos de estoque: {e}")
+            await asyncio.sleep(settings.STOCK_SNAPSHOT_INTERVAL_SECONDS)
+
+    async def _net_movements(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        product_ids: Sequence[int],
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> Dict[int, int]:
+        """ Soma das movimentações de cada produto em [start, end) (sem fim: até agora). """
+        stmt = (
+            select(StockMovement.product_id, func.sum(StockMovement.quantity))
+            .where(
+                StockMovement.store_id == store_id,
+                StockMovement.product_id.in_(product_ids),
+                StockMovement.created_at >= start
+            )
+            .group_by(StockMovement.product_id)
+        )
+        if end is not None:
+            stmt = stmt.where(StockMovement.created_at < end)
+        return {product_id: int(total or 0) for product_id, total in (await db.execute(stmt)).all()}
+
+    async def _snapshot_stock(
+        self, db: AsyncSession, *, store_id: int, snapshot_date: date, product_ids: Sequence[int]
+    ) -> Dict[int, int]:
+        result = await db.execute(
+            select(StockSnapshot.product_id, StockSnapshot.stock).where(
+                StockSnapshot.store_id == store_id,
+                StockSnapshot.snapshot_date == snapshot_date,
+                StockSnapshot.product_id.in_(product_ids)
+            )
+        )
+        return dict(result.all())
+
+    async def stock_as_of(
+        self, db: AsyncSession, *, store_id: int, at: datetime, product_ids: Sequence[int]
+    ) -> Dict[int, int]:
+        """
+        Estoque de cada produto no instante `at`. Parte do fechamento anterior mais próximo e
+        soma as movimentações até `at`; para produtos sem ele, parte do fechamento seguinte
+        (ou, na falta deste, do estoque atual) e desfaz as movimentações a partir de `at`.
+        """
+        if not product_ids:
+            return {}
+        stock: Dict[int, int] = {}
+
+        previous_date = (await db.execute(
+            select(func.max(StockSnapshot.snapshot_date))
+            .where(StockSnapshot.store_id == store_id, StockSnapshot.snapshot_date < at.date())
+        )).scalar()
+        if previous_date is not None:
+            stock = await self._snapshot_stock(db, store_id=store_id, snapshot_date=previous_date, product_ids=product_ids)
+            if stock:
+                forward = await self._net_movements(
+                    db, store_id=store_id, product_ids=list(stock), start=_day_start(previous_date + timedelta(days=1)), end=at
+                )
+                for product_id, quantity in forward.items():
+                    stock[product_id] += quantity
+
+        missing = [product_id for product_id in product_ids if product_id not in stock]
+        if missing:
+            next_date = (await db.execute(
+                select(func.min(StockSnapshot.snapshot_date))
+                .where(StockSnapshot.store_id == store_id, StockSnapshot.snapshot_date >= at.date())
+            )).scalar()
+            if next_date is not None:
+                later = await self._snapshot_stock(db, store_id=store_id, snapshot_date=next_date, product_ids=missing)
+                end = _day_start(next_date + timedelta(days=1))
+            else:
+                later = dict((await db.execute(
+                    select(Product.id, Product.stock).where(Product.id.in_(missing), Product.store_id == store_id)
+                )).all())
+                end = None
+            if later:
+                backward = await self._net_movements(db, store_id=store_id, product_ids=list(later), start=at, end=end)
+                for product_id, quantity in later.items():
+                    stock[product_id] = quantity - backward.get(product_id, 0)
+        return stock
+
+    async def movement_totals(
+        self, db: AsyncSession, *, store_id: int, start_date: date, end_date: date, product_ids: Sequence[int]
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Movimentações de cada produto nos dias [start_date, end_date], somadas por tipo.
+        Os dias com fechamento vêm das somas gravadas nele; só os demais (tipicamente o dia
+        atual) são lidos do livro.
+        """
+        totals = {product_id: dict.fromkeys(_TYPE_COLUMNS.values(), 0) for product_id in product_ids}
+        if not product_ids:
+            return totals
+
+        first_closed, last_closed = (await db.execute(
+            select(func.min(StockSnapshot.snapshot_date), func.max(StockSnapshot.snapshot_date)).where(
+                StockSnapshot.store_id == store_id,
+                StockSnapshot.snapshot_date >= start_date,
+                StockSnapshot.snapshot_date <= end_date
+            )
+        )).one()
+
+        ledger_ranges: List[Tuple[date, date]] = []
+        if first_closed is None:
+            ledger_ranges.append((start_date, end_date))
+        else:
+            result = await db.execute(
+                select(
+                    StockSnapshot.product_id,
+                    *(func.sum(getattr(StockSnapshot, name)).label(name) for name in _TYPE_COLUMNS.values())
+                )
+                .where(
+                    StockSnapshot.store_id == store_id,
+                    StockSnapshot.product_id.in_(product_ids),
+                    StockSnapshot.snapshot_date >= first_closed,
+                    StockSnapshot.snapshot_date <= last_closed
+                )
+                .group_by(StockSnapshot.product_id)
+            )
+            for row in result.mappings():
+                for name in _TYPE_COLUMNS.values():
+                    totals[row["product_id"]][name] += int(row[name] or 0)
+            if start_date < first_closed:
+                ledger_ranges.append((start_date, first_closed - timedelta(days=1)))
+            if last_closed < end_date:
+                ledger_ranges.append((last_closed + timedelta(days=1), end_date))
+
+        for range_start, range_end in ledger_ranges:
+            result = await db.execute(
+                select(StockMovement.product_id, StockMovement.movement_type, func.sum(StockMovement.quantity))
+                .where(
+                    StockMovement.store_id == store_id,
+                    StockMovement.product_id.in_(product_ids),
+                    StockMovement.created_at >= _day_start(range_start),
+                    StockMovement.created_at < _day_start(range_end + timedelta(days=1))
+                )
+                .group_by(StockMovement.product_id, StockMovement.movement_type)
+            )
+            for product_id, movement_type, quantity in result.all():
+                totals[product_id][_TYPE_COLUMNS[movement_type]] += int(quantity or 0)
+        return totals
+
+    async def _products_page(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        created_before: datetime,
+        product_id: Optional[int],
+        cursor: Optional[str],
+        limit: int
+    ) -> Tuple[List[Any], Optional[str]]:
+        """ Página de produtos (id, nome) por ID, apenas os já cadastrados no instante informado. """
+        stmt = select(Product.id, Product.name).where(Product.store_id == store_id, Product.created_at < created_before)
+        if product_id is not None:
+            stmt = stmt.where(Product.id == product_id)
+        return await crud_product.paginate(db, stmt, order_by=[], cursor=cursor, limit=limit, entities=False)
+
+    async def get_stock_as_of_page(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        at: datetime,
+        product_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """ Estoque dos produtos da loja no instante `at`, paginado por ID do produto. """
+        products, next_cursor = await self._products_page(
+            db, store_id=store_id, created_before=at, product_id=product_id, cursor=cursor, limit=limit
+        )
+        stock = await self.stock_as_of(db, store_id=store_id, at=at, product_ids=[p.id for p in products])
+        return [
+            {"product_id": p.id, "product_name": p.name, "stock": stock.get(p.id, 0)}
+            for p in products
+        ], next_cursor
+
+    async def get_summary_page(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        start_date: date,
+        end_date: date,
+        product_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Resumo do período por produto: estoque no início de `start_date`, movimentações do
+        período por tipo e estoque ao fim de `end_date`. Paginado por ID do produto.
+        """
+        period_end = _day_start(end_date + timedelta(days=1))
+        products, next_cursor = await self._products_page(
+            db, store_id=store_id, created_before=period_end, product_id=product_id, cursor=cursor, limit=limit
+        )
+        product_ids = [p.id for p in products]
+        opening = await self.stock_as_of(db, store_id=store_id, at=_day_start(start_date), product_ids=product_ids)
+        closing = await self.stock_as_of(db, store_id=store_id, at=period_end, product_ids=product_ids)
+        totals = await self.movement_totals(
+            db, store_id=store_id, start_date=start_date, end_date=end_date, product_ids=product_ids
+        )
+        return [
+            {
+                "product_id": p.id,
+                "product_name": p.name,
+                "opening_stock": opening.get(p.id, 0),
+                **totals[p.id],
+                "closing_stock": closing.get(p.id, 0),
+            }
+            for p in products
+        ], next_cursor
+
+stock_snapshot_service = StockSnapshotService()
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import time
 from loguru import logger
 
@@ -7,7 +8,8 @@ from loguru import logger
 # Importa a Base e todos os modelos para garantir que o SQLAlchemy
 # os conheça quando a aplicação iniciar.
 from app.db.base import Base
-from app.models import payment, user, product, customer, supplier, sale, cash_register, ingredient, recipe, additional, batch, table, order
+from app.db.session import async_engine, read_engine
+from app.models import payment, user, product, customer, supplier, sale, cash_register, ingredient, recipe, additional, batch, table, order, sales_rollup, idempotency, ingredient_movement, stock_snapshot, floor_version
 
 # Importa as novas configurações
 from app.core.logging_config import setup_logging
@@ -15,6 +17,11 @@ from app.core.exception_handler import global_exception_handler
 # --- FIM DA CORREÇÃO ---
 
 from app.api.api import api_router
+from app.services.idempotency_service import idempotency_service
+from app.services.product_lookup_service import product_lookup_service
+from app.services.report_job_service import report_job_service
+from app.services.stock_snapshot_service import stock_snapshot_service
+from app.services.analytics_service import analytics_service
 
 # --- INÍCIO DA CORREÇÃO ---
 # Configura o logging antes de criar a instância do app
@@ -66,8 +73,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lidos pelo cliente: versão do mapa de mesas e cursor da próxima página das listagens.
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Tarefas periódicas de manutenção executadas junto com a API
+_background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    _background_tasks.append(asyncio.create_task(idempotency_service.run_cleanup_loop()))
+    _background_tasks.append(asyncio.create_task(product_lookup_service.warm_up()))
+    _background_tasks.append(asyncio.create_task(stock_snapshot_service.run_snapshot_loop()))
+    _background_tasks.append(asyncio.create_task(analytics_service.run_nightly_refresh()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
+    report_job_service.shutdown()
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    await async_engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+
 # Inclui o roteador principal da API, prefixado com /api/v1
 app.include_router(api_router, prefix="/api/v1")
 
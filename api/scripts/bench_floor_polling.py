@@ -0,0 +1,157 @@
+# api/scripts/bench_floor_polling.py
+"""
+Benchmark da sincronização do mapa de mesas: tablets consultando GET /tables e
+GET /tables/changes em paralelo enquanto o salão é alterado.
+
+Semeia uma loja com --tables mesas (parte delas com comanda aberta e itens) no banco de
+DATABASE_URL e dispara --pollers clientes contra uma API já em execução no mesmo banco,
+de preferência com vários workers para exercitar a versão compartilhada, por exemplo:
+
+    DATABASE_URL=... SECRET_KEY=... uvicorn main:app --workers 4 --port 8000
+    DATABASE_URL=... SECRET_KEY=... python -m scripts.bench_floor_polling --base-url http://127.0.0.1:8000
+
+Cada modo roda por --duration segundos, com um cliente extra alterando uma mesa a cada
+--write-interval segundos:
+  full     GET /tables sem If-None-Match (o mapa completo em toda consulta)
+  etag     GET /tables com If-None-Match (304 enquanto a versão não muda)
+  changes  GET /tables/changes com since_version (só as mesas alteradas)
+"""
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import httpx
+
+from app.core import security
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models import payment, user, product, customer, supplier, sale, cash_register, ingredient, recipe, additional, batch, table, order, sales_rollup, idempotency, ingredient_movement, stock_snapshot, floor_version
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.store import Store
+from app.models.table import Table
+from app.models.user import User
+from app.schemas.enums import OrderStatus, OrderType, TableStatus, UserRole
+
+
+async def seed(table_count: int) -> Tuple[List[int], str]:
+    """ Loja nova com `table_count` mesas (um terço ocupadas, com 4 itens cada). Retorna os IDs e o token. """
+    suffix = secrets.token_hex(4)
+    async with AsyncSessionLocal() as db:
+        store = Store(name=f"Benchmark {suffix}", address="Benchmark")
+        db.add(store)
+        await db.flush()
+        manager = User(
+            full_name=f"Benchmark {suffix}", email=f"benchmark-{suffix}@example.com",
+            hashed_password="!", role=UserRole.MANAGER, store_id=store.id
+        )
+        products = [Product(name=f"Produto {i}", price=10.0 + i, stock=1000, store_id=store.id) for i in range(20)]
+        db.add(manager)
+        db.add_all(products)
+        await db.flush()
+
+        tables = []
+        for i in range(table_count):
+            occupied = i % 3 == 0
+            tables.append(Table(
+                number=str(i + 1), store_id=store.id, pos_x=(i % 20) * 60, pos_y=(i // 20) * 60,
+                status=TableStatus.OCCUPIED if occupied else TableStatus.AVAILABLE
+            ))
+        db.add_all(tables)
+        await db.flush()
+        for i, db_table in enumerate(tables):
+            if db_table.status != TableStatus.OCCUPIED:
+                continue
+            db_order = Order(
+                store_id=store.id, user_id=manager.id, table_id=db_table.id,
+                status=OrderStatus.OPEN, order_type=OrderType.DINE_IN
+            )
+            db.add(db_order)
+            await db.flush()
+            db.add_all([
+                OrderItem(order_id=db_order.id, product_id=products[(i + k) % len(products)].id,
+                          quantity=1 + k, price_at_order=products[(i + k) % len(products)].price)
+                for k in range(4)
+            ])
+        await db.commit()
+        token = security.create_access_token({"sub": str(manager.id), "ver": manager.token_version})
+        return [t.id for t in tables], token
+
+
+def summarize(name: str, latencies: List[float], statuses: Counter, sizes: List[int], elapsed: float) -> str:
+    if not latencies:
+        return f"{name:8} sem requisições"
+    ordered = sorted(latencies)
+    percentile = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return (
+        f"{name:8} {len(latencies):7d} req  {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50 {statistics.median(ordered):7.1f}ms  p95 {percentile(0.95):7.1f}ms  p99 {percentile(0.99):7.1f}ms  "
+        f"resposta média {statistics.mean(sizes) / 1024:6.1f} KiB  status {dict(sorted(statuses.items()))}"
+    )
+
+
+async def run_mode(mode: str, args: argparse.Namespace, table_ids: List[int], headers: Dict[str, str]) -> str:
+    latencies: List[float] = []
+    sizes: List[int] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.pollers + 1)
+
+    async with httpx.AsyncClient(base_url=f"{args.base_url}/api/v1", headers=headers, limits=limits, timeout=30) as client:
+        async def poller() -> None:
+            etag, version = None, None
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                if mode == "changes":
+                    params = {"since_version": version} if version else {}
+                    response = await client.get("/tables/changes", params=params)
+                    if response.status_code == 200:
+                        version = response.json()["version"]
+                else:
+                    extra = {"If-None-Match": etag} if mode == "etag" and etag else {}
+                    response = await client.get("/tables/", headers=extra)
+                    etag = response.headers.get("ETag", etag)
+                latencies.append((time.perf_counter() - started) * 1000)
+                sizes.append(len(response.content))
+                statuses[response.status_code] += 1
+                if args.poll_interval:
+                    await asyncio.sleep(args.poll_interval)
+
+        async def writer() -> None:
+            i = 0
+            while time.perf_counter() < deadline:
+                table_id = table_ids[(i * 7) % len(table_ids)]
+                await client.put(f"/tables/{table_id}", json={"capacity": 2 + i % 6})
+                i += 1
+                await asyncio.sleep(args.write_interval)
+
+        started = time.perf_counter()
+        await asyncio.gather(writer(), *(poller() for _ in range(args.pollers)))
+        return summarize(mode, latencies, statuses, sizes, time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--pollers", type=int, default=30)
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos por modo")
+    parser.add_argument("--poll-interval", type=float, default=0.0, help="pausa entre consultas de cada cliente (0 = contínuo)")
+    parser.add_argument("--write-interval", type=float, default=0.5)
+    parser.add_argument("--modes", default="full,etag,changes")
+    args = parser.parse_args()
+
+    table_ids, token = await seed(args.tables)
+    await async_engine.dispose()
+    headers = {"Authorization": f"Bearer {token}"}
+    print(f"{args.tables} mesas, {args.pollers} clientes, {args.duration:.0f}s por modo, "
+          f"1 alteração a cada {args.write_interval}s")
+    for mode in args.modes.split(","):
+        print(await run_mode(mode, args, table_ids, headers))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
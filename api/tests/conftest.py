@@ -0,0 +1,146 @@
+# api/tests/conftest.py
+"""
+Testes de integração contra um PostgreSQL real.
+
+Defina TEST_DATABASE_URL apontando para um banco descartável, por exemplo:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/vrsales_test python -m pytest
+
+O esquema é recriado a partir dos modelos no início da sessão (as migrações do projeto
+partem de duas revisões iniciais independentes e não constroem um banco vazio). Sem a
+variável, os testes que usam o banco são ignorados. Os benchmarks (marcador `benchmark`) semeiam
+volumes grandes e só rodam com RUN_BENCHMARKS=1.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+# Antes de importar a aplicação: o engine é criado a partir de DATABASE_URL no import.
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+
+# Linhas de resultado dos benchmarks, exibidas no resumo final do pytest.
+_benchmark_results = []
+
+
+def pytest_collection_modifyitems(config, items):
+    run_benchmarks = os.getenv("RUN_BENCHMARKS") == "1"
+    for item in items:
+        if not TEST_DATABASE_URL and "app" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.skip(reason="TEST_DATABASE_URL não definida"))
+        elif "benchmark" in item.keywords and not run_benchmarks:
+            item.add_marker(pytest.mark.skip(reason="benchmark: defina RUN_BENCHMARKS=1"))
+
+
+async def _create_schema(connection) -> None:
+    from sqlalchemy import Enum as SQLAlchemyEnum
+    from sqlalchemy.dialects.postgresql import ENUM
+    from app.db.base import Base
+
+    await connection.run_sync(Base.metadata.drop_all)
+    # Vários modelos declaram os tipos ENUM com create_type=False (criados pelas migrações).
+    enum_types = {}
+    for table in Base.metadata.tables.values():
+        for table_column in table.columns:
+            if isinstance(table_column.type, SQLAlchemyEnum) and table_column.type.name:
+                enum_types[table_column.type.name] = table_column.type.enums
+    for name, labels in enum_types.items():
+        await connection.run_sync(lambda sync_conn: ENUM(*labels, name=name).drop(sync_conn, checkfirst=True))
+        await connection.run_sync(lambda sync_conn: ENUM(*labels, name=name).create(sync_conn))
+    await connection.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture(scope="session")
+async def app():
+    import main
+    from app.db.session import async_engine
+
+    async with async_engine.begin() as connection:
+        await _create_schema(connection)
+    yield main.app
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def db(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(app):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as http_client:
+        yield http_client
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _benchmark_results:
+        terminalreporter.section("benchmarks")
+        for line in _benchmark_results:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture
+def measure():
+    """
+    Mede uma corrotina: `await measure(nome, fn, runs=...)` executa `fn()` algumas vezes para
+    aquecer, depois `runs` vezes, registra mediana/p95/mínimo no resumo e retorna a mediana (ms).
+    """
+    async def run(name, fn, *, runs: int = 30, warmup: int = 3) -> float:
+        for _ in range(warmup):
+            await fn()
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        median = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+        _benchmark_results.append(
+            f"{name:60} mediana {median:9.3f}ms  p95 {p95:9.3f}ms  mín {timings[0]:9.3f}ms  ({runs} execuções)"
+        )
+        return median
+
+    return run
+
+
+@pytest.fixture
+def benchmark_note():
+    """ Registra uma linha livre no resumo dos benchmarks (volume semeado, contagens etc.). """
+    return _benchmark_results.append
+
+
+@pytest.fixture
+def count_queries(app):
+    """ `with count_queries() as counter:` conta os comandos enviados ao banco (counter.count). """
+    from sqlalchemy import event
+    from app.db.session import async_engine
+
+    class Counter:
+        count = 0
+
+    @contextmanager
+    def counting():
+        counter = Counter()
+
+        def before_cursor_execute(*args):
+            counter.count += 1
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return counting
@@ -0,0 +1,107 @@
+# api/tests/factories.py
+""" Criação dos registros básicos usados pelos testes (cada teste usa a sua própria loja). """
+import secrets
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.models.cash_register import CashRegister, CashRegisterStatus
+from app.models.product import Product
+from app.models.store import Store
+from app.models.user import User
+from app.schemas.enums import UserRole
+
+
+async def create_store(db: AsyncSession, *, with_open_register: bool = True) -> Tuple[Store, User, Dict[str, str]]:
+    """ Loja com um gerente (e, por padrão, um caixa aberto). Retorna também o cabeçalho de autenticação. """
+    suffix = secrets.token_hex(4)
+    store = Store(name=f"Loja {suffix}", address="Rua de Teste, 1")
+    db.add(store)
+    await db.flush()
+    user = User(
+        full_name=f"Gerente {suffix}",
+        email=f"gerente-{suffix}@example.com",
+        hashed_password="!",
+        role=UserRole.MANAGER,
+        store_id=store.id,
+    )
+    db.add(user)
+    await db.flush()
+    if with_open_register:
+        db.add(CashRegister(store_id=store.id, user_id=user.id, opening_balance=0, status=CashRegisterStatus.OPEN))
+    await db.commit()
+    token = security.create_access_token({"sub": str(user.id), "ver": user.token_version})
+    return store, user, {"Authorization": f"Bearer {token}"}
+
+
+async def create_product(db: AsyncSession, *, store: Store, stock: int = 0, **fields: Any) -> Product:
+    product = Product(
+        name=fields.pop("name", f"Produto {secrets.token_hex(3)}"),
+        price=fields.pop("price", 10.0),
+        stock=stock,
+        store_id=store.id,
+        **fields,
+    )
+    db.add(product)
+    await db.commit()
+    return product
+
+
+async def seed_sales(
+    db: AsyncSession,
+    *,
+    store: Store,
+    user: User,
+    product_ids: Sequence[int],
+    sales: int,
+    days: int,
+    items_per_sale: int = 3,
+    end: Optional[datetime] = None,
+) -> None:
+    """
+    Semeia `sales` vendas distribuídas uniformemente nos `days` dias anteriores a `end`, cada
+    uma com `items_per_sale` itens e um pagamento, direto em SQL (INSERT ... SELECT
+    generate_series) para volumes de benchmark. Não atualiza estoque nem rollups.
+    """
+    end = end or datetime.now()
+    first_id, last_id = (await db.execute(text("""
+        WITH inserted AS (
+            INSERT INTO sales (total_amount, payment_method, user_id, store_id, created_at, updated_at)
+            SELECT 0, 'cash', :user_id, :store_id, ts, ts
+            FROM (
+                SELECT CAST(:end AS timestamp) - g * (CAST(:days AS integer) * interval '1 day' / :sales) AS ts
+                FROM generate_series(1, :sales) AS g
+            ) AS generated
+            RETURNING id
+        )
+        SELECT min(id), max(id) FROM inserted
+    """), {"user_id": user.id, "store_id": store.id, "end": end, "days": days, "sales": sales})).one()
+    id_range = {"first_id": first_id, "last_id": last_id}
+    await db.execute(text("""
+        INSERT INTO sale_items (quantity, price_at_sale, sale_id, product_id)
+        SELECT 1 + (g + k) % 3, 5 + (g + k) % 20, g,
+               (CAST(:product_ids AS integer[]))[1 + (g * 7 + k) % cardinality(CAST(:product_ids AS integer[]))]
+        FROM generate_series(CAST(:first_id AS integer), :last_id) AS g
+        CROSS JOIN generate_series(0, CAST(:items_per_sale AS integer) - 1) AS k
+    """), {"product_ids": list(product_ids), "items_per_sale": items_per_sale, **id_range})
+    await db.execute(text("""
+        UPDATE sales AS s SET total_amount = totals.total
+        FROM (
+            SELECT sale_id, SUM(quantity * price_at_sale) AS total FROM sale_items
+            WHERE sale_id BETWEEN :first_id AND :last_id
+            GROUP BY sale_id
+        ) AS totals
+        WHERE s.id = totals.sale_id
+    """), id_range)
+    await db.execute(text("""
+        INSERT INTO payments (sale_id, amount, payment_method, status, created_at)
+        SELECT id, total_amount, (ARRAY['cash', 'credit_card', 'pix'])[1 + id % 3], 'completed', created_at
+        FROM sales
+        WHERE id BETWEEN :first_id AND :last_id
+    """), id_range)
+    await db.commit()
+    await db.execute(text("ANALYZE sales, sale_items, payments"))
+    await db.commit()
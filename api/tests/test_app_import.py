@@ -0,0 +1,22 @@
+# api/tests/test_app_import.py
+"""
+A aplicação precisa importar num interpretador novo: código executado na importação de um
+módulo (opções de carregamento, inspeção de mappers) não pode configurar os mappers antes de
+todos os modelos estarem importados. Dentro da sessão do pytest outros módulos já os
+importaram e escondem o problema, por isso a importação roda em um subprocesso.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_main_imports_in_fresh_interpreter():
+    env = {**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY", "test-secret-key")}
+    result = subprocess.run(
+        [sys.executable, "-c", "import main\nfrom sqlalchemy.orm import configure_mappers\nconfigure_mappers()"],
+        cwd=API_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
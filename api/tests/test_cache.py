@@ -0,0 +1,76 @@
+# api/tests/test_cache.py
+""" ResultCache.get_or_set: cálculo único por chave e cancelamento de quem o iniciou. """
+import asyncio
+
+import pytest
+
+from app.core.cache import InMemoryTTLCache, ResultCache
+
+
+def _cache() -> ResultCache:
+    return ResultCache("test", InMemoryTTLCache(maxsize=16, ttl_seconds=60))
+
+
+async def test_concurrent_callers_share_one_computation():
+    cache = _cache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(cache.get_or_set("key", compute) for _ in range(10)))
+    assert results == [1] * 10
+    assert calls == 1
+
+
+async def test_waiters_recompute_when_the_owner_is_cancelled():
+    cache = _cache()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def compute(name):
+        calls.append(name)
+        started.set()
+        await release.wait()
+        return name
+
+    owner = asyncio.create_task(cache.get_or_set("key", lambda: compute("owner")))
+    await started.wait()
+    waiters = [asyncio.create_task(cache.get_or_set("key", lambda i=i: compute(f"waiter-{i}"))) for i in range(3)]
+    await asyncio.sleep(0)
+
+    # A requisição que iniciou o cálculo é cancelada (ex: cliente desconectou).
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    release.set()
+
+    results = await asyncio.gather(*waiters)
+    # Uma das que aguardavam assume o cálculo; as demais recebem o mesmo resultado.
+    assert calls == ["owner", "waiter-0"]
+    assert results == ["waiter-0"] * 3
+
+
+async def test_cancelled_waiter_does_not_cancel_the_computation():
+    cache = _cache()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "value"
+
+    owner = asyncio.create_task(cache.get_or_set("key", compute))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_set("key", compute))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    assert await owner == "value"
+    assert await cache.get_or_set("key", compute) == "value"
@@ -0,0 +1,110 @@
+# api/tests/test_dashboard_benchmark.py
+"""
+Benchmark do resumo do dashboard da loja (DashboardService._compute_dashboard_summary) numa
+loja com 1M de itens de venda em 90 dias: as duas consultas agrupadas atuais contra a
+sequência anterior de cinco consultas (KPIs de hoje e de 7 dias, dois rankings de 30 dias e
+vendas por hora). As duas versões devem devolver o mesmo resumo.
+"""
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.future import select
+
+from app.models.product import Product
+from app.models.sales_rollup import SalesHourlyRollup, SalesProductRollup
+from app.services.dashboard_service import dashboard_service
+from app.services.sales_rollup_service import sales_rollup_service
+from tests.factories import create_product, create_store, seed_sales
+
+pytestmark = pytest.mark.benchmark
+
+SALE_ITEMS = 1_000_000
+ITEMS_PER_SALE = 3
+
+
+async def _legacy_top_products(db, start: datetime, end: datetime, order_by: str, *, store_id: int) -> List[Dict[str, Any]]:
+    stmt = (
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            func.sum(SalesProductRollup.quantity_sold).label("total_quantity_sold"),
+            func.sum(SalesProductRollup.total_revenue).label("total_revenue_generated")
+        )
+        .join(SalesProductRollup, Product.id == SalesProductRollup.product_id)
+        .filter(SalesProductRollup.sale_date >= start.date(), SalesProductRollup.sale_date < end.date())
+        .filter(SalesProductRollup.store_id == store_id)
+        .group_by(Product.id, Product.name)
+        .order_by(
+            func.sum(SalesProductRollup.total_revenue if order_by == "revenue" else SalesProductRollup.quantity_sold).desc(),
+            Product.id
+        )
+        .limit(5)
+    )
+    return [dict(row) for row in (await db.execute(stmt)).mappings().all()]
+
+
+async def _legacy_sales_by_hour(db, start: datetime, end: datetime, *, store_id: int) -> List[Dict[str, Any]]:
+    stmt = (
+        select(SalesHourlyRollup.hour, func.sum(SalesHourlyRollup.transaction_count).label("total_sales"))
+        .filter(SalesHourlyRollup.sale_date >= start.date(), SalesHourlyRollup.sale_date < end.date())
+        .filter(SalesHourlyRollup.store_id == store_id)
+        .group_by(SalesHourlyRollup.hour)
+        .order_by(SalesHourlyRollup.hour)
+    )
+    by_hour = {row["hour"]: row["total_sales"] for row in (await db.execute(stmt)).mappings().all()}
+    return [{"hour": h, "total_sales": by_hour.get(h, 0)} for h in range(24)]
+
+
+async def _legacy_summary(db, *, store_id: int) -> Dict[str, Any]:
+    """ Resumo como era calculado antes: cinco consultas em sequência (histórico do dashboard_service). """
+    today_start = datetime.combine(datetime.utcnow().date(), time.min)
+    today_end = today_start + timedelta(days=1)
+    seven_days_ago = today_start - timedelta(days=7)
+    thirty_days_ago = today_start - timedelta(days=30)
+    return {
+        "kpis_today": await dashboard_service._get_kpis_for_period(db, today_start, today_end, store_id=store_id),
+        "kpis_last_7_days": await dashboard_service._get_kpis_for_period(db, seven_days_ago, today_end, store_id=store_id),
+        "top_5_products_by_revenue_last_30_days": await _legacy_top_products(db, thirty_days_ago, today_end, "revenue", store_id=store_id),
+        "top_5_products_by_quantity_last_30_days": await _legacy_top_products(db, thirty_days_ago, today_end, "quantity", store_id=store_id),
+        "sales_by_hour_today": await _legacy_sales_by_hour(db, today_start, today_end, store_id=store_id),
+    }
+
+
+@pytest.fixture(scope="module")
+async def seeded_store_id(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        store, user, _ = await create_store(db)
+        products = [await create_product(db, store=store, stock=0) for _ in range(200)]
+        await seed_sales(
+            db, store=store, user=user, product_ids=[p.id for p in products],
+            sales=SALE_ITEMS // ITEMS_PER_SALE, items_per_sale=ITEMS_PER_SALE, days=90, end=datetime.utcnow()
+        )
+        await sales_rollup_service.rebuild(db, store_id=store.id)
+        await db.execute(text("ANALYZE sales_hourly_rollups, sales_product_rollups"))
+        await db.commit()
+        return store.id
+
+
+async def test_dashboard_summary_old_vs_new(db, seeded_store_id, measure, benchmark_note):
+    store_id = seeded_store_id
+    current = await dashboard_service._compute_dashboard_summary(db, store_id=store_id)
+    legacy = await _legacy_summary(db, store_id=store_id)
+    assert current["kpis_today"] == pytest.approx(legacy["kpis_today"])
+    assert current["kpis_last_7_days"] == pytest.approx(legacy["kpis_last_7_days"])
+    assert current["sales_by_hour_today"] == legacy["sales_by_hour_today"]
+    for ranking in ("top_5_products_by_revenue_last_30_days", "top_5_products_by_quantity_last_30_days"):
+        assert [p["product_id"] for p in current[ranking]] == [p["product_id"] for p in legacy[ranking]]
+
+    hourly_rows = await db.scalar(select(func.count()).select_from(SalesHourlyRollup).where(SalesHourlyRollup.store_id == store_id))
+    product_rows = await db.scalar(select(func.count()).select_from(SalesProductRollup).where(SalesProductRollup.store_id == store_id))
+    benchmark_note(
+        f"dashboard: {SALE_ITEMS} itens de venda em 90 dias, 200 produtos "
+        f"(rollup horário {hourly_rows} linhas, por produto {product_rows} linhas)"
+    )
+    await measure("dashboard anterior (5 consultas em sequência)", lambda: _legacy_summary(db, store_id=store_id))
+    await measure("dashboard atual (2 consultas agrupadas)", lambda: dashboard_service._compute_dashboard_summary(db, store_id=store_id))
+    await measure("dashboard atual com cache (get_dashboard_summary)", lambda: dashboard_service.get_dashboard_summary(db, store_id=store_id), runs=200)
@@ -0,0 +1,97 @@
+# api/tests/test_fefo.py
+"""
+Consumo FEFO de lotes na venda (StockService.consume_batches_fefo) e filtros do controle de
+validade (GET /batches/expiring): o que vence primeiro sai primeiro, lotes sem validade por
+último, inclusive quando a venda atravessa mais de _FEFO_CHUNK_SIZE lotes.
+"""
+import random
+from datetime import date, timedelta
+
+from sqlalchemy.future import select
+
+from app.models.batch import ProductBatch
+from app.services.stock_service import _FEFO_CHUNK_SIZE
+from tests.factories import create_product, create_store
+
+DATED_BATCHES = _FEFO_CHUNK_SIZE + 8
+UNITS_PER_BATCH = 2
+
+
+def _sale(*items):
+    total = sum(quantity * 10.0 for _, quantity in items)
+    return {
+        "total_amount": total,
+        "items": [{"product_id": product_id, "quantity": quantity, "price_at_sale": 10.0} for product_id, quantity in items],
+        "payments": [{"payment_method": "cash", "amount": total}],
+    }
+
+
+async def _remaining(db, batches):
+    rows = await db.execute(
+        select(ProductBatch.id, ProductBatch.quantity).where(ProductBatch.id.in_([b.id for b in batches]))
+    )
+    quantities = dict(rows.all())
+    return [quantities[batch.id] for batch in batches]
+
+
+async def test_sale_consumes_batches_in_expiration_order(client, db):
+    store, _, headers = await create_store(db)
+    many = await create_product(db, store=store, stock=1000)
+    few = await create_product(db, store=store, stock=1000)
+    today = date.today()
+
+    # Inseridos fora de ordem para que o ID não coincida com a validade.
+    dated = [
+        ProductBatch(store_id=store.id, product_id=many.id, quantity=UNITS_PER_BATCH, expiration_date=today + timedelta(days=day))
+        for day in range(-30, DATED_BATCHES - 30)
+    ]
+    undated = [ProductBatch(store_id=store.id, product_id=many.id, quantity=5, expiration_date=None) for _ in range(2)]
+    few_batches = [
+        ProductBatch(store_id=store.id, product_id=few.id, quantity=3, expiration_date=today + timedelta(days=10)),
+        ProductBatch(store_id=store.id, product_id=few.id, quantity=3, expiration_date=None),
+        ProductBatch(store_id=store.id, product_id=few.id, quantity=3, expiration_date=today - timedelta(days=1)),
+    ]
+    shuffled = [*dated, *undated, *few_batches]
+    random.Random(22).shuffle(shuffled)
+    for batch in shuffled:
+        db.add(batch)
+        await db.flush()
+    await db.commit()
+    # Em ordem FEFO: por validade e, sem validade, por ID.
+    undated.sort(key=lambda batch: batch.id)
+
+    # Controle de validade, antes das vendas.
+    async def expiring(**params):
+        response = await client.get("/batches/expiring", headers=headers, params={"limit": 500, **params})
+        assert response.status_code == 200, response.text
+        return [row["id"] for row in response.json()]
+
+    all_dated = sorted([*dated, few_batches[0], few_batches[2]], key=lambda b: (b.expiration_date, b.id))
+    assert await expiring() == [b.id for b in all_dated]
+    assert await expiring(expired=True) == [b.id for b in all_dated if b.expiration_date < today]
+    assert await expiring(expired=False) == [b.id for b in all_dated if b.expiration_date >= today]
+    assert await expiring(within_days=5) == [b.id for b in all_dated if b.expiration_date <= today + timedelta(days=5)]
+    assert await expiring(within_days=5, expired=False) == [
+        b.id for b in all_dated if today <= b.expiration_date <= today + timedelta(days=5)
+    ]
+
+    # Atravessa mais de um bloco de lotes: os 55 primeiros esgotados e 1 unidade do seguinte.
+    emptied = _FEFO_CHUNK_SIZE + 5
+    response = await client.post("/sales/", headers=headers, json=_sale((many.id, emptied * UNITS_PER_BATCH + 1), (few.id, 4)))
+    assert response.status_code == 201, response.text
+    assert await _remaining(db, dated) == (
+        [0] * emptied + [UNITS_PER_BATCH - 1] + [UNITS_PER_BATCH] * (DATED_BATCHES - emptied - 1)
+    )
+    assert await _remaining(db, undated) == [5, 5]
+    # Vencido primeiro, depois o que vence em 10 dias; o sem validade fica intacto.
+    assert await _remaining(db, few_batches) == [2, 3, 0]
+
+    # Esgota os lotes com validade e passa para os sem validade, em ordem de ID.
+    left_dated = UNITS_PER_BATCH - 1 + UNITS_PER_BATCH * (DATED_BATCHES - emptied - 1)
+    response = await client.post("/sales/", headers=headers, json=_sale((many.id, left_dated + 7)))
+    assert response.status_code == 201, response.text
+    assert await _remaining(db, dated) == [0] * DATED_BATCHES
+    assert await _remaining(db, undated) == [0, 3]
+
+    # Lotes esgotados saem do controle de validade.
+    assert await expiring() == [few_batches[0].id]
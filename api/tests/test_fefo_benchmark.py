@@ -0,0 +1,89 @@
+# api/tests/test_fefo_benchmark.py
+"""
+Benchmark do consumo FEFO de lotes na venda (StockService.consume_batches_fefo) e da listagem
+paginada do controle de validade (GET /batches/expiring), numa loja com milhares de lotes
+por produto.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from tests.factories import create_product, create_store
+
+pytestmark = pytest.mark.benchmark
+
+PRODUCTS_WITH_BATCHES = 20
+BATCHES_PER_PRODUCT = 5000
+UNITS_PER_BATCH = 10
+
+
+@pytest.fixture(scope="module")
+async def batch_store(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        store, _, headers = await create_store(db)
+        with_batches = [await create_product(db, store=store, stock=10_000_000) for _ in range(PRODUCTS_WITH_BATCHES)]
+        without_batches = await create_product(db, store=store, stock=10_000_000)
+        # Validades espalhadas em ±2 anos em torno de hoje, 5% sem validade.
+        await db.execute(text("""
+            INSERT INTO product_batches (store_id, product_id, quantity, expiration_date, created_at)
+            SELECT :store_id, product_id, :units,
+                   CASE WHEN (g * 7919) % 20 = 0 THEN NULL
+                        ELSE CAST(:today AS date) - 730 + ((g * 7919) % 1460) END,
+                   now()
+            FROM unnest(CAST(:product_ids AS integer[])) AS product_id
+            CROSS JOIN generate_series(1, :batches) AS g
+        """), {
+            "store_id": store.id, "units": UNITS_PER_BATCH, "today": date.today(), "batches": BATCHES_PER_PRODUCT,
+            "product_ids": [p.id for p in with_batches],
+        })
+        await db.commit()
+        await db.execute(text("ANALYZE product_batches"))
+        await db.commit()
+        return headers, [p.id for p in with_batches], without_batches.id
+
+
+def _sale(product_id, quantity):
+    total = quantity * 10.0
+    return {
+        "total_amount": total,
+        "items": [{"product_id": product_id, "quantity": quantity, "price_at_sale": 10.0}],
+        "payments": [{"payment_method": "cash", "amount": total}],
+    }
+
+
+async def test_fefo_sale_and_expiring_page(client, batch_store, measure, benchmark_note, count_queries):
+    headers, product_ids, plain_product_id = batch_store
+    benchmark_note(
+        f"FEFO: {PRODUCTS_WITH_BATCHES} produtos x {BATCHES_PER_PRODUCT} lotes "
+        f"({PRODUCTS_WITH_BATCHES * BATCHES_PER_PRODUCT} lotes na loja), {UNITS_PER_BATCH} unidades por lote"
+    )
+
+    cases = [("sem lotes", plain_product_id, 5), ("1 lote", product_ids[0], 5),
+             ("30 lotes, 1 rodada", product_ids[1], 300), ("120 lotes, 3 rodadas", product_ids[2], 1200)]
+    for label, product_id, quantity in cases:
+        with count_queries() as counter:
+            response = await client.post("/sales/", headers=headers, json=_sale(product_id, quantity))
+        assert response.status_code == 201
+        benchmark_note(f"POST /sales/ {quantity} un. ({label}): {counter.count} comando(s) SQL")
+
+    for label, product_id, quantity in cases:
+        async def sell(product_id=product_id, quantity=quantity):
+            assert (await client.post("/sales/", headers=headers, json=_sale(product_id, quantity))).status_code == 201
+        await measure(f"POST /sales/ {quantity} un. ({label})", sell, runs=20)
+
+    async def expiring_page(params):
+        response = await client.get("/batches/expiring", headers=headers, params=params)
+        assert response.status_code == 200
+        return response
+
+    await measure("GET /batches/expiring?limit=100 (1ª página)", lambda: expiring_page({"limit": 100}))
+    await measure("GET /batches/expiring?limit=100&within_days=30", lambda: expiring_page({"limit": 100, "within_days": 30}))
+    # Página profunda: o cursor continua de onde a anterior parou, sem OFFSET.
+    cursor = None
+    for _ in range(200):
+        response = await expiring_page({"limit": 100, **({"cursor": cursor} if cursor else {})})
+        cursor = response.headers["X-Next-Cursor"]
+    await measure("GET /batches/expiring?limit=100 (página 201, por cursor)", lambda: expiring_page({"limit": 100, "cursor": cursor}))
@@ -0,0 +1,59 @@
+# api/tests/test_floor_state.py
+"""
+Versão do mapa de mesas guardada no banco (app/core/floor_state.py): alterações feitas por
+qualquer processo aparecem em GET /tables e /tables/changes, e um rollback não a incrementa.
+"""
+from sqlalchemy.future import select
+
+from app.core.floor_state import floor_state
+from app.models.table import Table
+from tests.factories import create_store
+
+
+async def test_changes_committed_elsewhere_are_visible(client, db):
+    store, _, headers = await create_store(db)
+    created = await client.post("/tables/", headers=headers, json={"number": "1"})
+    assert created.status_code == 201
+    table_id = created.json()["id"]
+
+    listing = await client.get("/tables/", headers=headers)
+    etag = listing.headers["ETag"]
+    synced = await client.get("/tables/changes", headers=headers)
+    version = synced.json()["version"]
+
+    # Outra sessão (como outro worker da API faria) altera a mesa.
+    table = await db.scalar(select(Table).where(Table.id == table_id))
+    table.capacity = 8
+    floor_state.touch(db, store.id, [table_id])
+    await db.commit()
+
+    refreshed = await client.get("/tables/", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+
+    delta = await client.get("/tables/changes", headers=headers, params={"since_version": version})
+    body = delta.json()
+    assert body["full"] is False
+    assert [t["id"] for t in body["tables"]] == [table_id]
+    assert body["tables"][0]["capacity"] == 8
+
+    unchanged = await client.get("/tables/changes", headers=headers, params={"since_version": body["version"]})
+    assert unchanged.status_code == 304
+
+
+async def test_rollback_does_not_bump_the_version(client, db):
+    store, _, headers = await create_store(db)
+    store_id = store.id
+    created = await client.post("/tables/", headers=headers, json={"number": "1"})
+    version = await floor_state.version(db, store_id)
+
+    floor_state.touch(db, store_id, [created.json()["id"]])
+    await db.rollback()
+    # O que ficou pendente na sessão foi descartado: o próximo commit não incrementa a versão.
+    await db.commit()
+    assert await floor_state.version(db, store_id) == version
+
+    deleted = await client.delete(f"/tables/{created.json()['id']}", headers=headers)
+    assert deleted.status_code == 200
+    delta = await client.get("/tables/changes", headers=headers, params={"since_version": str(version)})
+    assert delta.json()["removed_ids"] == [created.json()["id"]]
@@ -0,0 +1,117 @@
+# api/tests/test_forecast_benchmark.py
+"""
+Benchmark da previsão de demanda e das sugestões de compra (AnalyticsService) numa loja com
+50 mil SKUs e FORECAST_HISTORY_DAYS dias de vendas no rollup por produto: leitura da matriz,
+cálculo com NumPy (_build_forecast), cruzamento com o estoque (_score) e a consulta completa,
+com a previsão fria e em cache.
+"""
+import asyncio
+import statistics
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import Date, func, literal, text
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.product import Product
+from app.models.sales_rollup import SalesProductRollup
+from app.services.analytics_service import analytics_service, forecast_cache, _build_forecast, _score
+from tests.factories import create_store
+
+pytestmark = pytest.mark.benchmark
+
+SKUS = 50_000
+
+
+@pytest.fixture(scope="module")
+async def forecast_store(app):
+    from app.db.session import AsyncSessionLocal
+
+    days = settings.FORECAST_HISTORY_DAYS
+    history_end = date.today() - timedelta(days=1)
+    async with AsyncSessionLocal() as db:
+        store, _, headers = await create_store(db)
+        await db.execute(text("""
+            INSERT INTO products (name, price, stock, low_stock_threshold, product_type, store_id, created_at, updated_at)
+            SELECT 'Produto ' || g, 10, g % 120, 10, 'SIMPLE', :store_id, now(), now()
+            FROM generate_series(1, :skus) AS g
+        """), {"store_id": store.id, "skus": SKUS})
+        # Cada produto vende em cerca de metade dos dias, 1 a 12 unidades por dia.
+        await db.execute(text("""
+            INSERT INTO sales_product_rollups (store_id, sale_date, product_id, quantity_sold, total_revenue)
+            SELECT :store_id, CAST(:history_end AS date) - d, p.id,
+                   1 + (CAST(p.id AS bigint) * 31 + d * 7) % 12, 10 * (1 + (CAST(p.id AS bigint) * 31 + d * 7) % 12)
+            FROM products AS p
+            CROSS JOIN generate_series(0, :days - 1) AS d
+            WHERE p.store_id = :store_id AND (CAST(p.id AS bigint) * 13 + d * 17) % 100 < 50
+        """), {"store_id": store.id, "history_end": history_end, "days": days})
+        await db.commit()
+        await db.execute(text("ANALYZE products, sales_product_rollups"))
+        await db.commit()
+        return store.id, headers
+
+
+async def test_forecast_and_purchase_suggestions(db, client, forecast_store, measure, benchmark_note):
+    store_id, headers = forecast_store
+    days = settings.FORECAST_HISTORY_DAYS
+    history_end = date.today() - timedelta(days=1)
+    start = history_end - timedelta(days=days - 1)
+
+    product_ids = (await db.execute(select(func.array_agg(Product.id)).where(Product.store_id == store_id))).scalar()
+    rows_query = (
+        select(
+            func.array_agg(SalesProductRollup.product_id),
+            func.array_agg(SalesProductRollup.sale_date - literal(start, Date)),
+            func.array_agg(SalesProductRollup.quantity_sold)
+        )
+        .where(
+            SalesProductRollup.store_id == store_id,
+            SalesProductRollup.sale_date >= start,
+            SalesProductRollup.sale_date <= history_end
+        )
+    )
+    row_ids, day_index, quantities = (await db.execute(rows_query)).one()
+    products = (await db.execute(
+        select(
+            func.array_agg(Product.id), func.array_agg(Product.name),
+            func.array_agg(Product.stock), func.array_agg(Product.low_stock_threshold)
+        ).where(Product.store_id == store_id)
+    )).one()
+    benchmark_note(f"previsão de demanda: {len(product_ids)} SKUs x {days} dias, {len(row_ids)} linhas no rollup")
+
+    # Conferência de um produto contra o cálculo direto.
+    forecast = _build_forecast(product_ids, row_ids, day_index, quantities, start, days)
+    sample_id = sorted(product_ids)[123]
+    daily = [0.0] * days
+    for product_id, day, quantity in zip(row_ids, day_index, quantities):
+        if product_id == sample_id:
+            daily[day] += quantity
+    position = int(forecast.product_ids.searchsorted(sample_id))
+    window = daily[-settings.FORECAST_MOVING_AVERAGE_DAYS:]
+    assert forecast.moving_average[position] == pytest.approx(statistics.fmean(window))
+    assert forecast.std[position] == pytest.approx(statistics.pstdev(window))
+    assert forecast.sales_last_30_days[position] == pytest.approx(sum(daily[-30:]))
+
+    suggestions = _score(forecast, *products)
+    assert suggestions
+    covers = [s["days_of_cover"] for s in suggestions if s["days_of_cover"] is not None]
+    assert covers == sorted(covers)
+    benchmark_note(f"{len(suggestions)} sugestões de compra")
+
+    async def in_executor(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    await measure("matriz do rollup (1 consulta, colunas em arrays)", lambda: db.execute(rows_query), runs=10, warmup=1)
+    await measure(f"_build_forecast ({SKUS} SKUs, NumPy no pool)", lambda: in_executor(_build_forecast, product_ids, row_ids, day_index, quantities, start, days), runs=10, warmup=1)
+    await measure(f"_score ({SKUS} SKUs, NumPy no pool)", lambda: in_executor(_score, forecast, *products), runs=10, warmup=1)
+    await measure("previsão fria (_load_forecast: consultas + cálculo)", lambda: analytics_service._load_forecast(store_id), runs=10, warmup=1)
+
+    forecast_cache.invalidate(("forecast", store_id))
+    await analytics_service.get_forecast(store_id=store_id)
+    await measure("get_purchase_suggestions com previsão em cache", lambda: analytics_service.get_purchase_suggestions(db, store_id=store_id), runs=10, warmup=1)
+
+    async def suggestions_endpoint():
+        response = await client.get("/reports/purchase-suggestions", headers=headers)
+        assert response.status_code == 200
+    await measure("GET /reports/purchase-suggestions com previsão em cache", suggestions_endpoint, runs=10, warmup=1)
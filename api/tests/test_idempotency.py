@@ -0,0 +1,120 @@
+# api/tests/test_idempotency.py
+"""
+Cabeçalho Idempotency-Key em POST /sales e POST /orders/{id}/pay (IdempotencyService):
+repetições devolvem o resultado original sem novas movimentações de estoque e de caixa,
+inclusive quando as duas requisições chegam ao mesmo tempo.
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from app.services.idempotency_service import idempotency_service
+from tests.factories import create_product, create_store
+
+
+async def _totals(db, store_id: int):
+    """ (vendas, movimentações de estoque, lançamentos de caixa) da loja. """
+    return (await db.execute(text("""
+        SELECT (SELECT count(*) FROM sales WHERE store_id = :store_id),
+               (SELECT count(*) FROM stock_movements WHERE store_id = :store_id),
+               (SELECT count(*) FROM cash_register_transactions AS t
+                JOIN cash_registers AS r ON r.id = t.cash_register_id WHERE r.store_id = :store_id)
+    """), {"store_id": store_id})).one()
+
+
+def _sale(product_id: int, quantity: int = 2):
+    total = quantity * 10.0
+    return {
+        "total_amount": total,
+        "items": [{"product_id": product_id, "quantity": quantity, "price_at_sale": 10.0}],
+        "payments": [{"payment_method": "cash", "amount": total}],
+    }
+
+
+async def _stock(db, product_id: int) -> int:
+    return await db.scalar(text("SELECT stock FROM products WHERE id = :id"), {"id": product_id})
+
+
+async def test_sale_replay_returns_the_original_sale(client, db):
+    store, _, headers = await create_store(db)
+    product = await create_product(db, store=store, stock=20)
+    keyed = {**headers, "Idempotency-Key": "pos-1-venda-1"}
+
+    first = await client.post("/sales/", headers=keyed, json=_sale(product.id))
+    assert first.status_code == 201, first.text
+    totals = await _totals(db, store.id)
+    assert totals == (1, 1, 1)
+
+    replay = await client.post("/sales/", headers=keyed, json=_sale(product.id))
+    assert replay.status_code == 201, replay.text
+    assert replay.json()["id"] == first.json()["id"]
+    assert await _totals(db, store.id) == totals
+    assert await _stock(db, product.id) == 18
+
+    # Mesma chave com outro corpo.
+    mismatch = await client.post("/sales/", headers=keyed, json=_sale(product.id, quantity=3))
+    assert mismatch.status_code == 422, mismatch.text
+    assert await _totals(db, store.id) == totals
+
+
+async def test_concurrent_requests_with_one_key_create_one_sale(client, db, monkeypatch):
+    store, _, headers = await create_store(db)
+    product = await create_product(db, store=store, stock=20)
+    keyed = {**headers, "Idempotency-Key": "pos-1-venda-2"}
+
+    # As duas requisições só registram a chave depois de ambas passarem pelo `find` e
+    # gravarem a sua venda: uma vence e a outra cai no conflito do `claim`.
+    claim = idempotency_service.claim
+    arrived = 0
+    both_arrived = asyncio.Event()
+    results = []
+
+    async def claim_together(*args, **kwargs):
+        nonlocal arrived
+        arrived += 1
+        if arrived == 2:
+            both_arrived.set()
+        await asyncio.wait_for(both_arrived.wait(), timeout=10)
+        claimed = await claim(*args, **kwargs)
+        results.append(claimed)
+        return claimed
+
+    monkeypatch.setattr(idempotency_service, "claim", claim_together)
+    responses = await asyncio.gather(*(client.post("/sales/", headers=keyed, json=_sale(product.id)) for _ in range(2)))
+
+    assert [response.status_code for response in responses] == [201, 201], [r.text for r in responses]
+    assert responses[0].json()["id"] == responses[1].json()["id"]
+    assert sorted(results) == [False, True]
+    assert await _totals(db, store.id) == (1, 1, 1)
+    assert await _stock(db, product.id) == 18
+
+
+async def test_order_payment_replay(client, db):
+    store, _, headers = await create_store(db)
+    product = await create_product(db, store=store, stock=20)
+    order = await client.post("/orders/", headers=headers, json={"order_type": "TAKEOUT"})
+    order_id = order.json()["id"]
+    added = await client.post(f"/orders/{order_id}/items", headers=headers, json={"product_id": product.id, "quantity": 3})
+    [item] = added.json()["items"]
+
+    payment = {
+        "items_to_pay": [{"order_item_id": item["id"], "quantity": 1}],
+        "payments": [{"payment_method": "cash", "amount": item["price_at_order"]}],
+    }
+    keyed = {**headers, "Idempotency-Key": "pos-1-comanda-1"}
+    first = await client.post(f"/orders/{order_id}/pay", headers=keyed, json=payment)
+    assert first.status_code == 200, first.text
+    totals = await _totals(db, store.id)
+    assert totals == (1, 1, 1)
+
+    replay = await client.post(f"/orders/{order_id}/pay", headers=keyed, json=payment)
+    assert replay.status_code == 200, replay.text
+    assert replay.json()["items"][0]["paid_quantity"] == 1
+    assert await _totals(db, store.id) == totals
+    assert await _stock(db, product.id) == 19
+
+    mismatch = await client.post(f"/orders/{order_id}/pay", headers=keyed, json={
+        **payment, "items_to_pay": [{"order_item_id": item["id"], "quantity": 2}]
+    })
+    assert mismatch.status_code == 422, mismatch.text
+    assert await _totals(db, store.id) == totals
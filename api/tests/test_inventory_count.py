@@ -0,0 +1,54 @@
+# api/tests/test_inventory_count.py
+"""
+Validação do arquivo de contagem de inventário (POST /stock/inventory-counts): valores fora
+do intervalo das colunas INTEGER viram erros de linha com 422, sem alterar o estoque.
+"""
+import json
+
+from tests.factories import create_product, create_store
+
+MAX_INTEGER = 2**31 - 1
+
+
+async def _post(client, headers, body: str, content_type: str):
+    return await client.post(
+        "/stock/inventory-counts", headers={**headers, "Content-Type": content_type}, content=body.encode()
+    )
+
+
+async def test_out_of_range_values_are_line_errors(client, db):
+    store, _, headers = await create_store(db)
+    product = await create_product(db, store=store, stock=10)
+
+    lines = [
+        {"product_id": 1.5, "counted_qty": 1},
+        {"product_id": 7891234567890, "counted_qty": 1},
+        {"product_id": 0, "counted_qty": 1},
+        {"product_id": True, "counted_qty": 1},
+        {"product_id": product.id, "counted_qty": MAX_INTEGER + 1},
+        {"product_id": product.id, "counted_qty": 2.5},
+        {"product_id": product.id, "counted_qty": 3},
+    ]
+    response = await _post(client, headers, "".join(json.dumps(line) + "\n" for line in lines), "application/x-ndjson")
+    assert response.status_code == 422, response.text
+    errors = response.json()["detail"]["errors"]
+    assert [error.split(":")[0] for error in errors] == [f"Linha {n}" for n in range(1, 7)]
+
+    csv = f"product_id;counted_qty\n7891234567890;1\n{product.id};{MAX_INTEGER + 1}\n"
+    response = await _post(client, headers, csv, "text/csv")
+    assert response.status_code == 422, response.text
+    assert [error.split(":")[0] for error in response.json()["detail"]["errors"]] == ["Linha 2", "Linha 3"]
+
+    # Cada linha cabe, mas a soma das linhas repetidas não.
+    csv = f"product_id,counted_qty\n{product.id},{MAX_INTEGER}\n{product.id},1\n"
+    response = await _post(client, headers, csv, "text/csv")
+    assert response.status_code == 422, response.text
+
+    await db.refresh(product)
+    assert product.stock == 10
+
+    csv = f"product_id,counted_qty\n{product.id},{MAX_INTEGER}\n{product.id}.0,0\n"
+    response = await _post(client, headers, csv, "text/csv")
+    assert response.status_code == 200, response.text
+    await db.refresh(product)
+    assert product.stock == MAX_INTEGER
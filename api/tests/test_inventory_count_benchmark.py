@@ -0,0 +1,131 @@
+# api/tests/test_inventory_count_benchmark.py
+"""
+Benchmark da contagem de inventário em massa (POST /stock/inventory-counts) numa loja com
+20 mil SKUs: arquivo CSV/JSON lines enviado em streaming, resolução dos códigos de barras
+em lote e todos os ajustes numa transação, contra o ajuste produto a produto
+(POST /products/{id}/stock-adjustment) que a contagem mensal exigia antes.
+"""
+import json
+from typing import AsyncIterator, List
+
+import pytest
+from sqlalchemy import text
+
+from tests.factories import create_store
+
+pytestmark = pytest.mark.benchmark
+
+SKUS = 20_000
+NOT_FOUND = 100
+INITIAL_STOCK = 100
+PER_PRODUCT_SAMPLE = 200
+
+
+@pytest.fixture(scope="module")
+async def counted_store(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        store, _, headers = await create_store(db)
+        product_ids = (await db.execute(text("""
+            INSERT INTO products (name, price, stock, low_stock_threshold, product_type, store_id, barcode, created_at, updated_at)
+            SELECT 'Produto ' || g, 10, :stock, 10, 'SIMPLE', :store_id, :prefix || g, now(), now()
+            FROM generate_series(1, :skus) AS g
+            RETURNING id
+        """), {"store_id": store.id, "prefix": _barcode(store.id, ""), "stock": INITIAL_STOCK, "skus": SKUS})).scalars().all()
+        await db.commit()
+        await db.execute(text("ANALYZE products"))
+        await db.commit()
+        return store.id, headers, sorted(product_ids)
+
+
+def _barcode(store_id: int, n: object) -> str:
+    return f"INV{store_id}-{n}"
+
+
+def _counts(round_number: int) -> List[int]:
+    """ Quantidades contadas da rodada: 30% dos SKUs diferem do estoque deixado pela rodada anterior. """
+    return [INITIAL_STOCK + (round_number if n % 10 < 3 else 0) for n in range(1, SKUS + 1)]
+
+
+async def _stream(body: bytes) -> AsyncIterator[bytes]:
+    """ Corpo em blocos de 64 KiB, como um upload em streaming. """
+    for start in range(0, len(body), 65536):
+        yield body[start:start + 65536]
+
+
+def _csv(store_id: int, counts: List[int]) -> AsyncIterator[bytes]:
+    """ Arquivo CSV da contagem, com os códigos desconhecidos no final. """
+    lines = ["barcode;counted_qty"]
+    lines += [f"{_barcode(store_id, n)};{quantity}" for n, quantity in enumerate(counts, start=1)]
+    lines += [f"DESCONHECIDO-{n};1" for n in range(NOT_FOUND)]
+    return _stream(("\r\n".join(lines) + "\r\n").encode())
+
+
+def _json_lines(product_ids: List[int], counts: List[int]) -> AsyncIterator[bytes]:
+    return _stream("".join(
+        json.dumps({"product_id": product_id, "counted_qty": quantity}) + "\n"
+        for product_id, quantity in zip(product_ids, counts)
+    ).encode())
+
+
+async def test_inventory_count_upload(db, client, counted_store, measure, benchmark_note, count_queries):
+    store_id, headers, product_ids = counted_store
+    csv_headers = {**headers, "Content-Type": "text/csv"}
+    changed_per_round = sum(1 for n in range(1, SKUS + 1) if n % 10 < 3)
+    benchmark_note(
+        f"contagem de inventário: {SKUS} SKUs por código de barras + {NOT_FOUND} códigos desconhecidos, "
+        f"{changed_per_round} SKUs alterados por rodada"
+    )
+
+    async def upload(round_number: int, *, dry_run: bool = False):
+        response = await client.post(
+            "/stock/inventory-counts", headers=csv_headers, params={"dry_run": dry_run},
+            content=_csv(store_id, _counts(round_number))
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    with count_queries() as counter:
+        report = await upload(1)
+    assert report["products_counted"] == SKUS
+    assert report["products_changed"] == changed_per_round
+    assert report["total_delta"] == changed_per_round
+    assert len(report["not_found"]) == NOT_FOUND
+    benchmark_note(f"POST /stock/inventory-counts ({SKUS} linhas): {counter.count} comando(s) SQL")
+
+    # Estoque final e livro consistentes: uma movimentação por SKU alterado, e o estoque após
+    # a última movimentação de cada produto igual ao estoque atual.
+    movements, mismatched = (await db.execute(text("""
+        SELECT count(*), count(*) FILTER (WHERE m.stock_after_movement <> p.stock)
+        FROM stock_movements AS m JOIN products AS p ON p.id = m.product_id
+        WHERE m.store_id = :store_id AND m.movement_type = 'ADJUSTMENT'
+    """), {"store_id": store_id})).one()
+    assert (movements, mismatched) == (changed_per_round, 0)
+
+    await measure(f"contagem CSV {SKUS} SKUs, simulação (dry_run)", lambda: upload(1, dry_run=True), runs=10, warmup=1)
+    rounds = iter(range(2, 100))
+    await measure(f"contagem CSV {SKUS} SKUs, aplicada", lambda: upload(next(rounds)), runs=10, warmup=1)
+
+    async def upload_json_lines():
+        response = await client.post(
+            "/stock/inventory-counts", headers={**headers, "Content-Type": "application/x-ndjson"},
+            content=_json_lines(product_ids, _counts(next(rounds)))
+        )
+        assert response.status_code == 200, response.text
+    await measure(f"contagem JSON lines {SKUS} SKUs por product_id, aplicada", upload_json_lines, runs=10, warmup=1)
+
+    # Antes: um POST por produto, cada um com a sua transação.
+    sample = iter(product_ids[:PER_PRODUCT_SAMPLE] * 2)
+
+    async def adjust_one():
+        response = await client.post(
+            f"/products/{next(sample)}/stock-adjustment", headers=headers,
+            json={"new_stock_level": 7, "reason": "Contagem de inventário"}
+        )
+        assert response.status_code == 200, response.text
+    median = await measure("POST /products/{id}/stock-adjustment (1 produto)", adjust_one, runs=PER_PRODUCT_SAMPLE, warmup=3)
+    benchmark_note(
+        f"produto a produto: {SKUS} x mediana = {SKUS * median / 1000:.1f}s "
+        "(só as requisições, sem o tempo de digitação)"
+    )
@@ -0,0 +1,45 @@
+# api/tests/test_kitchen_queue.py
+"""
+Fila da cozinha (GET /orders/kitchen): o cursor devolvido pela busca completa serve para a
+busca incremental seguinte, que traz os itens alterados e os removidos desde então.
+"""
+from tests.factories import create_product, create_store
+
+
+async def test_incremental_fetch_returns_changes_and_removals(client, db):
+    store, _, headers = await create_store(db)
+    burger = await create_product(db, store=store, stock=50)
+    fries = await create_product(db, store=store, stock=50)
+
+    created = await client.post("/orders/", headers=headers, json={"order_type": "TAKEOUT"})
+    assert created.status_code == 201, created.text
+    order_id = created.json()["id"]
+    for product in (burger, fries):
+        added = await client.post(f"/orders/{order_id}/items", headers=headers, json={"product_id": product.id, "quantity": 2})
+        assert added.status_code == 200, added.text
+    items = {item["product_id"]: item["id"] for item in added.json()["items"]}
+
+    full = await client.get("/orders/kitchen", headers=headers)
+    assert full.status_code == 200, full.text
+    assert full.json()["full"] is True
+    [ticket] = full.json()["orders"]
+    assert sorted(item["id"] for item in ticket["items"]) == sorted(items.values())
+
+    changed = await client.patch(f"/orders/items/{items[burger.id]}/status", headers=headers, json={"status": "preparing"})
+    assert changed.status_code == 200, changed.text
+    removed = await client.post(f"/orders/{order_id}/items", headers=headers, json={"product_id": fries.id, "quantity": -2})
+    assert removed.status_code == 200, removed.text
+
+    delta = await client.get("/orders/kitchen", headers=headers, params={"since": full.json()["cursor"]})
+    assert delta.status_code == 200, delta.text
+    body = delta.json()
+    assert body["full"] is False
+    [ticket] = body["orders"]
+    assert ticket["id"] == order_id
+    assert [(item["id"], item["status"]) for item in ticket["items"]] == [(items[burger.id], "preparing")]
+    assert ticket["removed_item_ids"] == [items[fries.id]]
+
+    # O novo cursor também é aceito.
+    again = await client.get("/orders/kitchen", headers=headers, params={"since": body["cursor"]})
+    assert again.status_code == 200, again.text
+    assert again.json()["full"] is False
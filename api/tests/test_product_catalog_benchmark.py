@@ -0,0 +1,72 @@
+# api/tests/test_product_catalog_benchmark.py
+"""
+Benchmark da listagem de produtos do POS: GET /products/ (entidades completas, com os
+relacionamentos carregados) contra GET /products/catalog (projeção só com as colunas da grade),
+em páginas de 100 produtos com categoria, fornecedor, variações, lotes e receita.
+"""
+import secrets
+
+import pytest
+
+from app.models.batch import ProductBatch
+from app.models.category import ProductCategory
+from app.models.ingredient import Ingredient
+from app.models.product import Product
+from app.models.recipe import RecipeItem
+from app.models.supplier import Supplier
+from app.models.variation import ProductVariation
+from app.schemas.enums import UnitOfMeasure
+from tests.factories import create_store
+
+pytestmark = pytest.mark.benchmark
+
+PRODUCTS = 1000
+
+
+@pytest.fixture(scope="module")
+async def catalog_headers(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        store, _, headers = await create_store(db)
+        suffix = secrets.token_hex(3)
+        categories = [ProductCategory(name=f"Categoria {suffix} {i}", store_id=store.id) for i in range(10)]
+        supplier = Supplier(name=f"Fornecedor {suffix}", store_id=store.id)
+        ingredients = [
+            Ingredient(name=f"Insumo {suffix} {i}", stock=1000, unit_of_measure=UnitOfMeasure.GRAM, store_id=store.id)
+            for i in range(20)
+        ]
+        db.add_all([*categories, supplier, *ingredients])
+        await db.flush()
+        for i in range(PRODUCTS):
+            product = Product(
+                name=f"Produto {i:05d}", description="Descrição do produto para a vitrine", price=10.0 + i % 50,
+                stock=100, barcode=f"{suffix}{i:08d}", category_id=categories[i % 10].id,
+                supplier_id=supplier.id, store_id=store.id
+            )
+            db.add(product)
+            await db.flush()
+            db.add_all([
+                *(ProductVariation(product_id=product.id, price=product.price + v, stock=10) for v in range(2)),
+                *(ProductBatch(product_id=product.id, store_id=store.id, quantity=50) for _ in range(2)),
+                *(RecipeItem(product_id=product.id, ingredient_id=ingredients[(i + k) % 20].id,
+                             quantity_needed=10, store_id=store.id) for k in range(3)),
+            ])
+        await db.commit()
+        return headers
+
+
+async def test_full_listing_vs_catalog_projection(client, catalog_headers, measure, benchmark_note, count_queries):
+    for path in ("/products/", "/products/catalog"):
+        with count_queries() as counter:
+            response = await client.get(path, headers=catalog_headers, params={"limit": 100})
+        assert response.status_code == 200
+        assert len(response.json()) == 100
+        benchmark_note(f"GET {path}?limit=100: {len(response.content) / 1024:.1f} KiB, {counter.count} comando(s) SQL")
+
+    async def fetch(path):
+        response = await client.get(path, headers=catalog_headers, params={"limit": 100})
+        assert response.status_code == 200
+
+    await measure("GET /products/?limit=100 (entidades completas)", lambda: fetch("/products/"))
+    await measure("GET /products/catalog?limit=100 (projeção)", lambda: fetch("/products/catalog"))
@@ -0,0 +1,87 @@
+# api/tests/test_recipe_deduction.py
+"""
+Baixa de insumos por ficha técnica na venda (StockService.deduct_ingredients_from_sale):
+consumo somado por insumo, uma movimentação por insumo e o grafo de receitas em cache
+invalidado quando uma ficha ou o tipo de um produto muda.
+"""
+import secrets
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.crud import crud_recipe
+from app.models.ingredient import Ingredient
+from app.models.ingredient_movement import IngredientMovement
+from app.models.product import Product, ProductType
+from app.models.recipe import RecipeItem
+from app.schemas.enums import UnitOfMeasure
+from app.schemas.recipe import RecipeUpdate
+from tests.factories import create_store
+
+
+async def _stocks(db, ingredients):
+    rows = await db.execute(
+        select(Ingredient.id, Ingredient.stock).where(Ingredient.id.in_([i.id for i in ingredients]))
+    )
+    stocks = dict(rows.all())
+    return [stocks[ingredient.id] for ingredient in ingredients]
+
+
+async def test_sale_deducts_ingredients_and_recipe_changes_apply(client, db):
+    store, _, headers = await create_store(db)
+    suffix = secrets.token_hex(3)
+    flour, cheese = ingredients = [
+        Ingredient(name=f"{name} {suffix}", stock=1000, unit_of_measure=UnitOfMeasure.GRAM, store_id=store.id)
+        for name in ("Farinha", "Queijo")
+    ]
+    pizza, bread = products = [
+        Product(name=f"{name} {suffix}", price=30.0, stock=100, product_type=ProductType.COMPOSED, store_id=store.id)
+        for name in ("Pizza", "Pão")
+    ]
+    db.add_all([*ingredients, *products])
+    await db.flush()
+    db.add_all([
+        RecipeItem(product_id=pizza.id, ingredient_id=flour.id, quantity_needed=5, store_id=store.id),
+        RecipeItem(product_id=pizza.id, ingredient_id=cheese.id, quantity_needed=2, store_id=store.id),
+        RecipeItem(product_id=bread.id, ingredient_id=flour.id, quantity_needed=3, store_id=store.id),
+    ])
+    await db.commit()
+
+    async def sell(*items):
+        total = sum(quantity * 30.0 for _, quantity in items)
+        response = await client.post("/sales/", headers=headers, json={
+            "total_amount": total,
+            "items": [{"product_id": product.id, "quantity": quantity, "price_at_sale": 30.0} for product, quantity in items],
+            "payments": [{"payment_method": "cash", "amount": total}],
+        })
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    # Farinha: 5 x 2 + 3 x 3 (em dois itens de pão); queijo: 2 x 2.
+    sale_id = await sell((pizza, 2), (bread, 1), (bread, 2))
+    assert await _stocks(db, ingredients) == [1000 - 19, 1000 - 4]
+    movements = (await db.execute(
+        select(IngredientMovement.ingredient_id, IngredientMovement.quantity, IngredientMovement.stock_after_movement)
+        .where(IngredientMovement.sale_id == sale_id)
+        .order_by(IngredientMovement.ingredient_id)
+    )).all()
+    assert movements == sorted([(flour.id, -19, 981), (cheese.id, -4, 996)])
+
+    # Nova ficha da pizza: só queijo. O grafo em cache precisa ser descartado.
+    await crud_recipe.update_product_recipe(db, pizza, RecipeUpdate(items=[{"ingredient_id": cheese.id, "quantity_needed": 1}]))
+    await sell((pizza, 1))
+    assert await _stocks(db, ingredients) == [981, 995]
+
+    # Pão deixa de ser composto: não baixa mais insumos; volta a ser composto: baixa de novo.
+    response = await client.put(f"/products/{bread.id}", headers=headers, json={"product_type": "SIMPLE"})
+    assert response.status_code == 200, response.text
+    await sell((bread, 1))
+    assert await _stocks(db, ingredients) == [981, 995]
+    response = await client.put(f"/products/{bread.id}", headers=headers, json={"product_type": "COMPOSED"})
+    assert response.status_code == 200, response.text
+    await sell((bread, 1))
+    assert await _stocks(db, ingredients) == [978, 995]
+
+    assert await db.scalar(
+        select(func.count()).select_from(IngredientMovement).where(IngredientMovement.store_id == store.id)
+    ) == 4
@@ -0,0 +1,78 @@
+# api/tests/test_recipe_deduction_benchmark.py
+"""
+Benchmark da baixa de insumos por ficha técnica na venda (StockService.deduct_ingredients_from_sale):
+POST /sales/ com dezenas de produtos compostos (comanda de restaurante) contra a mesma venda com
+produtos simples, e o número de comandos SQL conforme o tamanho da comanda.
+"""
+import secrets
+
+import pytest
+
+from app.models.ingredient import Ingredient
+from app.models.product import Product, ProductType
+from app.models.recipe import RecipeItem
+from app.schemas.enums import UnitOfMeasure
+from app.services.recipe_service import recipe_service
+from tests.factories import create_store
+
+pytestmark = pytest.mark.benchmark
+
+INGREDIENTS = 150
+COMPOSED_PRODUCTS = 200
+INGREDIENTS_PER_RECIPE = 8
+
+
+@pytest.fixture(scope="module")
+async def restaurant(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        store, _, headers = await create_store(db)
+        suffix = secrets.token_hex(3)
+        ingredients = [
+            Ingredient(name=f"Insumo {suffix} {i}", stock=10_000_000, unit_of_measure=UnitOfMeasure.GRAM, store_id=store.id)
+            for i in range(INGREDIENTS)
+        ]
+        composed = [
+            Product(name=f"Prato {i}", price=30.0, stock=10_000_000, product_type=ProductType.COMPOSED, store_id=store.id)
+            for i in range(COMPOSED_PRODUCTS)
+        ]
+        simple = [Product(name=f"Bebida {i}", price=30.0, stock=10_000_000, store_id=store.id) for i in range(COMPOSED_PRODUCTS)]
+        db.add_all([*ingredients, *composed, *simple])
+        await db.flush()
+        db.add_all([
+            RecipeItem(product_id=product.id, ingredient_id=ingredients[(i * 7 + k * 13) % INGREDIENTS].id,
+                       quantity_needed=5 + k, store_id=store.id)
+            for i, product in enumerate(composed) for k in range(INGREDIENTS_PER_RECIPE)
+        ])
+        await db.commit()
+        return store.id, headers, [p.id for p in composed], [p.id for p in simple]
+
+
+def _sale(product_ids, count):
+    items = [{"product_id": product_ids[(i * 11) % len(product_ids)], "quantity": 1 + i % 3, "price_at_sale": 30.0} for i in range(count)]
+    total = sum(item["quantity"] * item["price_at_sale"] for item in items)
+    return {"total_amount": total, "items": items, "payments": [{"payment_method": "cash", "amount": total}]}
+
+
+async def test_composed_ticket_deduction(client, db, restaurant, measure, benchmark_note, count_queries):
+    store_id, headers, composed_ids, simple_ids = restaurant
+
+    for label, product_ids in (("compostos", composed_ids), ("simples", simple_ids)):
+        for count in (5, 40):
+            with count_queries() as counter:
+                response = await client.post("/sales/", headers=headers, json=_sale(product_ids, count))
+            assert response.status_code == 201
+            benchmark_note(f"POST /sales/ com {count} itens {label}: {counter.count} comando(s) SQL")
+
+    recipe_service.invalidate(store_id=store_id)
+    await measure(
+        f"grafo de receitas da loja sem cache ({COMPOSED_PRODUCTS} fichas x {INGREDIENTS_PER_RECIPE} insumos)",
+        lambda: recipe_service._load_graph(db, store_id), runs=20
+    )
+
+    async def sell(product_ids):
+        assert (await client.post("/sales/", headers=headers, json=_sale(product_ids, 40))).status_code == 201
+
+    await measure("POST /sales/ 40 itens simples", lambda: sell(simple_ids))
+    await measure("POST /sales/ 40 itens compostos (baixa de insumos)", lambda: sell(composed_ids))
@@ -0,0 +1,74 @@
+# api/tests/test_report_indexes.py
+"""
+Planos das consultas de relatório sobre as vendas (agregações do rollup, por loja e intervalo
+semiaberto de created_at): com volume semeado e estatísticas atualizadas, o PostgreSQL deve
+usar o índice (store_id, created_at, id) de sales e chegar aos itens e pagamentos pelos
+índices em sale_id, sem varrer as tabelas inteiras.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.models.sale import Sale
+from app.services.sales_rollup_service import sales_rollup_service
+from tests.factories import create_product, create_store, seed_sales
+
+SALES_INDEX = "ix_sales_store_id_created_at_id"
+SALE_ITEMS_INDEX = "ix_sale_items_sale_id_product_id"
+PAYMENTS_INDEX = "ix_payments_sale_id"
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+async def _explain(db, stmt):
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(_plan_nodes(plan[0]["Plan"]))
+
+
+@pytest.fixture(scope="module")
+async def seeded_store(app):
+    from app.db.session import AsyncSessionLocal
+
+    end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    async with AsyncSessionLocal() as db:
+        stores = []
+        # Duas lojas com um ano de vendas: o filtro por loja e dia seleciona uma fração pequena.
+        for _ in range(2):
+            store, user, _ = await create_store(db)
+            products = [await create_product(db, store=store, stock=0) for _ in range(20)]
+            await seed_sales(
+                db, store=store, user=user, product_ids=[p.id for p in products],
+                sales=30000, days=365, end=end
+            )
+            stores.append(store)
+    return stores[0].id, end - timedelta(days=7)
+
+
+@pytest.mark.parametrize("select_name, expected_indexes", [
+    ("_hourly_select", {SALES_INDEX}),
+    ("_payment_select", {SALES_INDEX, PAYMENTS_INDEX}),
+    ("_product_select", {SALES_INDEX, SALE_ITEMS_INDEX}),
+    ("_category_select", {SALES_INDEX, SALE_ITEMS_INDEX}),
+])
+async def test_report_queries_use_indexes(db, seeded_store, select_name, expected_indexes):
+    store_id, day = seeded_store
+    stmt = getattr(sales_rollup_service, select_name)(
+        Sale.store_id == store_id, Sale.created_at >= day, Sale.created_at < day + timedelta(days=1)
+    )
+    nodes = await _explain(db, stmt)
+
+    used = {node["Index Name"] for node in nodes if "Index Name" in node}
+    assert expected_indexes <= used, f"índices usados: {used}"
+    scanned = {node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"}
+    assert not scanned & {"sales", "sale_items", "payments"}, f"varredura sequencial em {scanned}"
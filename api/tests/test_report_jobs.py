@@ -0,0 +1,98 @@
+# api/tests/test_report_jobs.py
+"""
+Relatórios PDF gerados em segundo plano (report_job_service e /reports/.../jobs): fila,
+consulta da situação, download, reaproveitamento do mesmo relatório, isolamento entre lojas
+e nova tentativa depois de uma falha.
+"""
+import asyncio
+from datetime import date, timedelta
+
+from app.services.report_job_service import report_job_service
+from tests.factories import create_product, create_store
+
+SUBMIT = "/reports/pdf/sales-by-period/jobs"
+
+
+async def _wait_finished(client, headers, job_id: str, timeout: float = 60.0) -> dict:
+    """ Consulta o job até sair de pending/running. """
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        response = await client.get(f"/reports/jobs/{job_id}", headers=headers)
+        assert response.status_code == 200, response.text
+        job = response.json()
+        if job["status"] not in ("pending", "running"):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, job
+        await asyncio.sleep(0.05)
+
+
+async def test_report_job_lifecycle(client, db):
+    store, _, headers = await create_store(db)
+    product = await create_product(db, store=store, stock=10)
+    sale = await client.post("/sales/", headers=headers, json={
+        "total_amount": 20.0,
+        "items": [{"product_id": product.id, "quantity": 2, "price_at_sale": 10.0}],
+        "payments": [{"payment_method": "cash", "amount": 20.0}],
+    })
+    assert sale.status_code == 201, sale.text
+    period = {"start_date": str(date.today() - timedelta(days=7)), "end_date": str(date.today())}
+
+    submitted = await client.post(SUBMIT, headers=headers, params=period)
+    assert submitted.status_code == 202, submitted.text
+    job = submitted.json()
+    assert job["status"] == "pending"
+    assert job["download_url"] is None
+
+    # Mesmo relatório pedido de novo, ainda em andamento: mesmo job.
+    again = await client.post(SUBMIT, headers=headers, params=period)
+    assert again.json()["job_id"] == job["job_id"]
+
+    finished = await _wait_finished(client, headers, job["job_id"])
+    assert finished["status"] == "done", finished
+    assert finished["download_url"]
+    download = await client.get(f"http://test{finished['download_url']}", headers=headers)
+    assert download.status_code == 200, download.text
+    assert download.headers["content-type"] == "application/pdf"
+    assert download.content.startswith(b"%PDF")
+
+    # Já pronto: o novo pedido recebe o mesmo job, concluído.
+    cached = await client.post(SUBMIT, headers=headers, params=period)
+    assert cached.status_code == 202
+    assert (cached.json()["job_id"], cached.json()["status"]) == (job["job_id"], "done")
+
+    # Usuário de outra loja não enxerga o job.
+    _, _, other_headers = await create_store(db)
+    assert (await client.get(f"/reports/jobs/{job['job_id']}", headers=other_headers)).status_code == 404
+    assert (await client.get(f"/reports/jobs/{job['job_id']}/file", headers=other_headers)).status_code == 404
+
+    inverted = {"start_date": period["end_date"], "end_date": period["start_date"]}
+    assert (await client.post(SUBMIT, headers=headers, params=inverted)).status_code == 400
+
+
+async def test_failed_job_is_retried_on_next_submit(client, db, monkeypatch):
+    _, _, headers = await create_store(db)
+    period = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+    fetch = report_job_service._fetch
+    calls = 0
+
+    async def fail_once(job):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("réplica indisponível")
+        return await fetch(job)
+
+    monkeypatch.setattr(report_job_service, "_fetch", fail_once)
+
+    failed = (await client.post(SUBMIT, headers=headers, params=period)).json()
+    finished = await _wait_finished(client, headers, failed["job_id"])
+    assert finished["status"] == "failed"
+    assert "réplica indisponível" in finished["error"]
+    download = await client.get(f"/reports/jobs/{failed['job_id']}/file", headers=headers)
+    assert download.status_code == 500
+
+    retried = await client.post(SUBMIT, headers=headers, params=period)
+    assert retried.status_code == 202
+    assert retried.json()["job_id"] != failed["job_id"]
+    assert (await _wait_finished(client, headers, retried.json()["job_id"]))["status"] == "done"
+    assert calls == 2
@@ -0,0 +1,63 @@
+# api/tests/test_search_benchmark.py
+"""
+Benchmark da busca textual de produtos (GET /products/search) num catálogo de 100 mil
+produtos. Mede o modo em uso no banco de teste (trigramas com pg_trgm/immutable_unaccent ou
+o fallback ILIKE) e, quando os trigramas estão disponíveis, também o fallback para comparação.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.services.search_service import search_service
+from tests.factories import create_store
+
+pytestmark = pytest.mark.benchmark
+
+PRODUCTS = 100_000
+TERMS = ["Feijão", "cafe", "açúcar integral", "fejão", "Pão de"]
+
+
+@pytest.fixture(scope="module")
+async def search_headers(app):
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        store, _, headers = await create_store(db)
+        await db.execute(text("""
+            INSERT INTO products (name, price, stock, low_stock_threshold, product_type, store_id, created_at, updated_at)
+            SELECT
+                (ARRAY['Feijão', 'Café', 'Açúcar', 'Pão de Queijo', 'Maçã', 'Limão', 'Macarrão', 'Leite', 'Arroz', 'Óleo',
+                       'Farinha', 'Biscoito', 'Suco', 'Sabão', 'Chá', 'Manteiga', 'Iogurte', 'Queijo', 'Presunto', 'Salsicha'])[1 + g % 20]
+                || ' ' || (ARRAY['Integral', 'Tradicional', 'Orgânico', 'Light', 'Premium', 'Caseiro', 'Extra', 'Especial'])[1 + (g / 20) % 8]
+                || ' ' || (ARRAY['Marca Boa', 'São João', 'Três Corações', 'Vovó', 'Fazenda', 'Do Sítio'])[1 + (g / 160) % 6]
+                || ' ' || (1 + g % 997) || 'g',
+                5 + g % 50, 100, 10, 'SIMPLE', :store_id, now(), now()
+            FROM generate_series(1, :products) AS g
+        """), {"store_id": store.id, "products": PRODUCTS})
+        await db.commit()
+        await db.execute(text("ANALYZE products"))
+        await db.commit()
+        return headers
+
+
+async def _measure_terms(client, headers, measure, benchmark_note, mode):
+    for term in TERMS:
+        response = await client.get("/products/search", headers=headers, params={"q": term, "limit": 20})
+        assert response.status_code == 200
+        benchmark_note(f"busca [{mode}] '{term}': {len(response.json())} resultado(s)")
+
+        async def search(term=term):
+            assert (await client.get("/products/search", headers=headers, params={"q": term, "limit": 20})).status_code == 200
+
+        await measure(f"GET /products/search [{mode}] q='{term}'", search, runs=20)
+
+
+async def test_product_search_on_100k_catalog(client, db, search_headers, measure, benchmark_note):
+    trigram = await search_service.trigram_available(db)
+    benchmark_note(f"busca: {PRODUCTS} produtos na loja; pg_trgm/immutable_unaccent {'disponíveis' if trigram else 'indisponíveis'}")
+    await _measure_terms(client, search_headers, measure, benchmark_note, "trigram" if trigram else "ilike")
+    if trigram:
+        search_service._trigram_available = False
+        try:
+            await _measure_terms(client, search_headers, measure, benchmark_note, "ilike")
+        finally:
+            search_service._trigram_available = None
@@ -0,0 +1,67 @@
+# api/tests/test_stock_concurrency.py
+"""
+Vendas simultâneas do mesmo produto (StockService._apply_stock_deltas): o estoque final e o
+livro de movimentações devem bater, sem atualizações perdidas nem deadlocks.
+"""
+import asyncio
+import random
+
+from sqlalchemy.future import select
+
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, MovementType
+from tests.factories import create_product, create_store
+
+PARALLEL_SALES = 300
+INITIAL_STOCK = 5000
+
+
+async def test_parallel_sales_keep_stock_and_ledger_consistent(client, db):
+    store, _, headers = await create_store(db)
+    hot = await create_product(db, store=store, stock=INITIAL_STOCK, name="Produto disputado")
+    other = await create_product(db, store=store, stock=INITIAL_STOCK, name="Segundo produto")
+
+    rng = random.Random(6)
+    baskets = []
+    for _ in range(PARALLEL_SALES):
+        quantities = {hot.id: rng.randint(1, 3), other.id: rng.randint(1, 2)}
+        # Ordem dos itens aleatória: sem o travamento em ordem de ID, vendas com os dois
+        # produtos em ordens opostas entrariam em deadlock.
+        items = [
+            {"product_id": product_id, "quantity": quantity, "price_at_sale": 10.0}
+            for product_id, quantity in rng.sample(sorted(quantities.items()), k=2)
+        ]
+        baskets.append((quantities, items))
+
+    async def sell(items):
+        total = sum(item["quantity"] * item["price_at_sale"] for item in items)
+        return await client.post("/sales/", headers=headers, json={
+            "total_amount": total,
+            "items": items,
+            "payments": [{"payment_method": "cash", "amount": total}],
+        })
+
+    responses = await asyncio.gather(*(sell(items) for _, items in baskets))
+    assert [response.status_code for response in responses] == [201] * PARALLEL_SALES
+
+    for product in (hot, other):
+        sold = sum(quantities[product.id] for quantities, _ in baskets)
+        final_stock = await db.scalar(
+            select(Product.stock).where(Product.id == product.id).execution_options(populate_existing=True)
+        )
+        assert final_stock == INITIAL_STOCK - sold
+
+        movements = (await db.execute(
+            select(StockMovement.quantity, StockMovement.stock_after_movement)
+            .where(StockMovement.product_id == product.id, StockMovement.movement_type == MovementType.SALE)
+            .order_by(StockMovement.id)
+        )).all()
+        assert len(movements) == PARALLEL_SALES
+        assert sum(quantity for quantity, _ in movements) == -sold
+        # As movimentações são inseridas com a linha do produto travada: em ordem de ID, cada
+        # uma parte do estoque deixado pela anterior.
+        expected_stock = INITIAL_STOCK
+        for quantity, stock_after in movements:
+            expected_stock += quantity
+            assert stock_after == expected_stock
+        assert expected_stock == final_stock
@@ -0,0 +1,191 @@
+# api/tests/test_stock_snapshot_benchmark.py
+"""
+Benchmark das consultas de estoque em uma data e do resumo de período
+(StockSnapshotService) numa loja com milhões de movimentações no livro: fechamento diário
+mais próximo + trecho do livro contra a soma direta do livro desde o início.
+As duas formas devem devolver os mesmos números.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Sequence
+
+import pytest
+from sqlalchemy import text
+
+from app.services.stock_snapshot_service import stock_snapshot_service
+from tests.factories import create_product, create_store
+
+pytestmark = pytest.mark.benchmark
+
+MOVEMENTS = 10_000_000
+PRODUCTS = 500
+DAYS = 365
+PAGE = 100
+
+
+@pytest.fixture(scope="module")
+async def ledger_store(app):
+    from app.db.session import AsyncSessionLocal
+
+    end = datetime.now()
+    start = end - timedelta(days=DAYS)
+    async with AsyncSessionLocal() as db:
+        store, user, headers = await create_store(db)
+        # Cadastrados antes da primeira movimentação, com estoque inicial zero.
+        created_at = start - timedelta(days=1)
+        products = [await create_product(db, store=store, created_at=created_at) for _ in range(PRODUCTS)]
+        params = {"store_id": store.id, "product_ids": [p.id for p in products]}
+
+        # Vendas (70%), compras, devoluções e ajustes espalhados uniformemente no período,
+        # com o estoque após cada movimentação calculado por produto na ordem do livro.
+        await db.execute(text("""
+            INSERT INTO stock_movements (store_id, product_id, user_id, movement_type, quantity, stock_after_movement, created_at)
+            SELECT :store_id, product_id, :user_id, CAST(movement_type AS movementtype), quantity,
+                   SUM(quantity) OVER (PARTITION BY product_id ORDER BY created_at, g), created_at
+            FROM (
+                SELECT g,
+                       (CAST(:product_ids AS integer[]))[1 + (CAST(g AS bigint) * 7919) % cardinality(CAST(:product_ids AS integer[]))] AS product_id,
+                       CASE WHEN g % 20 < 14 THEN 'SALE' WHEN g % 20 < 18 THEN 'PURCHASE'
+                            WHEN g % 20 = 18 THEN 'RETURN' ELSE 'ADJUSTMENT' END AS movement_type,
+                       CASE WHEN g % 20 < 14 THEN -(1 + g % 3) WHEN g % 20 < 18 THEN 5 + g % 8
+                            WHEN g % 20 = 18 THEN 1 ELSE g % 5 - 2 END AS quantity,
+                       CAST(:end AS timestamp) - g * (CAST(:days AS integer) * interval '1 day' / :movements) AS created_at
+                FROM generate_series(1, :movements) AS g
+            ) AS generated
+        """), {**params, "user_id": user.id, "end": end, "days": DAYS, "movements": MOVEMENTS})
+        await db.execute(text("""
+            UPDATE products AS p SET stock = totals.stock
+            FROM (
+                SELECT product_id, SUM(quantity) AS stock FROM stock_movements
+                WHERE store_id = :store_id GROUP BY product_id
+            ) AS totals
+            WHERE p.id = totals.product_id
+        """), params)
+        # Fechamentos de todos os dias encerrados, como a tarefa de fundo os teria gravado.
+        await db.execute(text("""
+            INSERT INTO stock_snapshots (store_id, snapshot_date, product_id, stock, sales, purchases, adjustments, returns, created_at)
+            SELECT :store_id, day, product_id,
+                   SUM(COALESCE(net, 0)) OVER (PARTITION BY product_id ORDER BY day),
+                   COALESCE(sales, 0), COALESCE(purchases, 0), COALESCE(adjustments, 0), COALESCE(returns, 0), now()
+            FROM unnest(CAST(:product_ids AS integer[])) AS product_id
+            CROSS JOIN generate_series(CAST(:first_day AS date), CAST(:last_day AS date), interval '1 day') AS days(day_ts)
+            CROSS JOIN LATERAL (SELECT CAST(day_ts AS date) AS day) AS d
+            LEFT JOIN (
+                SELECT product_id AS totals_product_id, CAST(created_at AS date) AS totals_day,
+                       SUM(quantity) AS net,
+                       SUM(quantity) FILTER (WHERE movement_type = 'SALE') AS sales,
+                       SUM(quantity) FILTER (WHERE movement_type = 'PURCHASE') AS purchases,
+                       SUM(quantity) FILTER (WHERE movement_type = 'ADJUSTMENT') AS adjustments,
+                       SUM(quantity) FILTER (WHERE movement_type = 'RETURN') AS returns
+                FROM stock_movements
+                WHERE store_id = :store_id AND created_at < :today
+                GROUP BY 1, 2
+            ) AS totals ON totals_product_id = product_id AND totals_day = day
+        """), {**params, "first_day": start.date(), "last_day": end.date() - timedelta(days=1),
+               "today": datetime.combine(end.date(), time.min)})
+        await db.commit()
+        await db.execute(text("ANALYZE stock_movements, stock_snapshots, products"))
+        await db.commit()
+        return store.id, headers, sorted(params["product_ids"])
+
+
+async def _ledger_stock(db, *, store_id: int, at: datetime, product_ids: Sequence[int]) -> Dict[int, int]:
+    """ Estoque em `at` somando todo o livro do produto até ali (sem fechamentos). """
+    rows = await db.execute(text("""
+        SELECT product_id, SUM(quantity) FROM stock_movements
+        WHERE store_id = :store_id AND product_id = ANY(:product_ids) AND created_at < :at
+        GROUP BY product_id
+    """), {"store_id": store_id, "product_ids": list(product_ids), "at": at})
+    return {product_id: int(total) for product_id, total in rows.all()}
+
+
+async def _ledger_summary(db, *, store_id: int, start_date: date, end_date: date, product_ids: Sequence[int]) -> List[Dict]:
+    """ Resumo do período só com o livro: estoque inicial, somas por tipo e estoque final. """
+    period_start = datetime.combine(start_date, time.min)
+    period_end = datetime.combine(end_date + timedelta(days=1), time.min)
+    opening = await _ledger_stock(db, store_id=store_id, at=period_start, product_ids=product_ids)
+    rows = await db.execute(text("""
+        SELECT product_id,
+               COALESCE(SUM(quantity) FILTER (WHERE movement_type = 'SALE'), 0),
+               COALESCE(SUM(quantity) FILTER (WHERE movement_type = 'PURCHASE'), 0),
+               COALESCE(SUM(quantity) FILTER (WHERE movement_type = 'ADJUSTMENT'), 0),
+               COALESCE(SUM(quantity) FILTER (WHERE movement_type = 'RETURN'), 0)
+        FROM stock_movements
+        WHERE store_id = :store_id AND product_id = ANY(:product_ids)
+          AND created_at >= :period_start AND created_at < :period_end
+        GROUP BY product_id
+    """), {"store_id": store_id, "product_ids": list(product_ids), "period_start": period_start, "period_end": period_end})
+    totals = {row[0]: row[1:] for row in rows.all()}
+    summary = []
+    for product_id in product_ids:
+        sales, purchases, adjustments, returns = totals.get(product_id, (0, 0, 0, 0))
+        movements = {"sales": int(sales), "purchases": int(purchases), "adjustments": int(adjustments), "returns": int(returns)}
+        summary.append({
+            "product_id": product_id,
+            "opening_stock": opening.get(product_id, 0),
+            **movements,
+            "closing_stock": opening.get(product_id, 0) + sum(movements.values()),
+        })
+    return summary
+
+
+async def test_stock_as_of_and_summary(db, client, ledger_store, measure, benchmark_note):
+    store_id, headers, product_ids = ledger_store
+    page = product_ids[:PAGE]
+    today = date.today()
+    benchmark_note(
+        f"estoque em uma data: {MOVEMENTS} movimentações em {DAYS} dias, {PRODUCTS} produtos, "
+        f"{PRODUCTS * DAYS} linhas de fechamento; páginas de {PAGE} produtos"
+    )
+
+    instants = {
+        "ontem 15h": datetime.combine(today - timedelta(days=1), time(15)),
+        "há 180 dias 12h": datetime.combine(today - timedelta(days=180), time(12)),
+        "agora": datetime.now() + timedelta(minutes=1),
+    }
+    for label, at in instants.items():
+        expected = await _ledger_stock(db, store_id=store_id, at=at, product_ids=page)
+        assert await stock_snapshot_service.stock_as_of(db, store_id=store_id, at=at, product_ids=page) == expected
+        await measure(f"estoque em {label}: soma do livro", lambda at=at: _ledger_stock(db, store_id=store_id, at=at, product_ids=page))
+        await measure(f"estoque em {label}: fechamento + trecho", lambda at=at: stock_snapshot_service.stock_as_of(db, store_id=store_id, at=at, product_ids=page))
+
+    start_date, end_date = today - timedelta(days=30), today
+    expected_summary = await _ledger_summary(db, store_id=store_id, start_date=start_date, end_date=end_date, product_ids=page)
+    summary, _ = await stock_snapshot_service.get_summary_page(
+        db, store_id=store_id, start_date=start_date, end_date=end_date, limit=PAGE
+    )
+    assert [{k: v for k, v in item.items() if k != "product_name"} for item in summary] == expected_summary
+    await measure("resumo de 31 dias: só o livro", lambda: _ledger_summary(db, store_id=store_id, start_date=start_date, end_date=end_date, product_ids=page))
+    await measure("resumo de 31 dias: fechamentos + trecho", lambda: stock_snapshot_service.get_summary_page(
+        db, store_id=store_id, start_date=start_date, end_date=end_date, limit=PAGE
+    ))
+
+    async def as_of_page():
+        response = await client.get("/stock/as-of", headers=headers, params={"at": instants["há 180 dias 12h"].isoformat(), "limit": PAGE})
+        assert response.status_code == 200
+        assert len(response.json()) == PAGE
+    await measure(f"GET /stock/as-of (há 180 dias, {PAGE} produtos)", as_of_page)
+
+
+async def test_nightly_snapshot(db, ledger_store, measure, benchmark_note):
+    """ O fechamento gravado pelo serviço para ontem deve coincidir com o semeado a partir do livro. """
+    store_id, _, _ = ledger_store
+    yesterday = date.today() - timedelta(days=1)
+    columns = "product_id, stock, sales, purchases, adjustments, returns"
+    params = {"store_id": store_id, "day": yesterday}
+    seeded = (await db.execute(text(
+        f"SELECT {columns} FROM stock_snapshots WHERE store_id = :store_id AND snapshot_date = :day ORDER BY product_id"
+    ), params)).all()
+    await db.execute(text("DELETE FROM stock_snapshots WHERE store_id = :store_id AND snapshot_date = :day"), params)
+    await db.commit()
+
+    assert await stock_snapshot_service.create_snapshot(db, store_id=store_id, day=yesterday) == PRODUCTS
+    await db.commit()
+    written = (await db.execute(text(
+        f"SELECT {columns} FROM stock_snapshots WHERE store_id = :store_id AND snapshot_date = :day ORDER BY product_id"
+    ), params)).all()
+    assert written == seeded
+
+    benchmark_note(f"fechamento diário: {PRODUCTS} produtos, ~{MOVEMENTS // DAYS} movimentações por dia")
+    # Já gravado: as execuções seguintes refazem as somas e não inserem nada (ON CONFLICT DO NOTHING).
+    await measure("fechamento de ontem (create_snapshot)", lambda: stock_snapshot_service.create_snapshot(db, store_id=store_id, day=yesterday), runs=10, warmup=1)
+    await db.rollback()
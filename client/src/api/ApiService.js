@@ -79,7 +79,7 @@ const ApiService = {
 
   // Produtos
   getProducts: (params) => ApiService.get('/products/', { params }),
-  lookupProduct: (barcodeOrName) => ApiService.get(`/products/lookup?q=${barcodeOrName}`),
+  lookupProduct: (barcodeOrName) => ApiService.get('/products/lookup', { params: { q: barcodeOrName } }),
 
   // Vendas (Sales) - para finalizar o pagamento
   createSale: (saleData) => ApiService.post('/sales/', saleData),
@@ -95,11 +95,19 @@ const ApiService = {
 
   // Clientes
   getCustomers: (params) => ApiService.get('/customers/', { params }),
+  // Início do nome, ou telefone/CPF/CNPJ completo.
+  searchCustomers: (q, limit = 20) => ApiService.get('/customers/', { params: { q, limit } }),
   createCustomer: (customerData) => ApiService.post('/customers/', customerData),
   // Adicione a função que faltava para buscar histórico do cliente
   getCustomerSalesHistory: (customerId) => ApiService.get(`/customers/${customerId}/sales`),
 
 
+  // Contagem de inventário: o arquivo (CSV ou .jsonl) é enviado como corpo da requisição.
+  uploadInventoryCount: (file, { dryRun = false, reason } = {}) => ApiService.post('/stock/inventory-counts', file, {
+    params: { dry_run: dryRun, reason },
+    headers: { 'Content-Type': file.name?.endsWith('.jsonl') ? 'application/x-ndjson' : 'text/csv' },
+  }),
+
   // Outros...
   getStores: () => ApiService.get('/stores'),
   getGlobalDashboardSummary: () => ApiService.get('/super-admin/dashboard'),
@@ -111,10 +119,19 @@ const ApiService = {
   getSalesEvolution: (startDate, endDate) => {
     return ApiService.get(`/reports/sales-evolution?start_date=${startDate}&end_date=${endDate}`);
   },
-  getSalesByPeriodPdf: (startDate, endDate) => {
-    return ApiService.get(`/reports/pdf/sales-by-period?start_date=${startDate}&end_date=${endDate}`, {
-      responseType: 'blob',
+  // O PDF é gerado em segundo plano: solicita o job, acompanha a situação e baixa o arquivo pronto.
+  getSalesByPeriodPdf: async (startDate, endDate) => {
+    let { data: job } = await ApiService.post('/reports/pdf/sales-by-period/jobs', null, {
+      params: { start_date: startDate, end_date: endDate },
     });
+    while (job.status === 'pending' || job.status === 'running') {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      ({ data: job } = await ApiService.get(`/reports/jobs/${job.job_id}`));
+    }
+    if (job.status !== 'done') {
+      throw new Error(job.error || 'Falha ao gerar o relatório.');
+    }
+    return ApiService.get(`/reports/jobs/${job.job_id}/file`, { responseType: 'blob' });
   },
    // Adicione as funções de usuário que faltavam (exemplo)
   createUser: (userData) => ApiService.post('/users/', userData),
@@ -18,7 +18,7 @@ const AddItemModal = ({ open, onCancel, orderId, onSuccess }) => {
                 setLoading(true);
                 try {
                     const params = debouncedSearchTerm ? { search: debouncedSearchTerm } : {};
-                    const response = await ApiService.get('/products/', { params });
+                    const response = await ApiService.get('/products/catalog', { params });
                     setProducts(response.data);
                 } catch {
                     message.error('Erro ao buscar produtos.');
@@ -1,15 +1,9 @@
 import React, { useState } from 'react';
 import { Modal, Input, List, Button, message } from 'antd';
-// import ApiService from '../api/ApiService'; // Descomente quando o backend estiver pronto
+import ApiService from '../api/ApiService';
 
 const { Search } = Input;
 
-// --- DADOS FALSOS PARA SIMULAÇÃO ---
-const mockCustomers = [
-  { id: 1, full_name: 'João da Silva', phone_number: '16999998888' },
-  { id: 2, full_name: 'Maria Oliveira', phone_number: '16988887777' },
-];
-
 const CustomerSearchModal = ({ open, onCancel, onSelect }) => {
   const [loading, setLoading] = useState(false);
   const [results, setResults] = useState([]);
@@ -20,26 +14,17 @@ const CustomerSearchModal = ({ open, onCancel, onSelect }) => {
       return;
     }
     setLoading(true);
-    // Simulação - Substituir pela chamada real da API
-    setTimeout(() => {
-      const filtered = mockCustomers.filter(c => 
-        c.full_name.toLowerCase().includes(value.toLowerCase())
-      );
-      setResults(filtered);
-      if (filtered.length === 0) {
+    try {
+      const response = await ApiService.searchCustomers(value);
+      setResults(response.data);
+      if (response.data.length === 0) {
         message.info('Nenhum cliente encontrado.');
       }
+    } catch (error) {
+      message.error('Erro ao buscar clientes.');
+    } finally {
       setLoading(false);
-    }, 500);
-    // CHAMADA REAL DA API (quando pronta):
-    // try {
-    //   const response = await ApiService.searchCustomers(value);
-    //   setResults(response.data);
-    // } catch (error) {
-    //   message.error('Erro ao buscar clientes.');
-    // } finally {
-    //   setLoading(false);
-    // }
+    }
   };
 
   const handleSelect = (customer) => {
@@ -55,7 +40,7 @@ const CustomerSearchModal = ({ open, onCancel, onSelect }) => {
       footer={null}
     >
       <Search
-        placeholder="Digite o nome ou telefone do cliente"
+        placeholder="Digite o nome, telefone ou CPF/CNPJ do cliente"
         enterButton
         onSearch={handleSearch}
         loading={loading}
@@ -28,12 +28,11 @@ const CustomerSelect = ({ onSelectCustomer }) => {
   const fetchCustomers = async (searchValue = '') => {
     setLoading(true);
     try {
-      // Idealmente, sua API teria um endpoint de busca. Por enquanto, filtramos no frontend.
-      const response = await ApiService.getCustomers();
-      const filteredData = response.data.filter(c =>
-        c.full_name.toLowerCase().includes(searchValue.toLowerCase())
-      );
-      setCustomers(filteredData);
+      // Busca no servidor (início do nome, telefone ou CPF/CNPJ).
+      const response = searchValue
+        ? await ApiService.searchCustomers(searchValue)
+        : await ApiService.getCustomers({ limit: 20 });
+      setCustomers(response.data);
     } catch (error) {
       message.error('Erro ao buscar clientes.');
     } finally {
@@ -79,7 +78,7 @@ const CustomerSelect = ({ onSelectCustomer }) => {
               <span>{customer.full_name}</span>
               <Text type="secondary">
                 <StarFilled style={{ color: '#FFD700', marginRight: 4 }} />
-                {customer.points || 0}
+                {customer.loyalty_points || 0}
               </Text>
             </div>
           </Select.Option>
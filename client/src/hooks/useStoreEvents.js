@@ -0,0 +1,53 @@
+import { useEffect, useRef } from 'react';
+
+// Hook que assina o canal de eventos em tempo real da loja (/api/v1/events/ws).
+// `onEvent` é chamado para cada evento cujo `type` esteja em `types` e também para
+// `resync_required` (o estado local deve ser recarregado pela API REST).
+// Ao reconectar, envia a última sequência recebida para receber apenas o que perdeu.
+export function useStoreEvents(types, onEvent) {
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+  const typesKey = types.join(',');
+
+  useEffect(() => {
+    const wanted = new Set(typesKey.split(','));
+    let socket = null;
+    let lastSeq = null;
+    let retryDelay = 1000;
+    let retryTimer = null;
+    let closed = false;
+
+    const connect = () => {
+      const token = localStorage.getItem('accessToken');
+      if (!token) return;
+      const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+      const since = lastSeq !== null ? `&since=${lastSeq}` : '';
+      socket = new WebSocket(`${protocol}://${window.location.host}/api/v1/events/ws?token=${encodeURIComponent(token)}${since}`);
+
+      socket.onopen = () => { retryDelay = 1000; };
+      socket.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        if (event.type === 'hello') {
+          if (lastSeq === null) lastSeq = event.seq;
+          return;
+        }
+        lastSeq = event.seq;
+        if (event.type === 'resync_required' || wanted.has(event.type)) {
+          onEventRef.current(event);
+        }
+      };
+      socket.onclose = () => {
+        if (closed) return;
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (socket) socket.close();
+    };
+  }, [typesKey]);
+}
@@ -60,7 +60,7 @@ const BatchFormModal = ({ visible, onCancel, onSuccess }) => {
         if (isOpen && products.length === 0) {
             setIsLoadingProducts(true);
             try {
-                const response = await ApiService.get('/products/?limit=2000');
+                const response = await ApiService.get('/products/catalog', { params: { limit: 500 } });
                 setProducts(response.data || []);
             } catch (error) { message.error("Falha ao carregar a lista de produtos."); }
             finally { setIsLoadingProducts(false); }
@@ -97,57 +97,67 @@ const BatchFormModal = ({ visible, onCancel, onSuccess }) => {
 };
 
 
+// Filtros do controle de validade aplicados pela API (GET /batches/expiring).
+const FILTER_PARAMS = {
+    all: {},
+    '7days': { within_days: 7, expired: false },
+    today: { within_days: 0, expired: false },
+    expired: { expired: true },
+};
+
 const ExpirationControlPage = () => {
     const [batches, setBatches] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
     const [isModalVisible, setIsModalVisible] = useState(false);
     const [filter, setFilter] = useState('all');
     // NOVO ESTADO PARA O TERMO DE BUSCA
     const [searchTerm, setSearchTerm] = useState('');
 
-    const fetchData = useCallback(async () => {
+    // Sem cursor carrega a primeira página; com cursor acrescenta a página seguinte.
+    const fetchData = useCallback(async (cursor = null) => {
         setLoading(true);
         try {
-            const batchesResponse = await ApiService.get('/batches/');
-            const fetchedBatches = batchesResponse.data || [];
-            setBatches(fetchedBatches.sort((a, b) => dayjs(a.expiration_date).unix() - dayjs(b.expiration_date).unix()));
-            
-            const nearExpirationCount = fetchedBatches.filter(b => getExpirationStatus(b.expiration_date).days <= 7).length;
-            if (nearExpirationCount > 0) {
-                notification.warning({ message: 'Produtos Próximos do Vencimento', description: `Você tem ${nearExpirationCount} lote(s) vencendo nos próximos 7 dias.`, icon: <WarningFilled />, duration: 10 });
-            }
+            const params = { ...FILTER_PARAMS[filter], search: searchTerm || undefined, cursor: cursor || undefined };
+            const response = await ApiService.get('/batches/expiring', { params });
+            setBatches(current => cursor ? [...current, ...response.data] : response.data);
+            setNextCursor(response.headers['x-next-cursor'] || null);
         } catch {
             message.error('Falha ao carregar dados de lotes.');
-            setBatches([]);
+            if (!cursor) setBatches([]);
         } finally {
             setLoading(false);
         }
+    }, [filter, searchTerm]);
+
+    useEffect(() => {
+        const handler = setTimeout(() => { fetchData(); }, 300);
+        return () => { clearTimeout(handler); };
+    }, [fetchData]);
+
+    // Aviso dos lotes vencidos ou vencendo nos próximos 7 dias, uma vez ao abrir a página.
+    useEffect(() => {
+        ApiService.get('/batches/expiring', { params: { within_days: 7, limit: 500 } })
+            .then(({ data, headers }) => {
+                if (data.length > 0) {
+                    const count = headers['x-next-cursor'] ? `${data.length}+` : data.length;
+                    notification.warning({ message: 'Produtos Próximos do Vencimento', description: `Você tem ${count} lote(s) vencendo nos próximos 7 dias.`, icon: <WarningFilled />, duration: 10 });
+                }
+            })
+            .catch(() => {});
     }, []);
 
-    useEffect(() => { fetchData(); }, [fetchData]);
-
     const handleFormSuccess = () => {
         message.success('Lote adicionado com sucesso!');
         setIsModalVisible(false);
         fetchData();
     };
 
-    // LÓGICA DE FILTRO ATUALIZADA
+    // O filtro "Vence em 7 dias" não inclui os que vencem hoje (a API devolve de hoje a +7 dias).
     const filteredBatches = useMemo(() => {
-        return batches
-            .filter(batch => { // Filtro de status
-                if (filter === 'all') return true;
-                const { days } = getExpirationStatus(batch.expiration_date);
-                if (filter === 'expired') return days < 0;
-                if (filter === 'today') return days === 0;
-                if (filter === '7days') return days > 0 && days <= 7;
-                return true;
-            })
-            .filter(batch => { // Filtro de pesquisa
-                if (!searchTerm) return true;
-                return batch.product?.name.toLowerCase().includes(searchTerm.toLowerCase());
-            });
-    }, [batches, filter, searchTerm]);
+        if (filter !== '7days') return batches;
+        return batches.filter(batch => getExpirationStatus(batch.expiration_date).days > 0);
+    }, [batches, filter]);
     
     const listVariants = { hidden: { opacity: 0 }, visible: { opacity: 1, transition: { staggerChildren: 0.05 } } };
     const itemVariants = { hidden: { opacity: 0, y: 20 }, visible: { opacity: 1, y: 0 } };
@@ -180,7 +190,7 @@ const ExpirationControlPage = () => {
                     <Button type="primary" size="large" icon={<PlusOutlined />} onClick={() => setIsModalVisible(true)}> Adicionar Lote </Button>
                 </div>
 
-                {loading ? ( <div style={{ textAlign: 'center', padding: 50 }}><Spin size="large" /></div> ) 
+                {loading && batches.length === 0 ? ( <div style={{ textAlign: 'center', padding: 50 }}><Spin size="large" /></div> ) 
                 : (
                     <AnimatePresence>
                         {filteredBatches.length > 0 ? (
@@ -194,7 +204,7 @@ const ExpirationControlPage = () => {
                                                 <div className="batch-list-item">
                                                     <div className={`list-item-status-bar ${status.variant}`}></div>
                                                     <div className="list-item-content">
-                                                        <Title level={5} style={{ margin: 0 }}>{batch.product?.name || 'Produto não encontrado'}</Title>
+                                                        <Title level={5} style={{ margin: 0 }}>{batch.product_name}</Title>
                                                         <Text type="secondary">Quantidade: {batch.quantity}</Text>
                                                         <Text strong>Validade: {dayjs(batch.expiration_date).format('DD/MM/YYYY')}</Text>
                                                         <Tag icon={status.icon} color={status.variant === 'error' ? 'volcano' : status.variant}>{status.text}</Tag>
@@ -210,6 +220,13 @@ const ExpirationControlPage = () => {
                         )}
                     </AnimatePresence>
                 )}
+                {nextCursor && (
+                    <div style={{ textAlign: 'center', marginTop: 16 }}>
+                        <Button onClick={() => fetchData(nextCursor)} loading={loading}>
+                            Carregar mais lotes
+                        </Button>
+                    </div>
+                )}
             </motion.div>
             
             <BatchFormModal
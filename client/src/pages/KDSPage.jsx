@@ -1,9 +1,10 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { Layout, Row, Col, Typography, Tag, message, Spin, Empty, Button, Badge, Divider, Tooltip } from 'antd';
 import { motion, AnimatePresence } from 'framer-motion';
 import { CheckCircleOutlined, ClockCircleOutlined, FireOutlined, RollbackOutlined, PlayCircleOutlined } from '@ant-design/icons';
 import { useNavigate } from 'react-router-dom';
 import ApiService from '../api/ApiService';
+import { useStoreEvents } from '../hooks/useStoreEvents';
 import dayjs from 'dayjs';
 import relativeTime from 'dayjs/plugin/relativeTime';
 import 'dayjs/locale/pt-br';
@@ -47,15 +48,38 @@ const getOrderTimeStatus = (createdAt) => {
   return { color: 'green', text: `há ${minutes} min`, variant: 'success' };
 };
 
+const isItemDone = (item) => item.status === 'ready' || item.status === 'delivered';
+
+// Aplica uma resposta incremental de /orders/kitchen?since= sobre a fila atual.
+const mergeKitchenDelta = (currentOrders, changedOrders) => {
+  const ordersById = new Map(currentOrders.map(order => [order.id, order]));
+  changedOrders.forEach(changed => {
+    if (changed.status !== 'open') {
+      ordersById.delete(changed.id);
+      return;
+    }
+    const existing = ordersById.get(changed.id);
+    const itemsById = new Map((existing ? existing.items : []).map(item => [item.id, item]));
+    changed.items.forEach(item => itemsById.set(item.id, item));
+    (changed.removed_item_ids || []).forEach(itemId => itemsById.delete(itemId));
+    if (itemsById.size === 0) {
+      ordersById.delete(changed.id);
+      return;
+    }
+    ordersById.set(changed.id, { ...changed, items: [...itemsById.values()] });
+  });
+  return [...ordersById.values()].sort((a, b) => dayjs(a.created_at).diff(dayjs(b.created_at)));
+};
+
 const OrderCard = ({ order, onStatusChange }) => {
   const timeStatus = getOrderTimeStatus(order.created_at);
-  const allItemsReady = order.items.every(item => item.status === 'ready');
+  const allItemsReady = order.items.every(isItemDone);
 
   return (
     <motion.div layout initial={{ opacity: 0, scale: 0.9 }} animate={{ opacity: 1, scale: 1 }} exit={{ opacity: 0, scale: 0.9, transition: { duration: 0.2 } }} whileHover={{ y: -5 }}>
       <Card className="order-card" headStyle={{ padding: '0 24px 0 30px', borderBottom: '1px solid #f0f0f0' }} bodyStyle={{ padding: '8px 16px' }} title={
           <div className="card-title">
-            <Title level={4} style={{ margin: 0 }}>Mesa {order.table?.number || 'Delivery'}</Title>
+            <Title level={4} style={{ margin: 0 }}>Mesa {order.table_number || 'Delivery'}</Title>
             <Tag icon={<ClockCircleOutlined />} color={timeStatus.color}>{timeStatus.text}</Tag>
           </div>
         }
@@ -66,7 +90,7 @@ const OrderCard = ({ order, onStatusChange }) => {
             <motion.div key={item.id} layout className={`order-item status-${item.status}`}>
               <div className="item-quantity"><Badge count={item.quantity} style={{ backgroundColor: '#1890ff' }} /></div>
               <div className="item-details">
-                <Text strong>{item.product.name}</Text>
+                <Text strong>{item.product_name}</Text>
                 {item.notes && <Text type="secondary" italic>- {item.notes}</Text>}
               </div>
               <div className="item-actions">
@@ -95,11 +119,21 @@ const KDSPage = () => {
   const [loading, setLoading] = useState(true);
   const navigate = useNavigate();
 
+  const cursorRef = useRef(null);
+
+  // Carga completa (inicial ou após ressincronização) ou incremental a partir do último cursor.
   const fetchKitchenOrders = useCallback(async (isInitialLoad = false) => {
     if (isInitialLoad) setLoading(true);
     try {
-      const response = await ApiService.get('/orders/kitchen'); // Assumindo que esta rota existe
-      setOrders(response.data);
+      const incremental = !isInitialLoad && cursorRef.current;
+      const response = await ApiService.get('/orders/kitchen', {
+        params: incremental ? { since: cursorRef.current } : {},
+      });
+      cursorRef.current = response.data.cursor;
+      // Cursor antigo demais: o servidor devolve a fila completa (full) em vez do delta.
+      setOrders(current => incremental && !response.data.full
+        ? mergeKitchenDelta(current, response.data.orders)
+        : response.data.orders);
     } catch {
       message.error('Erro ao buscar pedidos da cozinha.');
     } finally {
@@ -109,19 +143,21 @@ const KDSPage = () => {
 
   useEffect(() => {
     fetchKitchenOrders(true);
-    const interval = setInterval(() => fetchKitchenOrders(false), 10000);
-    return () => clearInterval(interval);
   }, [fetchKitchenOrders]);
 
+  // Busca apenas o que mudou quando a cozinha é afetada, em vez de consultar a API periodicamente.
+  useStoreEvents(
+    ['order.items_changed', 'order.status_changed', 'order_item.status_changed'],
+    (event) => fetchKitchenOrders(event.type === 'resync_required')
+  );
+
   const handleStatusChange = async (orderId, itemId, newStatus) => {
     try {
       if (newStatus === 'ready_all') {
         const orderToUpdate = orders.find(o => o.id === orderId);
-        if (orderToUpdate) {
-          const updatePromises = orderToUpdate.items.filter(item => item.status !== 'ready').map(item => 
-            ApiService.patch(`/orders/items/${item.id}/status`, { status: 'ready' })
-          );
-          await Promise.all(updatePromises);
+        const pendingItemIds = orderToUpdate ? orderToUpdate.items.filter(item => !isItemDone(item)).map(item => item.id) : [];
+        if (pendingItemIds.length > 0) {
+          await ApiService.patch('/orders/items/status', { item_ids: pendingItemIds, status: 'ready' });
         }
       } else {
         await ApiService.patch(`/orders/items/${itemId}/status`, { status: newStatus });
@@ -133,7 +169,7 @@ const KDSPage = () => {
     }
   };
   
-  const activeOrders = orders.filter(order => !order.items.every(item => item.status === 'ready'));
+  const activeOrders = orders.filter(order => !order.items.every(isItemDone));
 
   if (loading) {
     return <Spin tip="Carregando pedidos..." size="large" fullscreen />;
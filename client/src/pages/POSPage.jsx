@@ -337,7 +337,7 @@ const POSPage = () => {
     setSearchLoading(true);
     try {
       const limit = searchTerm ? 10 : 50;
-      const response = await ApiService.get(`/products/?search=${searchTerm}&limit=${limit}`);
+      const response = await ApiService.get('/products/catalog', { params: { search: searchTerm || undefined, limit } });
       const options = (response.data || []).map(product => ({
         value: product.name,
         label: (
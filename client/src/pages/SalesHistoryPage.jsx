@@ -1,7 +1,7 @@
 // client/src/pages/SalesHistoryPage.jsx
 
 import React, { useState, useEffect, useCallback } from 'react';
-import { Table, Card, Typography, message, Spin, Tag, Avatar, List, Space } from 'antd';
+import { Table, Card, Typography, message, Spin, Tag, Avatar, List, Space, Button } from 'antd';
 import { motion } from 'framer-motion';
 import { HistoryOutlined, DollarCircleOutlined, CreditCardOutlined, QrcodeOutlined } from '@ant-design/icons';
 import ApiService from '../api/ApiService';
@@ -21,12 +21,15 @@ const PageStyles = () => (
 const SalesHistoryPage = () => {
     const [sales, setSales] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
 
-    const fetchSales = useCallback(async () => {
+    // Sem cursor carrega a primeira página; com cursor acrescenta a página seguinte.
+    const fetchSales = useCallback(async (cursor = null) => {
         setLoading(true);
         try {
-            const response = await ApiService.get('/sales/');
-            setSales(response.data);
+            const response = await ApiService.get('/sales/', { params: cursor ? { cursor } : {} });
+            setSales(current => cursor ? [...current, ...response.data] : response.data);
+            setNextCursor(response.headers['x-next-cursor'] || null);
         } catch (error) {
             message.error('Falha ao carregar o histórico de vendas.');
         } finally {
@@ -122,6 +125,13 @@ const SalesHistoryPage = () => {
                         expandable={{ expandedRowRender }}
                         pagination={{ pageSize: 15 }}
                     />
+                    {nextCursor && (
+                        <div style={{ textAlign: 'center', marginTop: 16 }}>
+                            <Button onClick={() => fetchSales(nextCursor)} loading={loading}>
+                                Carregar vendas mais antigas
+                            </Button>
+                        </div>
+                    )}
                 </Card>
             </motion.div>
         </>
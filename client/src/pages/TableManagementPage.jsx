@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useMemo } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import { Card, Row, Col, Typography, Tag, Modal, Button, message, Spin, Empty, List, Avatar, Divider, Form, Input, Popconfirm, Space, Dropdown, Menu, Select, Tooltip, Checkbox, InputNumber, Alert } from 'antd';
 import { motion } from 'framer-motion';
 import {
@@ -12,6 +12,7 @@ import 'dayjs/locale/pt-br';
 import AddItemModal from '../components/AddItemModal';
 import { useNavigate } from 'react-router-dom';
 import PartialPaymentModal from '../components/PartialPaymentModal';
+import { useStoreEvents } from '../hooks/useStoreEvents';
 
 dayjs.extend(relativeTime);
 dayjs.locale('pt-br');
@@ -111,6 +112,23 @@ const TableCard = ({ table, onClick, onEdit, onDelete }) => {
 };
 
 
+// Mesma ordem do servidor: números em ordem numérica primeiro, depois os nomes.
+const compareTables = (a, b) => {
+    const aNumeric = /^[0-9]+$/.test(a.number);
+    const bNumeric = /^[0-9]+$/.test(b.number);
+    if (aNumeric !== bNumeric) return aNumeric ? -1 : 1;
+    if (aNumeric) return Number(a.number) - Number(b.number);
+    return a.number.localeCompare(b.number);
+};
+
+// Aplica uma resposta incremental de /tables/changes sobre o mapa atual.
+const mergeFloorChanges = (currentTables, changedTables, removedIds) => {
+    const tablesById = new Map(currentTables.map(table => [table.id, table]));
+    removedIds.forEach(id => tablesById.delete(id));
+    changedTables.forEach(table => tablesById.set(table.id, table));
+    return [...tablesById.values()].sort(compareTables);
+};
+
 const TableManagementPage = () => {
     const [tables, setTables] = useState([]);
     const [loading, setLoading] = useState(true);
@@ -129,11 +147,20 @@ const TableManagementPage = () => {
     const [selectedItemsToPay, setSelectedItemsToPay] = useState({});
     const [isPartialPaymentModalVisible, setIsPartialPaymentModalVisible] = useState(false);
 
+    const floorVersionRef = useRef(null);
+
+    // Sincronização incremental: envia a última versão recebida e aplica apenas as mesas alteradas.
     const fetchTables = useCallback(async (showLoading = false) => {
         if (showLoading) setLoading(true);
         try {
-            const response = await ApiService.get('/tables/');
-            setTables(response.data);
+            const response = await ApiService.get('/tables/changes', {
+                params: floorVersionRef.current ? { since_version: floorVersionRef.current } : {},
+                validateStatus: (status) => status === 200 || status === 304,
+            });
+            if (response.status === 304) return;
+            const { version, full, tables: changedTables, removed_ids: removedIds } = response.data;
+            floorVersionRef.current = version;
+            setTables(current => full ? changedTables : mergeFloorChanges(current, changedTables, removedIds));
         } catch {
             message.error('Erro ao carregar mesas.');
         } finally {
@@ -143,10 +170,17 @@ const TableManagementPage = () => {
 
     useEffect(() => {
         fetchTables(true);
-        const interval = setInterval(() => fetchTables(false), 15000);
-        return () => clearInterval(interval);
     }, [fetchTables]);
 
+    // Recarrega o mapa quando mesas mudam de status ou itens ficam prontos, sem polling.
+    useStoreEvents(
+        ['table.status_changed', 'order.status_changed', 'order_item.status_changed'],
+        (event) => {
+            if (event.type === 'resync_required') floorVersionRef.current = null;
+            fetchTables(false);
+        }
+    );
+
     const handleItemSelectionChange = (item, checked) => {
         const remainingQty = item.quantity - item.paid_quantity;
         setSelectedItemsToPay(prev => {
@@ -9,6 +9,7 @@ export default defineConfig({
       '/api': {
         target: 'http://127.0.0.1:8000', // URL do seu backend FastAPI
         changeOrigin: true,
+        ws: true, // Canal de eventos em tempo real (/api/v1/events/ws)
       },
     },
   },